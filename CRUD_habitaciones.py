@@ -1,172 +1,561 @@
-import pyodbc
+import bisect
+import functools
+import itertools
+import logging
 import os
-from conection_bd import conectar_bd 
+from conection_bd import conexion_bd, al_confirmar, en_transaccion, cerrar_pool, obtener_backend, ejecutar_async, ERRORES_BD
+from cache_bd import cache_catalogo, invalidar_habitaciones
+from indice_habitaciones import IndiceHabitaciones, COLUMNAS_ORDEN
+from indice_texto import IndiceTexto, indice_texto
+from modelos import Habitacion
+from disponibilidad import habitaciones_libres, esta_libre, a_fecha, obtener_calendario
+import reservas
+from metricas_bd import configurar_registro
+from precarga import precargar, tomar, cancelar_precargas, iniciar_precarga, cerrar_precarga
+from sincronizacion import replica_catalogo, REPLICA_ACTIVA
+from instantanea import INSTANTANEA_ACTIVA, leer_catalogo, iniciar_instantanea, detener_instantanea
+
+registro = logging.getLogger(__name__)
 
 # ========== CRUD habitaciones_BD ==========
 
+TAMANO_BLOQUE = 500  # Filas por fetchmany al recorrer la tabla
+TAMANO_PAGINA = 10   # Habitaciones por página en los listados de consola
+# Si es True, buscar_habitaciones() usa el índice en memoria sobre el catálogo cacheado
+USAR_INDICE_HABITACIONES = os.environ.get("HOTEL_INDICE_HABITACIONES", "1") != "0"
+
+def _normalizar(habitacion):
+    # Acepta un registro Habitacion o un diccionario con las claves en cualquier caso
+    # ('Lugar_Turistico' de la BD o 'lugar_turistico' de los formularios)
+    if isinstance(habitacion, Habitacion):
+        return habitacion
+    return {str(clave).lower(): valor for clave, valor in habitacion.items()}
+
 def agregar_habitacion_bd(habitacion):
-    conexion = conectar_bd()
-    if conexion:
-        try:
-            cursor = conexion.cursor()
-            print("Preparando para insertar habitación...")
-                        
-            balcon_db = 1 if habitacion['balcon'] else 0
-            disponible_db = 1 if habitacion['disponible'] else 0
+    # Inserta solo si el ID no existe, en una sola sentencia (ver guardar_habitacion_bd)
+    resultado = guardar_habitacion_bd(habitacion, actualizar=False)
+    if resultado == CONFLICTO:
+        registro.warning("No se insertó la habitación: ya existe una con el ID %s.", _normalizar(habitacion)['id'])
+    return resultado == INSERTADA
 
-            # Imprimir los valores que se van a insertar para depuración
-            print(f"Valores a insertar: ID={habitacion['id']}, Descripcion={habitacion['descripcion']}, Camas={habitacion['camas']}, Baños={habitacion['banos']}, Vista={habitacion['vista']}, Balcon_DB={balcon_db}, Precio={habitacion['precio']}, Disponible_DB={disponible_db}, Lugar_Turistico={habitacion['lugar_turistico']}")
-            
-            sql_insert = """
-                INSERT INTO dbohabitaciones 
-                (id, descripcion, camas, banos, vista, balcon, precio, disponible, Lugar_Turistico)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """
-            cursor.execute(sql_insert, (
-                habitacion['id'],
-                habitacion['descripcion'],
-                habitacion['camas'],
-                habitacion['banos'],
-                habitacion['vista'],
-                balcon_db,
-                habitacion['precio'],
-                disponible_db,
-                habitacion['lugar_turistico'] # ¡Nuevo campo aquí!
-            ))
-            
-            # Verificar si se afectaron filas (si la inserción fue exitosa)
-            if cursor.rowcount > 0:
-                conexion.commit()
-                print("Conexión: Commit realizado con éxito.")
-                return True
-            else:
-                
-                print("Advertencia: No se insertaron filas. ¿ID duplicado?")
-                conexion.rollback() 
-                return False
-
-        except pyodbc.IntegrityError as e:
-            # Capturar errores de integridad (ej. ID duplicado)
-            print(f"\nError de integridad al agregar habitación (posible ID duplicado): {e}")
-            if conexion:
-                conexion.rollback() 
-            return False
-        except Exception as e:
-            print(f"\nError general al agregar habitación: {e}")
-            if conexion:
-                conexion.rollback() # Revertir la transacción si hay error
-            return False
-        finally:
-            if conexion:
-                conexion.close()
-                print("Conexión: Cerrada.")
-    return False
+def _cargar_todas_habitaciones():
+    # Dentro de una transacción se lee con su conexión: sincronizar la réplica compartida
+    # desde ella publicaría cambios sin confirmar
+    compartida = not en_transaccion()
+    if INSTANTANEA_ACTIVA and compartida:
+        # De la réplica restaurada de la instantánea local, sin esperar a la red
+        return leer_catalogo('habitaciones')
+    if REPLICA_ACTIVA and compartida:
+        # Solo se leen de la BD los cambios desde la carga anterior
+        replica_catalogo.sincronizar()
+        return replica_catalogo.habitaciones()
+    with conexion_bd('cargar_todas_habitaciones') as conexion:
+        cursor = conexion.cursor()
+        registro.debug("Ejecutando SELECT * FROM dbohabitaciones...")
+        cursor.execute("SELECT * FROM dbohabitaciones")
+        habitaciones = Habitacion.desde_cursor(cursor, cursor.fetchall())
+        registro.debug("Se encontraron %d habitaciones en la BD.", len(habitaciones))
+    return habitaciones
+
+def _cargar_habitaciones_disponibles():
+    if INSTANTANEA_ACTIVA and not en_transaccion():
+        return [habitacion for habitacion in leer_catalogo('habitaciones') if habitacion.disponible]
+    with conexion_bd('cargar_habitaciones_disponibles') as conexion:
+        cursor = conexion.cursor()
+        cursor.execute("SELECT * FROM dbohabitaciones WHERE disponible = 1")
+        return Habitacion.desde_cursor(cursor, cursor.fetchall())
 
 def obtener_todas_habitaciones():
-    conexion = conectar_bd()
-    habitaciones = []
-    if conexion:
-        try:
-            cursor = conexion.cursor()
-            print("Ejecutando SELECT * FROM dbohabitaciones...")
-            cursor.execute("SELECT * FROM dbohabitaciones")
-            columnas = [column[0] for column in cursor.description]
-            habitaciones = [dict(zip(columnas, row)) for row in cursor.fetchall()]
-            print(f"Se encontraron {len(habitaciones)} habitaciones en la BD.")
-        except Exception as e:
-            print(f"\nError al obtener habitaciones: {e}")
-            habitaciones = []
-        finally:
-            if conexion:
-                conexion.close()
+    # Las habitaciones devueltas se comparten con la caché: no modificarlas (usar copiar())
+    try:
+        return list(cache_catalogo.obtener_o_cargar(('habitaciones', 'todas'), _cargar_todas_habitaciones))
+    except Exception as e:
+        registro.error("Error al obtener habitaciones: %s", e)
+        return []
+
+def obtener_habitaciones_disponibles(desde=None, hasta=None):
+    # Con fechas, solo las que además están libres todas las noches de [desde, hasta)
+    try:
+        habitaciones = list(cache_catalogo.obtener_o_cargar(('habitaciones', 'disponibles'), _cargar_habitaciones_disponibles))
+    except Exception as e:
+        registro.error("Error al obtener habitaciones disponibles: %s", e)
+        return []
+    if desde is not None and hasta is not None:
+        libres = habitaciones_libres(desde, hasta)
+        habitaciones = [hab for hab in habitaciones if hab['id'] in libres]
     return habitaciones
 
-def obtener_habitaciones_disponibles():
-    conexion = conectar_bd()
-    habitaciones = []
-    if conexion:
-        try:
+def iterar_habitaciones(solo_disponibles=False, tamano_bloque=TAMANO_BLOQUE):
+    """
+    Recorre las habitaciones en bloques de `tamano_bloque` filas (fetchmany) sin cargar
+    la tabla entera. La conexión queda prestada hasta que el generador se agota o se cierra.
+    """
+    sql = "SELECT * FROM dbohabitaciones"
+    if solo_disponibles:
+        sql += " WHERE disponible = 1"
+    with conexion_bd('iterar_habitaciones') as conexion:
+        cursor = conexion.cursor()
+        cursor.execute(sql)
+        construir = Habitacion.constructor(cursor.description)
+        while True:
+            filas = cursor.fetchmany(tamano_bloque)
+            if not filas:
+                break
+            for row in filas:
+                yield construir(row)
+
+def obtener_pagina_habitaciones(despues_de_id=None, tamano_pagina=TAMANO_PAGINA, solo_disponibles=False):
+    """
+    Devuelve una página de habitaciones ordenadas por id usando paginación por clave
+    (WHERE id > cursor), que cuesta lo mismo en la primera página que en la última.
+    Retorna (habitaciones, siguiente_cursor); siguiente_cursor es None en la última página.
+    Lanza ValueError si tamano_pagina es menor que 1.
+    """
+    if tamano_pagina < 1:
+        raise ValueError(f"El tamaño de página debe ser al menos 1 (se indicó {tamano_pagina}).")
+    if INSTANTANEA_ACTIVA:
+        return _pagina_local(despues_de_id, tamano_pagina, solo_disponibles)
+    condiciones = []
+    parametros = []
+    if despues_de_id is not None:
+        condiciones.append("id > ?")
+        parametros.append(despues_de_id)
+    if solo_disponibles:
+        condiciones.append("disponible = 1")
+    sql = "SELECT * FROM dbohabitaciones"
+    if condiciones:
+        sql += " WHERE " + " AND ".join(condiciones)
+    sql += " ORDER BY id" + obtener_backend().clausula_limite
+    # Se pide una fila de más para saber si hay página siguiente
+    parametros.append(tamano_pagina + 1)
+    try:
+        with conexion_bd('obtener_pagina_habitaciones') as conexion:
             cursor = conexion.cursor()
-            cursor.execute("SELECT * FROM dbohabitaciones WHERE disponible = 1")
-            columnas = [column[0] for column in cursor.description]
-            habitaciones = [dict(zip(columnas, row)) for row in cursor.fetchall()]
-        except Exception as e:
-            print(f"\nError al obtener habitaciones disponibles: {e}")
-            habitaciones = []
-        finally:
-            if conexion:
-                conexion.close()
-    return habitaciones
+            cursor.execute(sql, parametros)
+            habitaciones = Habitacion.desde_cursor(cursor, cursor.fetchmany(tamano_pagina + 1))
+    except Exception as e:
+        registro.error("Error al obtener la página de habitaciones: %s", e)
+        return [], None
+    if len(habitaciones) > tamano_pagina:
+        habitaciones = habitaciones[:tamano_pagina]
+        return habitaciones, habitaciones[-1]['id']
+    return habitaciones, None
+
+def _cargar_habitaciones_por_id():
+    habitaciones = sorted(cache_catalogo.obtener_o_cargar(('habitaciones', 'todas'), _cargar_todas_habitaciones),
+                          key=lambda habitacion: habitacion.id)
+    return [habitacion.id for habitacion in habitaciones], habitaciones
+
+def _pagina_local(despues_de_id, tamano_pagina, solo_disponibles):
+    # Misma paginación por clave que la consulta, sobre el catálogo local ordenado por id
+    try:
+        ids, habitaciones = cache_catalogo.obtener_o_cargar(('habitaciones', 'por_id'), _cargar_habitaciones_por_id)
+    except Exception as e:
+        registro.error("Error al obtener la página de habitaciones: %s", e)
+        return [], None
+    pagina = []
+    for habitacion in itertools.islice(habitaciones, 0 if despues_de_id is None else
+                                       bisect.bisect_right(ids, despues_de_id), None):
+        if solo_disponibles and not habitacion.disponible:
+            continue
+        if len(pagina) == tamano_pagina:
+            return pagina, pagina[-1]['id']
+        pagina.append(habitacion)
+    return pagina, None
+
+def buscar_habitaciones_bd(camas=None, banos=None, vista=None, balcon=None, precio_min=None,
+                           precio_max=None, disponible=None, orden='precio', descendente=False, limite=None):
+    """
+    Busca habitaciones por varios criterios con una consulta parametrizada. Solo se
+    incluyen en el WHERE los criterios indicados (los None se ignoran), de modo que la
+    BD puede usar los índices sobre (disponible, precio) y (vista, precio).
+    Retorna la lista de habitaciones, o una lista vacía en caso de error.
+    """
+    if orden not in COLUMNAS_ORDEN:
+        raise ValueError(f"No se puede ordenar por {orden!r}. Opciones: {', '.join(COLUMNAS_ORDEN)}")
+    condiciones = []
+    parametros = []
+    for columna, valor in (('camas', camas), ('banos', banos), ('vista', vista)):
+        if valor is not None:
+            condiciones.append(f"{columna} = ?")
+            parametros.append(valor.strip() if isinstance(valor, str) else valor)
+    for columna, valor in (('balcon', balcon), ('disponible', disponible)):
+        if valor is not None:
+            condiciones.append(f"{columna} = ?")
+            parametros.append(1 if valor else 0)
+    if precio_min is not None:
+        condiciones.append("precio >= ?")
+        parametros.append(precio_min)
+    if precio_max is not None:
+        condiciones.append("precio <= ?")
+        parametros.append(precio_max)
+
+    sql = "SELECT * FROM dbohabitaciones"
+    if condiciones:
+        sql += " WHERE " + " AND ".join(condiciones)
+    # El orden por id desempata para que el resultado sea estable
+    sql += f" ORDER BY {orden} {'DESC' if descendente else 'ASC'}"
+    if orden != 'id':
+        sql += ", id"
+    if limite is not None:
+        sql += obtener_backend().clausula_limite
+        parametros.append(limite)
+    try:
+        with conexion_bd('buscar_habitaciones_bd') as conexion:
+            cursor = conexion.cursor()
+            cursor.execute(sql, parametros)
+            return Habitacion.desde_cursor(cursor, cursor.fetchall())
+    except Exception as e:
+        registro.error("Error al buscar habitaciones: %s", e)
+        return []
+
+def _cargar_indice_habitaciones():
+    return IndiceHabitaciones(cache_catalogo.obtener_o_cargar(('habitaciones', 'todas'), _cargar_todas_habitaciones))
+
+def buscar_habitaciones(usar_indice=None, orden='precio', descendente=False, limite=None, **criterios):
+    """
+    Busca habitaciones por criterios (los mismos que buscar_habitaciones_bd). Con el índice
+    en memoria la búsqueda no consulta la BD mientras el catálogo siga en caché.
+    """
+    if usar_indice is None:
+        usar_indice = USAR_INDICE_HABITACIONES
+    if not usar_indice:
+        return buscar_habitaciones_bd(orden=orden, descendente=descendente, limite=limite, **criterios)
+    try:
+        indice = cache_catalogo.obtener_o_cargar(('habitaciones', 'indice'), _cargar_indice_habitaciones)
+    except Exception as e:
+        registro.error("Error al buscar habitaciones: %s", e)
+        return []
+    return indice.buscar(criterios, orden=orden, descendente=descendente, limite=limite)
+
+def _catalogo_texto():
+    return cache_catalogo.obtener_o_cargar(('habitaciones', 'todas'), _cargar_todas_habitaciones)
+
+def buscar_habitaciones_texto(consulta, limite=None, solo_disponibles=False, todas=True):
+    """
+    Busca habitaciones por palabras de su descripción o de su lugar turístico ("suite
+    jacuzzi", "cenote"), sin distinguir acentos ni mayúsculas, con el índice invertido de
+    indice_texto. El índice se mantiene al día con cada escritura, de modo que la búsqueda
+    no lee la tabla; las habitaciones se devuelven del catálogo cacheado.
+    Args:
+        consulta (str): Palabras a buscar.
+        limite (int): Número máximo de resultados.
+        solo_disponibles (bool): Solo habitaciones con disponible = 1.
+        todas (bool): Exigir todas las palabras (si es False, basta con una).
+    Returns:
+        list: Habitacion ordenadas de más a menos relevante. Lista vacía en caso de error.
+    """
+    try:
+        if en_transaccion():
+            # Lo escrito en la transacción no se publica en el índice compartido: se indexa
+            # el catálogo que ve la transacción solo para esta búsqueda
+            indice = IndiceTexto()
+            indice.construir(_catalogo_texto())
+        else:
+            indice = indice_texto
+            indice.reconstruir(_catalogo_texto)
+        ids, habitaciones = cache_catalogo.obtener_o_cargar(('habitaciones', 'por_id'), _cargar_habitaciones_por_id)
+    except Exception as e:
+        registro.error("Error al buscar habitaciones por texto: %s", e)
+        return []
+
+    def habitacion_de(id_habitacion):
+        posicion = bisect.bisect_left(ids, id_habitacion)
+        if posicion < len(ids) and ids[posicion] == id_habitacion:
+            return habitaciones[posicion]
+        return None
+
+    def incluir(id_habitacion):
+        # Descarta las que el catálogo ya no tiene (borradas desde otro proceso)
+        habitacion = habitacion_de(id_habitacion)
+        return habitacion is not None and (not solo_disponibles or habitacion.disponible)
+
+    return [habitacion_de(id_habitacion)
+            for id_habitacion, _ in indice.buscar(consulta, limite, todas=todas, filtro=incluir)]
 
 def buscar_habitacion_por_id_bd(id_habitacion):
-    conexion = conectar_bd()
+    # Siempre de la BD, también con instantánea: la versión que devuelve es la que se usa
+    # para el compare-and-swap (actualizar_habitacion, PUT /habitaciones/<id>), y la réplica
+    # puede llevar hasta INSTANTANEA_ANTIGUEDAD_MAXIMA segundos de retraso
     habitacion = None
-    if conexion:
-        try:
+    try:
+        with conexion_bd('buscar_habitacion_por_id_bd') as conexion:
             cursor = conexion.cursor()
             cursor.execute("SELECT * FROM dbohabitaciones WHERE id = ?", (id_habitacion,))
-            columnas = [column[0] for column in cursor.description]
-            result = cursor.fetchone()
-            if result:
-                habitacion = dict(zip(columnas, result))
-        except Exception as e:
-            print(f"\nError al buscar habitación: {e}")
-            habitacion = None
-        finally:
-            if conexion:
-                conexion.close()
+            habitacion = Habitacion.desde_fila(cursor, cursor.fetchone())
+    except ERRORES_BD as e:
+        if INSTANTANEA_ACTIVA and not en_transaccion():
+            return _habitacion_local(id_habitacion, e)
+        registro.error("Error al buscar habitación: %s", e)
+    except Exception as e:
+        registro.error("Error al buscar habitación: %s", e)
     return habitacion
 
-def actualizar_habitacion_bd(habitacion):
-    conexion = conectar_bd()
-    if conexion:
-        try:
+def _habitacion_local(id_habitacion, error):
+    # Sin base de datos se sirve de la réplica local, aunque su versión pueda estar atrasada
+    registro.warning("Base de datos no disponible; la habitación %s se lee del catálogo local: %s",
+                     id_habitacion, error)
+    try:
+        iniciar_instantanea()  # Restaura la réplica de la instantánea si aún no se hizo
+        habitacion = replica_catalogo.habitacion(int(id_habitacion))
+    except (TypeError, ValueError):
+        return None
+    # Una copia, como la que crea la consulta: quien la reciba puede modificarla
+    # (p. ej. el formulario de actualizar_habitacion) sin tocar la réplica compartida
+    return None if habitacion is None else habitacion.copiar()
+
+# Resultados de actualizar_habitacion_versionada_bd
+ACTUALIZADA = 'actualizada'
+CONFLICTO = 'conflicto'
+NO_EXISTE = 'no_existe'
+ERROR = 'error'
+
+INSERTADA = 'insertada'
+
+# Columnas que escriben guardar_habitacion_bd / guardar_habitaciones_bd (la primera es la clave)
+COLUMNAS_GUARDADO = ('id', 'descripcion', 'camas', 'banos', 'vista', 'balcon', 'precio', 'disponible',
+                     'Lugar_Turistico')
+
+def _fila_guardado(habitacion):
+    habitacion = _normalizar(habitacion)
+    # Conversión de True/False a 1/0 para campos BIT
+    return (int(habitacion['id']), habitacion['descripcion'], habitacion['camas'], habitacion['banos'],
+            habitacion['vista'], 1 if habitacion['balcon'] else 0, habitacion['precio'],
+            1 if habitacion['disponible'] else 0, habitacion['lugar_turistico'])
+
+def guardar_habitacion_bd(habitacion, actualizar=True, version_esperada=None):
+    """
+    Inserta una habitación o, si ya existe, la actualiza (incrementando su versión), en una
+    sola sentencia: MERGE en SQL Server, INSERT ... ON CONFLICT en SQLite. No hace falta
+    comprobar antes si el ID existe, y dos altas simultáneas del mismo ID no chocan.
+    Args:
+        habitacion (dict | Habitacion): Habitación completa.
+        actualizar (bool): Si es False, una habitación existente no se toca (CONFLICTO).
+        version_esperada (int): Si se indica, solo se actualiza si la versión en la BD es esa.
+    Returns:
+        str: INSERTADA, ACTUALIZADA, CONFLICTO o ERROR.
+    """
+    try:
+        fila = _fila_guardado(habitacion)
+        comprobar = actualizar and version_esperada is not None
+        sql = obtener_backend().sql_guardar_filas('dbohabitaciones', COLUMNAS_GUARDADO, 1, actualizar, comprobar)
+        with conexion_bd('guardar_habitacion_bd') as conexion:
             cursor = conexion.cursor()
-            # Conversión de True/False a 1/0 para campos BIT al actualizar
-            balcon_db = 1 if habitacion['balcon'] else 0
-            disponible_db = 1 if habitacion['disponible'] else 0
-
-            cursor.execute("""
-                UPDATE dbohabitaciones 
-                SET descripcion = ?, camas = ?, banos = ?, vista = ?, 
-                    balcon = ?, precio = ?, disponible = ?, Lugar_Turistico = ?
-                WHERE id = ?
-            """, (
-                habitacion['descripcion'],
-                habitacion['camas'],
-                habitacion['banos'],
-                habitacion['vista'],
-                balcon_db,       # Usamos el valor convertido
-                habitacion['precio'],
-                disponible_db,   # Usamos el valor convertido
-                habitacion['lugar_turistico'], # ¡Nuevo campo aquí!
-                habitacion['id']
-            ))
+            cursor.execute(sql, fila + ((version_esperada,) if comprobar else ()))
+            devueltas = cursor.fetchall()
             conexion.commit()
-            return True
-        except Exception as e:
-            print(f"\nError al actualizar habitación: {e}")
-            return False
-        finally:
-            if conexion:
-                conexion.close()
-    return False
+    except Exception as e:
+        registro.error("Error al guardar habitación: %s", e)
+        return ERROR
+    if not devueltas:
+        return CONFLICTO
+    al_confirmar(invalidar_habitaciones)
+    al_confirmar(functools.partial(indice_texto.actualizar, [Habitacion(*fila)]))
+    return INSERTADA if devueltas[0][1] == 0 else ACTUALIZADA
+
+def guardar_habitaciones_bd(habitaciones, actualizar=True):
+    """
+    Versión en bloque de guardar_habitacion_bd: una sentencia por lote de filas (tantas
+    como admite el límite de parámetros del backend) y un único commit. Si un ID se repite
+    en la entrada, cuenta su última aparición.
+    Args:
+        habitaciones (iterable): Habitaciones (dict o Habitacion).
+        actualizar (bool): Si es False, las habitaciones existentes no se tocan.
+    Returns:
+        dict: {'insertadas', 'actualizadas', 'conflictos', 'duplicadas'} (listas de IDs) y
+              'error' (None, o el mensaje si no se guardó nada).
+    """
+    resumen = {'insertadas': [], 'actualizadas': [], 'conflictos': [], 'duplicadas': [], 'error': None}
+    filas = {}
+    try:
+        for habitacion in habitaciones:
+            fila = _fila_guardado(habitacion)
+            if fila[0] in filas:
+                resumen['duplicadas'].append(fila[0])
+            filas[fila[0]] = fila
+    except (KeyError, TypeError, ValueError) as e:
+        resumen['error'] = f"Habitación inválida: {e!r}"
+        return resumen
+
+    backend = obtener_backend()
+    por_lote = max(backend.maximo_parametros // len(COLUMNAS_GUARDADO), 1)
+    pendientes = list(filas.values())
+    versiones = {}
+    try:
+        with conexion_bd('guardar_habitaciones_bd') as conexion:
+            cursor = conexion.cursor()
+            for inicio in range(0, len(pendientes), por_lote):
+                lote = pendientes[inicio:inicio + por_lote]
+                cursor.execute(backend.sql_guardar_filas('dbohabitaciones', COLUMNAS_GUARDADO, len(lote), actualizar),
+                               [valor for fila in lote for valor in fila])
+                versiones.update((fila[0], fila[1]) for fila in cursor.fetchall())
+            conexion.commit()
+    except Exception as e:
+        registro.error("Error al guardar habitaciones en bloque: %s", e)
+        resumen['error'] = str(e)
+        return resumen
+
+    for id_habitacion in filas:
+        version = versiones.get(id_habitacion)
+        if version is None:
+            resumen['conflictos'].append(id_habitacion)
+        elif version == 0:
+            resumen['insertadas'].append(id_habitacion)
+        else:
+            resumen['actualizadas'].append(id_habitacion)
+    if versiones:
+        al_confirmar(invalidar_habitaciones)
+        al_confirmar(functools.partial(indice_texto.actualizar,
+                                       [Habitacion(*filas[id_habitacion]) for id_habitacion in versiones]))
+    return resumen
+
+def actualizar_habitacion_versionada_bd(habitacion, version_esperada=None):
+    """
+    Actualiza una habitación e incrementa su versión. Si se indica `version_esperada`,
+    el UPDATE solo se aplica si la versión en la BD sigue siendo esa (compare-and-swap),
+    de modo que no se pisan los cambios que otro usuario guardó mientras tanto.
+    Retorna ACTUALIZADA, CONFLICTO, NO_EXISTE o ERROR.
+    """
+    try:
+        habitacion = _normalizar(habitacion)
+        # Conversión de True/False a 1/0 para campos BIT al actualizar
+        balcon_db = 1 if habitacion['balcon'] else 0
+        disponible_db = 1 if habitacion['disponible'] else 0
+        sql = """
+            UPDATE dbohabitaciones 
+            SET descripcion = ?, camas = ?, banos = ?, vista = ?, 
+                balcon = ?, precio = ?, disponible = ?, Lugar_Turistico = ?,
+                version = version + 1
+            WHERE id = ?
+        """
+        parametros = [
+            habitacion['descripcion'],
+            habitacion['camas'],
+            habitacion['banos'],
+            habitacion['vista'],
+            balcon_db,       # Usamos el valor convertido
+            habitacion['precio'],
+            disponible_db,   # Usamos el valor convertido
+            habitacion['lugar_turistico'], # ¡Nuevo campo aquí!
+            habitacion['id']
+        ]
+        if version_esperada is not None:
+            sql += " AND version = ?"
+            parametros.append(version_esperada)
+        with conexion_bd('actualizar_habitacion_versionada_bd') as conexion:
+            cursor = conexion.cursor()
+            try:
+                cursor.execute(sql, parametros)
+            except Exception:
+                conexion.rollback()  # No dejar abierta la transacción del UPDATE fallido
+                raise
+            if cursor.rowcount > 0:
+                conexion.commit()
+                al_confirmar(invalidar_habitaciones)
+                al_confirmar(functools.partial(indice_texto.actualizar, [Habitacion(*_fila_guardado(habitacion))]))
+                return ACTUALIZADA
+            conexion.rollback()
+            if version_esperada is None:
+                return NO_EXISTE
+            cursor.execute("SELECT version FROM dbohabitaciones WHERE id = ?", (habitacion['id'],))
+            if cursor.fetchone() is None:
+                return NO_EXISTE
+        # La cambió otro proceso: lo cacheado (y la réplica local) está atrasado
+        invalidar_habitaciones()
+        return CONFLICTO
+    except Exception as e:
+        registro.error("Error al actualizar habitación: %s", e)
+        return ERROR
+
+def actualizar_habitacion_bd(habitacion):
+    # Actualización simple (gana la última escritura), como siempre: la versión que traiga
+    # la habitación se ignora. Para detectar conflictos, actualizar_habitacion_versionada_bd.
+    # Solo devuelve False si hubo un error, aunque el ID no exista.
+    return actualizar_habitacion_versionada_bd(habitacion) != ERROR
 
 def eliminar_habitacion_bd(id_habitacion):
-    conexion = conectar_bd()
-    if conexion:
-        try:
+    try:
+        with conexion_bd('eliminar_habitacion_bd') as conexion:
             cursor = conexion.cursor()
-            cursor.execute("DELETE FROM dbohabitaciones WHERE id = ?", (id_habitacion,))
+            try:
+                # Primero la habitación: su bloqueo de fila detiene las reservas en curso
+                # (que incrementan su versión) hasta el commit, y ya no la encontrarán
+                cursor.execute("DELETE FROM dbohabitaciones WHERE id = ?", (id_habitacion,))
+                eliminada = cursor.rowcount > 0
+                # Sus ocupaciones, en la misma transacción: sin ellas una habitación creada
+                # después con el mismo ID heredaría las reservas de la anterior
+                cursor.execute("DELETE FROM ocupacion_habitaciones WHERE habitacion_id = ?", (id_habitacion,))
+            except Exception:
+                conexion.rollback()
+                raise
             conexion.commit()
-            return cursor.rowcount > 0
-        except Exception as e:
-            print(f"\nError al eliminar habitación: {e}")
-            return False
-        finally:
-            if conexion:
-                conexion.close()
-    return False
+            al_confirmar(invalidar_habitaciones)
+            if eliminada:
+                al_confirmar(functools.partial(indice_texto.eliminar, [int(id_habitacion)]))
+            return eliminada
+    except Exception as e:
+        registro.error("Error al eliminar habitación: %s", e)
+        return False
+
+# ========== API ASÍNCRONA ==========
+# Mismas funciones y mismos resultados que las síncronas, para usar con await desde un
+# bucle de eventos. Cada llamada se ejecuta en el ejecutor acotado de conection_bd.
+
+async def agregar_habitacion_async(habitacion):
+    return await ejecutar_async(agregar_habitacion_bd, habitacion)
+
+async def guardar_habitacion_async(habitacion, actualizar=True, version_esperada=None):
+    return await ejecutar_async(guardar_habitacion_bd, habitacion, actualizar, version_esperada)
+
+async def guardar_habitaciones_async(habitaciones, actualizar=True):
+    return await ejecutar_async(guardar_habitaciones_bd, habitaciones, actualizar)
+
+async def obtener_todas_habitaciones_async():
+    return await ejecutar_async(obtener_todas_habitaciones)
+
+async def obtener_habitaciones_disponibles_async(desde=None, hasta=None):
+    return await ejecutar_async(obtener_habitaciones_disponibles, desde, hasta)
+
+async def iterar_habitaciones_async(solo_disponibles=False, tamano_bloque=TAMANO_BLOQUE):
+    """
+    Versión asíncrona de iterar_habitaciones (usar con `async for`). Lee por páginas de
+    `tamano_bloque` con paginación por clave, así que no retiene una conexión entre bloques.
+    """
+    siguiente = None
+    while True:
+        habitaciones, siguiente = await ejecutar_async(
+            obtener_pagina_habitaciones, siguiente, tamano_bloque, solo_disponibles)
+        for habitacion in habitaciones:
+            yield habitacion
+        if siguiente is None:
+            break
+
+async def obtener_pagina_habitaciones_async(despues_de_id=None, tamano_pagina=TAMANO_PAGINA, solo_disponibles=False):
+    return await ejecutar_async(obtener_pagina_habitaciones, despues_de_id, tamano_pagina, solo_disponibles)
+
+async def buscar_habitaciones_async(usar_indice=None, orden='precio', descendente=False, limite=None, **criterios):
+    return await ejecutar_async(buscar_habitaciones, usar_indice, orden, descendente, limite, **criterios)
+
+async def buscar_habitaciones_texto_async(consulta, limite=None, solo_disponibles=False, todas=True):
+    return await ejecutar_async(buscar_habitaciones_texto, consulta, limite, solo_disponibles, todas)
+
+async def buscar_habitacion_por_id_async(id_habitacion):
+    return await ejecutar_async(buscar_habitacion_por_id_bd, id_habitacion)
+
+async def actualizar_habitacion_versionada_async(habitacion, version_esperada=None):
+    return await ejecutar_async(actualizar_habitacion_versionada_bd, habitacion, version_esperada)
+
+async def actualizar_habitacion_async(habitacion):
+    return await ejecutar_async(actualizar_habitacion_bd, habitacion)
+
+async def eliminar_habitacion_async(id_habitacion):
+    return await ejecutar_async(eliminar_habitacion_bd, id_habitacion)
+
+async def reservar_habitacion_async(habitacion_id, desde, hasta, huesped, reintentos=None):
+    return await ejecutar_async(reservas.reservar_habitacion, habitacion_id, desde, hasta, huesped, reintentos)
+
+async def cancelar_reserva_async(reserva_id):
+    return await ejecutar_async(reservas.cancelar_reserva, reserva_id)
 
 # ========== FUNCIONES DE LA APLICACIÓN ==========
 
@@ -175,11 +564,6 @@ def agregar_habitacion():
     print("\n--- Agregar Nueva Habitación ---")
     id_habitacion = input("ID de la habitación: ")
     
-    if buscar_habitacion_por_id_bd(id_habitacion):
-        print("\nError: Ya existe una habitación con ese ID.")
-        input("Presione Enter para continuar...")
-        return
-    
     descripcion = input("Descripción: ")
     camas = int(input("Número de camas: "))
     banos = int(input("Número de baños: "))
@@ -201,35 +585,93 @@ def agregar_habitacion():
         'lugar_turistico': lugar_turistico # ¡Nuevo campo en el diccionario!
     }
     
-    if agregar_habitacion_bd(nueva_habitacion):
+    # El alta comprueba el ID en la misma sentencia, sin consultarlo antes
+    resultado = guardar_habitacion_bd(nueva_habitacion, actualizar=False)
+    if resultado == INSERTADA:
         print("\nHabitación agregada con éxito!")
+    elif resultado == CONFLICTO:
+        print("\nError: Ya existe una habitación con ese ID.")
     else:
         print("\nError al agregar habitación.")
     input("Presione Enter para continuar...")
 
+def _pedir_fechas():
+    # Devuelve (desde, hasta), (None, None) si se dejan en blanco, o None si son inválidas
+    llegada = input("Fecha de llegada (AAAA-MM-DD, en blanco para no filtrar por fechas): ")
+    if not llegada:
+        return None, None
+    salida = input("Fecha de salida (AAAA-MM-DD): ")
+    try:
+        desde, hasta = a_fecha(llegada), a_fecha(salida)
+    except ValueError:
+        print("\nError: Las fechas deben tener el formato AAAA-MM-DD.")
+        return None
+    if hasta <= desde:
+        print("\nError: La fecha de salida debe ser posterior a la de llegada.")
+        return None
+    return desde, hasta
+
+def _paginar_lista(habitaciones):
+    # Adapta una lista ya calculada a la interfaz de obtener_pagina_habitaciones
+    def obtener_pagina(desplazamiento):
+        desplazamiento = desplazamiento or 0
+        fin = desplazamiento + TAMANO_PAGINA
+        return habitaciones[desplazamiento:fin], (fin if fin < len(habitaciones) else None)
+    return obtener_pagina
+
+def _pagina_todas(siguiente):
+    return obtener_pagina_habitaciones(siguiente, TAMANO_PAGINA)
+
+def _pagina_disponibles(siguiente):
+    return obtener_pagina_habitaciones(siguiente, TAMANO_PAGINA, solo_disponibles=True)
+
+def _mostrar_paginas(obtener_pagina, imprimir_habitacion, mensaje_vacio, clave=None):
+    # Muestra la primera página en cuanto llega y solo pide la siguiente si el usuario la quiere.
+    # Con `clave`, las páginas pueden venir precargadas ((clave, cursor), ver precarga.py) y
+    # mientras el usuario lee una página se precarga la siguiente.
+    siguiente = None
+    numero_pagina = 1
+    while True:
+        if clave is None:
+            habitaciones, siguiente = obtener_pagina(siguiente)
+        else:
+            habitaciones, siguiente = tomar((clave, siguiente), obtener_pagina, siguiente)
+        if not habitaciones and numero_pagina == 1:
+            print(mensaje_vacio)
+            break
+        for hab in habitaciones:
+            imprimir_habitacion(hab)
+        if siguiente is None:
+            break
+        if clave is not None:
+            precargar((clave, siguiente), obtener_pagina, siguiente, espacio='habitaciones')
+        opcion = input(f"\nPágina {numero_pagina}. Enter para ver la siguiente, 'q' para terminar: ")
+        if opcion.strip().lower() == 'q':
+            if clave is not None:
+                cancelar_precargas((clave, siguiente))
+            return
+        numero_pagina += 1
+    input("\nPresione Enter para continuar...")
+
 def mostrar_todas_habitaciones():
     os.system('cls' if os.name == 'nt' else 'clear')
     print("\n--- Listado de Habitaciones ---")
-    habitaciones = obtener_todas_habitaciones() # Ahora con mensaje de cuántas encontró
-    
-    if not habitaciones:
-        print("No hay habitaciones registradas.")
-    else:
-        for hab in habitaciones:
-            # Asegúrate de que los campos BIT se muestren correctamente (True/False o Sí/No)
-            balcon_display = 'Sí' if hab.get('balcon') else 'No' # .get() para evitar KeyError si la columna falta
-            disponible_display = 'Sí' if hab.get('disponible') else 'No'
 
-            print(f"\nID: {hab.get('id')}")
-            print(f"Descripción: {hab.get('descripcion')}")
-            print(f"Camas: {hab.get('camas')} - Baños: {hab.get('banos')}")
-            print(f"Vista: {hab.get('vista')} - Balcón: {balcon_display}")
-            print(f"Precio: ${hab.get('precio', 0.0):.2f} por noche") # .get() con valor por defecto
-            print(f"Disponible: {disponible_display}")
-            print(f"Lugar Turístico: {hab.get('Lugar_Turistico', 'N/A')}") # ¡Nuevo campo aquí!
-            print("-" * 40)
-    
-    input("\nPresione Enter para continuar...")
+    def imprimir(hab):
+        # Asegúrate de que los campos BIT se muestren correctamente (True/False o Sí/No)
+        balcon_display = 'Sí' if hab.get('balcon') else 'No' # .get() para evitar KeyError si la columna falta
+        disponible_display = 'Sí' if hab.get('disponible') else 'No'
+
+        print(f"\nID: {hab.get('id')}")
+        print(f"Descripción: {hab.get('descripcion')}")
+        print(f"Camas: {hab.get('camas')} - Baños: {hab.get('banos')}")
+        print(f"Vista: {hab.get('vista')} - Balcón: {balcon_display}")
+        print(f"Precio: ${hab.get('precio', 0.0):.2f} por noche") # .get() con valor por defecto
+        print(f"Disponible: {disponible_display}")
+        print(f"Lugar Turístico: {hab.get('Lugar_Turistico', 'N/A')}") # ¡Nuevo campo aquí!
+        print("-" * 40)
+
+    _mostrar_paginas(_pagina_todas, imprimir, "No hay habitaciones registradas.", clave='todas')
 
 def buscar_habitacion_por_id():
     os.system('cls' if os.name == 'nt' else 'clear')
@@ -271,56 +713,78 @@ def actualizar_habitacion():
         return
     
     print("\nDeje en blanco los campos que no desea modificar.")
+    cambios = {}  # Solo los campos que el usuario modifica
     
     descripcion = input(f"Nueva descripción [{habitacion['descripcion']}]: ")
     if descripcion:
-        habitacion['descripcion'] = descripcion
+        cambios['descripcion'] = descripcion
         
     camas = input(f"Nuevo número de camas [{habitacion['camas']}]: ")
     if camas:
         try:
-            habitacion['camas'] = int(camas)
+            cambios['camas'] = int(camas)
         except ValueError:
             print("Valor inválido para camas. Se mantendrá el valor anterior.")
             
     banos = input(f"Nuevo número de baños [{habitacion['banos']}]: ")
     if banos:
         try:
-            habitacion['banos'] = int(banos)
+            cambios['banos'] = int(banos)
         except ValueError:
             print("Valor inválido para baños. Se mantendrá el valor anterior.")
         
     vista = input(f"Nueva vista [{habitacion['vista']}]: ")
     if vista:
-        habitacion['vista'] = vista
+        cambios['vista'] = vista
         
     balcon_actual_str = 'si' if habitacion['balcon'] else 'no'
     balcon = input(f"¿Tiene balcón? [{balcon_actual_str}]: ").lower()
     if balcon in ['si', 'no']: # Validar entrada
-        habitacion['balcon'] = balcon == 'si'
+        cambios['balcon'] = balcon == 'si'
     elif balcon: # Si se ingresó algo pero no es 'si' o 'no'
         print("Valor inválido para balcón. Se mantendrá el valor anterior.")
         
     precio = input(f"Nuevo precio [{habitacion['precio']}]: ")
     if precio:
         try:
-            habitacion['precio'] = float(precio)
+            cambios['precio'] = float(precio)
         except ValueError:
             print("Valor inválido para precio. Se mantendrá el valor anterior.")
         
     disponible_actual_str = 'si' if habitacion['disponible'] else 'no'
     disponible = input(f"¿Disponible? [{disponible_actual_str}]: ").lower()
     if disponible in ['si', 'no']: # Validar entrada
-        habitacion['disponible'] = disponible == 'si'
+        cambios['disponible'] = disponible == 'si'
     elif disponible: # Si se ingresó algo pero no es 'si' o 'no'
         print("Valor inválido para disponible. Se mantendrá el valor anterior.")
 
     lugar_turistico = input(f"Nuevo Lugar Turístico [{habitacion.get('Lugar_Turistico', 'N/A')}]: ") # ¡Nuevo input aquí!
     if lugar_turistico:
-        habitacion['lugar_turistico'] = lugar_turistico
+        cambios['lugar_turistico'] = lugar_turistico
         
-    if actualizar_habitacion_bd(habitacion):
+    # No se retiene ningún bloqueo mientras el usuario escribe: al guardar se comprueba que
+    # la versión leída siga vigente y, si otro usuario la cambió, se ofrece reaplicar los cambios
+    while True:
+        habitacion.update(cambios)
+        resultado = actualizar_habitacion_versionada_bd(habitacion, habitacion.get('version'))
+        if resultado != CONFLICTO:
+            break
+        print("\nOtro usuario modificó esta habitación mientras usted la editaba.")
+        habitacion = buscar_habitacion_por_id_bd(id_actualizar)
+        if not habitacion:
+            resultado = NO_EXISTE
+            break
+        print(f"Valores actuales: {habitacion['descripcion']} - {habitacion['camas']} camas - "
+              f"{habitacion['banos']} baños - vista {habitacion['vista']} - ${habitacion['precio']}")
+        if input("¿Aplicar sus cambios sobre la versión actual? (si/no): ").lower() != 'si':
+            print("\nActualización cancelada.")
+            input("Presione Enter para continuar...")
+            return
+
+    if resultado == ACTUALIZADA:
         print("\nHabitación actualizada con éxito!")
+    elif resultado == NO_EXISTE:
+        print("\nLa habitación ya no existe.")
     else:
         print("\nError al actualizar habitación.")
     input("Presione Enter para continuar...")
@@ -339,24 +803,30 @@ def eliminar_habitacion():
 def mostrar_habitaciones_disponibles():
     os.system('cls' if os.name == 'nt' else 'clear')
     print("\n--- Habitaciones Disponibles ---")
-    habitaciones = obtener_habitaciones_disponibles()
-    
-    if not habitaciones:
-        print("No hay habitaciones disponibles en este momento.")
-    else:
-        for hab in habitaciones:
-            balcon_display = 'Sí' if hab.get('balcon') else 'No'
-            disponible_display = 'Sí' if hab.get('disponible') else 'No'
+    fechas = _pedir_fechas()
+    if fechas is None:
+        input("Presione Enter para continuar...")
+        return
+    desde, hasta = fechas
 
-            print(f"\nID: {hab.get('id')}")
-            print(f"Descripción: {hab.get('descripcion')}")
-            print(f"Camas: {hab.get('camas')} - Baños: {hab.get('banos')}")
-            print(f"Vista: {hab.get('vista')} - Balcón: {balcon_display}")
-            print(f"Precio: ${hab.get('precio', 0.0):.2f} por noche")
-            print(f"Lugar Turístico: {hab.get('Lugar_Turistico', 'N/A')}") # ¡Nuevo campo aquí!
-            print("-" * 40)
-    
-    input("\nPresione Enter para continuar...")
+    def imprimir(hab):
+        balcon_display = 'Sí' if hab.get('balcon') else 'No'
+
+        print(f"\nID: {hab.get('id')}")
+        print(f"Descripción: {hab.get('descripcion')}")
+        print(f"Camas: {hab.get('camas')} - Baños: {hab.get('banos')}")
+        print(f"Vista: {hab.get('vista')} - Balcón: {balcon_display}")
+        print(f"Precio: ${hab.get('precio', 0.0):.2f} por noche")
+        print(f"Lugar Turístico: {hab.get('Lugar_Turistico', 'N/A')}") # ¡Nuevo campo aquí!
+        print("-" * 40)
+
+    if desde is None:
+        _mostrar_paginas(_pagina_disponibles, imprimir, "No hay habitaciones disponibles en este momento.",
+                         clave='disponibles')
+    else:
+        print(f"\nHabitaciones libres del {desde} al {hasta}:")
+        _mostrar_paginas(_paginar_lista(obtener_habitaciones_disponibles(desde, hasta)),
+                         imprimir, "No hay habitaciones libres en esas fechas.")
 
 def buscar_habitacion_cliente():
     os.system('cls' if os.name == 'nt' else 'clear')
@@ -380,11 +850,129 @@ def buscar_habitacion_cliente():
         
         if not habitacion.get('disponible'):
             print("\nEsta habitación no está disponible actualmente.")
+        else:
+            print("\nConsultar disponibilidad por fechas:")
+            fechas = _pedir_fechas()
+            if fechas and fechas[0] is not None:
+                desde, hasta = fechas
+                if esta_libre(habitacion['id'], desde, hasta):
+                    print(f"\nLa habitación está libre del {desde} al {hasta}.")
+                else:
+                    print(f"\nLa habitación ya está ocupada alguna noche entre el {desde} y el {hasta}.")
     else:
         print("\nNo se encontró ninguna habitación con ese ID.")
     
     input("\nPresione Enter para continuar...")
 
+def buscar_habitaciones_cliente():
+    os.system('cls' if os.name == 'nt' else 'clear')
+    print("\n--- Buscar Habitaciones por Criterios ---")
+    print("Deje en blanco los criterios que no le importen.")
+
+    criterios = {'disponible': True}
+    try:
+        camas = input("Número de camas: ")
+        if camas:
+            criterios['camas'] = int(camas)
+        banos = input("Número de baños: ")
+        if banos:
+            criterios['banos'] = int(banos)
+        precio_min = input("Precio mínimo por noche: ")
+        if precio_min:
+            criterios['precio_min'] = float(precio_min)
+        precio_max = input("Precio máximo por noche: ")
+        if precio_max:
+            criterios['precio_max'] = float(precio_max)
+    except ValueError:
+        print("\nError: camas, baños y precios deben ser números.")
+        input("Presione Enter para continuar...")
+        return
+    vista = input("Vista (mar/montaña/ciudad): ")
+    if vista:
+        criterios['vista'] = vista
+    balcon = input("¿Con balcón? (si/no): ").lower()
+    if balcon in ['si', 'no']:
+        criterios['balcon'] = balcon == 'si'
+
+    habitaciones = buscar_habitaciones(orden='precio', limite=TAMANO_PAGINA * 2, **criterios)
+
+    if not habitaciones:
+        print("\nNo hay habitaciones disponibles con esos criterios.")
+    else:
+        print(f"\nSe encontraron {len(habitaciones)} habitaciones (ordenadas por precio):")
+        for hab in habitaciones:
+            balcon_display = 'Sí' if hab.get('balcon') else 'No'
+
+            print(f"\nID: {hab.get('id')}")
+            print(f"Descripción: {hab.get('descripcion')}")
+            print(f"Camas: {hab.get('camas')} - Baños: {hab.get('banos')}")
+            print(f"Vista: {hab.get('vista')} - Balcón: {balcon_display}")
+            print(f"Precio: ${hab.get('precio', 0.0):.2f} por noche")
+            print(f"Lugar Turístico: {hab.get('Lugar_Turistico', 'N/A')}")
+            print("-" * 40)
+
+    input("\nPresione Enter para continuar...")
+
+def buscar_habitaciones_texto_cliente():
+    os.system('cls' if os.name == 'nt' else 'clear')
+    print("\n--- Buscar Habitaciones por Palabras ---")
+    print("Busca en la descripción y en el lugar turístico (p. ej. 'suite jacuzzi' o 'cenote').")
+
+    consulta = input("Palabras a buscar: ").strip()
+    if not consulta:
+        return
+    habitaciones = buscar_habitaciones_texto(consulta, limite=TAMANO_PAGINA * 2, solo_disponibles=True)
+    if not habitaciones:
+        # Sin resultados con todas las palabras, se prueba con cualquiera de ellas
+        habitaciones = buscar_habitaciones_texto(consulta, limite=TAMANO_PAGINA * 2, solo_disponibles=True,
+                                                 todas=False)
+
+    if not habitaciones:
+        print("\nNo hay habitaciones disponibles que coincidan con esa búsqueda.")
+    else:
+        print(f"\nSe encontraron {len(habitaciones)} habitaciones (las más relevantes primero):")
+        for hab in habitaciones:
+            balcon_display = 'Sí' if hab.get('balcon') else 'No'
+
+            print(f"\nID: {hab.get('id')}")
+            print(f"Descripción: {hab.get('descripcion')}")
+            print(f"Camas: {hab.get('camas')} - Baños: {hab.get('banos')}")
+            print(f"Vista: {hab.get('vista')} - Balcón: {balcon_display}")
+            print(f"Precio: ${hab.get('precio', 0.0):.2f} por noche")
+            print(f"Lugar Turístico: {hab.get('Lugar_Turistico', 'N/A')}")
+            print("-" * 40)
+
+    input("\nPresione Enter para continuar...")
+
+def reservar_habitacion_cliente():
+    os.system('cls' if os.name == 'nt' else 'clear')
+    print("\n--- Reservar Habitación ---")
+    id_reservar = input("Ingrese el ID de la habitación: ")
+    fechas = _pedir_fechas()
+    if not fechas or fechas[0] is None:
+        print("\nDebe indicar las fechas de llegada y salida.")
+        input("Presione Enter para continuar...")
+        return
+    huesped = input("Nombre del huésped: ")
+    if not huesped:
+        print("\nDebe indicar el nombre del huésped.")
+        input("Presione Enter para continuar...")
+        return
+
+    resultado = reservas.reservar_habitacion(id_reservar, fechas[0], fechas[1], huesped)
+
+    if resultado['estado'] == reservas.CONFIRMADA:
+        print(f"\nReserva confirmada. Número de reserva: {resultado['reserva_id']}")
+    elif resultado['estado'] == reservas.NO_EXISTE:
+        print("\nNo se encontró ninguna habitación con ese ID.")
+    elif resultado['estado'] == reservas.NO_DISPONIBLE:
+        print("\nLa habitación no está disponible en esas fechas.")
+    elif resultado['estado'] == reservas.CONFLICTO:
+        print("\nHay mucha demanda sobre esta habitación en este momento. Intente nuevamente.")
+    else:
+        print("\nError al registrar la reserva.")
+    input("Presione Enter para continuar...")
+
 # ========== FUNCIONES DEL MENÚ ==========
 
 def mostrar_menu_principal():
@@ -409,9 +997,14 @@ def mostrar_menu_cliente():
     print("\n--- Menú Cliente ---")
     print("1. Ver habitaciones disponibles")
     print("2. Buscar habitación por ID")
-    print("3. Volver al menú principal")
+    print("3. Buscar habitaciones por criterios")
+    print("4. Buscar habitaciones por palabras")
+    print("5. Reservar habitación")
+    print("6. Volver al menú principal")
 
 def menu_administrador():
+    # Lo más probable es que se liste el catálogo: se adelanta su primera página
+    precargar(('todas', None), _pagina_todas, None, espacio='habitaciones')
     while True:
         mostrar_menu_admin()
         opcion = input("\nSeleccione una opción: ")
@@ -427,12 +1020,18 @@ def menu_administrador():
         elif opcion == '5':
             eliminar_habitacion()
         elif opcion == '6':
+            cancelar_precargas(('todas', None))
             break
         else:
             print("\nOpción no válida. Intente nuevamente.")
             input("Presione Enter para continuar...")
 
 def menu_cliente():
+    # Se adelantan las habitaciones disponibles (primera página, y catálogo y calendario
+    # cacheados para la consulta por fechas) mientras el cliente elige una opción
+    precargar(('disponibles', None), _pagina_disponibles, None, espacio='habitaciones')
+    precargar('habitaciones_disponibles', obtener_habitaciones_disponibles)
+    precargar('calendario', obtener_calendario)
     while True:
         mostrar_menu_cliente()
         opcion = input("\nSeleccione una opción: ")
@@ -442,6 +1041,14 @@ def menu_cliente():
         elif opcion == '2':
             buscar_habitacion_cliente()
         elif opcion == '3':
+            buscar_habitaciones_cliente()
+        elif opcion == '4':
+            buscar_habitaciones_texto_cliente()
+        elif opcion == '5':
+            reservar_habitacion_cliente()
+        elif opcion == '6':
+            for clave in (('disponibles', None), 'habitaciones_disponibles', 'calendario'):
+                cancelar_precargas(clave)
             break
         else:
             print("\nOpción no válida. Intente nuevamente.")
@@ -450,7 +1057,12 @@ def menu_cliente():
 # ========== FUNCIÓN PRINCIPAL ==========
 
 def main():
-        
+    configurar_registro()
+    # Las conexiones se abren en segundo plano mientras se muestra el menú
+    iniciar_precarga()
+    if INSTANTANEA_ACTIVA:
+        # Los menús leen el catálogo de la instantánea local mientras se actualiza en segundo plano
+        iniciar_instantanea()
     while True:
         mostrar_menu_principal()
         opcion = input("\nSeleccione una opción: ")
@@ -461,6 +1073,9 @@ def main():
             menu_cliente()
         elif opcion == '3':
             print("\nSaliendo del sistema...")
+            cerrar_precarga()
+            detener_instantanea()
+            cerrar_pool()
             break
         else:
             print("\nOpción no válida. Intente nuevamente.")
@@ -1,6 +1,17 @@
-import pyodbc
+import logging
 import os
-from conection_bd import conectar_bd  # Asegúrate de que este archivo existe y funciona
+from conection_bd import conexion_bd, al_confirmar, en_transaccion, ejecutar_async, ERRORES_BD  # Asegúrate de que este archivo existe y funciona
+from cache_bd import cache_catalogo, invalidar_servicios
+from modelos import Servicio
+from sincronizacion import replica_catalogo, REPLICA_ACTIVA
+from instantanea import INSTANTANEA_ACTIVA, leer_catalogo
+from precarga import precargar, cancelar_precargas
+
+registro = logging.getLogger(__name__)
+
+# Si es True, las búsquedas por ID se resuelven con el índice id -> servicio en memoria
+# (construido a partir del catálogo cacheado) en lugar de consultar la BD cada vez.
+USAR_INDICE_SERVICIOS = os.environ.get("HOTEL_INDICE_SERVICIOS", "1") != "0"
 
 
 
@@ -14,26 +25,19 @@ def agregar_servicio_bd(usuario_id, nombre, precio):
     Returns:
         bool: True si el servicio se agregó con éxito, False en caso de error.
     """
-    conexion = conectar_bd()
-    if conexion:
-        try:
+    try:
+        with conexion_bd('agregar_servicio_bd') as conexion:
             cursor = conexion.cursor()
-            print("Llamando al procedimiento almacenado sp_registrar_servicio...")
+            registro.debug("Llamando al procedimiento almacenado sp_registrar_servicio...")
             cursor.execute("{CALL sp_registrar_servicio(?, ?, ?)}", (usuario_id, nombre, precio))
             conexion.commit()  # Confirma la transacción
-            print("Servicio agregado con éxito (a través de SP).")
+            al_confirmar(invalidar_servicios)
+            registro.debug("Servicio agregado con éxito (a través de SP).")
             return True
-        except pyodbc.Error as e:
-            # Captura errores específicos de la base de datos
-            print(f"\nError al agregar servicio: {e}")
-            if conexion:
-                conexion.rollback()  # Revierte la transacción en caso de error
-            return False
-        finally:
-            if conexion:
-                conexion.close()
-                print("Conexión cerrada.")
-    return False
+    except ERRORES_BD as e:
+        # Captura errores específicos de la base de datos; el pool revierte la transacción
+        registro.error("Error al agregar servicio: %s", e)
+        return False
 
 
 def editar_servicio_bd(usuario_id, servicio_id, nuevo_nombre, nuevo_precio):
@@ -47,30 +51,23 @@ def editar_servicio_bd(usuario_id, servicio_id, nuevo_nombre, nuevo_precio):
     Returns:
         bool: True si el servicio se editó con éxito, False en caso de error.
     """
-    conexion = conectar_bd()
-    if conexion:
-        try:
+    try:
+        with conexion_bd('editar_servicio_bd') as conexion:
             cursor = conexion.cursor()
-            print("Llamando al procedimiento almacenado sp_editar_servicio...")
+            registro.debug("Llamando al procedimiento almacenado sp_editar_servicio...")
             cursor.execute("{CALL sp_editar_servicio(?, ?, ?, ?)}",
                            (usuario_id, servicio_id, nuevo_nombre, nuevo_precio))
             conexion.commit()
+            al_confirmar(invalidar_servicios)
             if cursor.rowcount > 0:
-                print("Servicio editado con éxito (a través de SP).")
+                registro.debug("Servicio editado con éxito (a través de SP).")
                 return True
             else:
-                print("No se encontró el servicio con el ID proporcionado.")
+                registro.warning("No se encontró el servicio con el ID proporcionado.")
                 return False
-        except pyodbc.Error as e:
-            print(f"\nError al editar servicio: {e}")
-            if conexion:
-                conexion.rollback()
-            return False
-        finally:
-            if conexion:
-                conexion.close()
-                print("Conexión cerrada.")
-    return False
+    except ERRORES_BD as e:
+        registro.error("Error al editar servicio: %s", e)
+        return False
 
 
 def eliminar_servicio_bd(usuario_id, servicio_id):
@@ -82,55 +79,145 @@ def eliminar_servicio_bd(usuario_id, servicio_id):
     Returns:
         bool: True si el servicio se eliminó con éxito, False en caso de error.
     """
-    conexion = conectar_bd()
-    if conexion:
-        try:
+    try:
+        with conexion_bd('eliminar_servicio_bd') as conexion:
             cursor = conexion.cursor()
-            print("Llamando al procedimiento almacenado sp_eliminar_servicio...")
+            registro.debug("Llamando al procedimiento almacenado sp_eliminar_servicio...")
             cursor.execute("{CALL sp_eliminar_servicio(?, ?)}", (usuario_id, servicio_id))
             conexion.commit()
+            al_confirmar(invalidar_servicios)
             if cursor.rowcount > 0:
-                print("Servicio eliminado con éxito (a través de SP).")
+                registro.debug("Servicio eliminado con éxito (a través de SP).")
                 return True
             else:
-                print("No se encontró el servicio con el ID proporcionado.")
+                registro.warning("No se encontró el servicio con el ID proporcionado.")
                 return False
-        except pyodbc.Error as e:
-            print(f"\nError al eliminar servicio: {e}")
-            if conexion:
-                conexion.rollback()
-            return False
-        finally:
-            if conexion:
-                conexion.close()
-                print("Conexión cerrada.")
-    return False
-
+    except ERRORES_BD as e:
+        registro.error("Error al eliminar servicio: %s", e)
+        return False
+
+
+
+def _cargar_todos_servicios():
+    # Dentro de una transacción se lee con su conexión: sincronizar la réplica compartida
+    # desde ella publicaría cambios sin confirmar
+    compartida = not en_transaccion()
+    if INSTANTANEA_ACTIVA and compartida:
+        return leer_catalogo('servicios')
+    if REPLICA_ACTIVA and compartida:
+        replica_catalogo.sincronizar()
+        return replica_catalogo.servicios()
+    with conexion_bd('cargar_todos_servicios') as conexion:
+        cursor = conexion.cursor()
+        cursor.execute("SELECT id, nombre, precio FROM dbo.servicios")  # Especifica el esquema dbo
+        servicios = Servicio.desde_cursor(cursor, cursor.fetchall())
+        registro.debug("Se encontraron %d servicios en la BD.", len(servicios))
+    return servicios
 
 
 def obtener_todos_servicios_bd():
     """
-    Obtiene todos los servicios de la base de datos.
+    Obtiene todos los servicios de la base de datos (a través de la caché de catálogos).
     Returns:
-        list: Una lista de diccionarios, donde cada diccionario representa un servicio.
+        list: Una lista de Servicio (admiten acceso como diccionario: servicio['nombre']).
               Retorna una lista vacía en caso de error o si no hay servicios.
+              Los servicios se comparten con la caché y no deben modificarse.
     """
-    conexion = conectar_bd()
-    servicios = []
-    if conexion:
-        try:
+    try:
+        return list(cache_catalogo.obtener_o_cargar(('servicios', 'todos'), _cargar_todos_servicios))
+    except ERRORES_BD as e:
+        registro.error("Error al obtener servicios: %s", e)
+        return []  # Asegura que se retorne una lista vacía en caso de error
+
+
+
+def buscar_servicio_por_id_bd(servicio_id):
+    """
+    Busca un servicio por su ID con una consulta sobre la clave primaria.
+    Args:
+        servicio_id (int): ID del servicio.
+    Returns:
+        Servicio: El servicio encontrado, o None si no existe o hay un error.
+    """
+    try:
+        with conexion_bd('buscar_servicio_por_id_bd') as conexion:
             cursor = conexion.cursor()
-            cursor.execute("SELECT id, nombre, precio FROM dbo.servicios")  # Especifica el esquema dbo
-            columnas = [column[0] for column in cursor.description]
-            servicios = [dict(zip(columnas, row)) for row in cursor.fetchall()]
-            print(f"Se encontraron {len(servicios)} servicios en la BD.")
-        except pyodbc.Error as e:
-            print(f"\nError al obtener servicios: {e}")
-            servicios = []  # Asegura que se retorne una lista vacía en caso de error
-        finally:
-            if conexion:
-                conexion.close()
-    return servicios
+            cursor.execute("SELECT id, nombre, precio FROM dbo.servicios WHERE id = ?", (servicio_id,))
+            return Servicio.desde_fila(cursor, cursor.fetchone())
+    except ERRORES_BD as e:
+        registro.error("Error al buscar servicio: %s", e)
+        return None
+
+
+def _cargar_indice_servicios():
+    servicios = cache_catalogo.obtener_o_cargar(('servicios', 'todos'), _cargar_todos_servicios)
+    return {servicio['id']: servicio for servicio in servicios}
+
+
+def obtener_indice_servicios():
+    """
+    Devuelve el índice id -> servicio compartido por el módulo. Se guarda en la caché
+    de catálogos, así que se reconstruye tras cualquier alta, edición o baja.
+    Returns:
+        dict: Índice de servicios (no modificar), o un diccionario vacío en caso de error.
+    """
+    try:
+        return cache_catalogo.obtener_o_cargar(('servicios', 'indice'), _cargar_indice_servicios)
+    except ERRORES_BD as e:
+        registro.error("Error al obtener servicios: %s", e)
+        return {}
+
+
+def obtener_servicio(servicio_id, usar_indice=None):
+    """
+    Resuelve un servicio por ID con un único acceso por clave.
+    Args:
+        servicio_id (int): ID del servicio.
+        usar_indice (bool): True para usar el índice en memoria, False para consultar la BD;
+            por defecto se usa USAR_INDICE_SERVICIOS.
+    Returns:
+        dict: El servicio, o None si no existe.
+    """
+    if usar_indice is None:
+        usar_indice = USAR_INDICE_SERVICIOS
+    if usar_indice:
+        return obtener_indice_servicios().get(servicio_id)
+    return buscar_servicio_por_id_bd(servicio_id)
+
+
+
+# ========== API ASÍNCRONA ==========
+# Equivalentes para usar con await desde un bucle de eventos. Devuelven lo mismo que las
+# funciones síncronas y se ejecutan en el ejecutor acotado de conection_bd.
+
+async def agregar_servicio_async(usuario_id, nombre, precio):
+    """Versión asíncrona de agregar_servicio_bd."""
+    return await ejecutar_async(agregar_servicio_bd, usuario_id, nombre, precio)
+
+
+async def editar_servicio_async(usuario_id, servicio_id, nuevo_nombre, nuevo_precio):
+    """Versión asíncrona de editar_servicio_bd."""
+    return await ejecutar_async(editar_servicio_bd, usuario_id, servicio_id, nuevo_nombre, nuevo_precio)
+
+
+async def eliminar_servicio_async(usuario_id, servicio_id):
+    """Versión asíncrona de eliminar_servicio_bd."""
+    return await ejecutar_async(eliminar_servicio_bd, usuario_id, servicio_id)
+
+
+async def obtener_todos_servicios_async():
+    """Versión asíncrona de obtener_todos_servicios_bd."""
+    return await ejecutar_async(obtener_todos_servicios_bd)
+
+
+async def buscar_servicio_por_id_async(servicio_id):
+    """Versión asíncrona de buscar_servicio_por_id_bd."""
+    return await ejecutar_async(buscar_servicio_por_id_bd, servicio_id)
+
+
+async def obtener_servicio_async(servicio_id, usar_indice=None):
+    """Versión asíncrona de obtener_servicio."""
+    return await ejecutar_async(obtener_servicio, servicio_id, usar_indice)
 
 
 
@@ -176,12 +263,7 @@ def editar_servicio(usuario_id):
         input("Presione Enter para continuar...")
         return
 
-    servicios = obtener_todos_servicios_bd() # Obtener la lista de servicios
-    servicio_a_editar = None
-    for servicio in servicios:
-        if servicio['id'] == servicio_id:
-            servicio_a_editar = servicio
-            break
+    servicio_a_editar = obtener_servicio(servicio_id)
 
     if not servicio_a_editar:
         print("\nNo se encontró ningún servicio con ese ID.")
@@ -230,6 +312,18 @@ def eliminar_servicio(usuario_id):
         input("Presione Enter para continuar...")
         return
 
+    servicio = obtener_servicio(servicio_id)
+    if not servicio:
+        print("\nNo se encontró ningún servicio con ese ID.")
+        input("Presione Enter para continuar...")
+        return
+
+    print(f"\nServicio: {servicio['nombre']} (${servicio['precio']:.2f})")
+    if input("¿Confirma la eliminación? (si/no): ").lower() != 'si':
+        print("\nEliminación cancelada.")
+        input("Presione Enter para continuar...")
+        return
+
     if eliminar_servicio_bd(1, servicio_id): # Hardcodeamos el usuario_id a 1
         print("\nServicio eliminado con éxito!")
     else:
@@ -275,6 +369,8 @@ def menu_administrador_servicios(usuario_id):
     Args:
         usuario_id: El ID del usuario administrador que ha iniciado sesión.
     """
+    # El listado de servicios (cacheado) se carga mientras se elige una opción
+    precargar('servicios', obtener_todos_servicios_bd)
     while True:
         mostrar_menu_admin_servicios()
         opcion = input("\nSeleccione una opción: ")
@@ -288,6 +384,7 @@ def menu_administrador_servicios(usuario_id):
         elif opcion == '4':
             eliminar_servicio(usuario_id)
         elif opcion == '5':
+            cancelar_precargas('servicios')
             break
         else:
             print("\nOpción no válida. Intente nuevamente.")
@@ -301,5 +398,8 @@ if __name__ == "__main__":
     # Aquí, lo hardcodeamos para simplificar la prueba. ¡NO HAGAS ESTO EN PRODUCCIÓN!
     usuario_id_admin = 1  # <--- ¡CAMBIAR ESTO POR EL ID REAL DEL USUARIO ADMINISTRADOR!
 
+    from metricas_bd import configurar_registro
+    configurar_registro()
+
     menu_administrador_servicios(usuario_id_admin)
 
@@ -0,0 +1,423 @@
+import hashlib
+import itertools
+import os
+import re
+import sqlite3
+from decimal import Decimal
+
+try:
+    import pyodbc
+except ImportError:  # pyodbc solo hace falta para el backend de SQL Server
+    pyodbc = None
+
+# ========== Backends de base de datos ==========
+#
+# Cada backend sabe abrir conexiones para su motor y declara qué excepciones produce.
+# conection_bd elige el backend según la configuración y construye el pool sobre él.
+
+
+class BackendBD:
+    """Interfaz común de los backends."""
+
+    nombre = None
+    # Tuplas de excepciones del driver, para los bloques except de las funciones *_bd
+    errores = ()
+    errores_integridad = ()
+    # Si el cursor admite `fast_executemany` (envío de parámetros en bloque)
+    soporta_fast_executemany = False
+    # Cláusula que limita las filas de una consulta con ORDER BY; su parámetro va al final
+    clausula_limite = " LIMIT ?"
+    # Sincronización incremental (sincronizacion.py): consulta que devuelve la marca de
+    # cambios hasta la que se puede leer sin saltarse transacciones aún no confirmadas, y
+    # expresión con la que se compara la columna `cambio` con una marca entera
+    sql_marca_cambios = "SELECT valor FROM secuencia_cambios"
+    parametro_marca = "?"
+    # Borra las bajas anotadas hace más de ? días
+    sql_purgar_eliminaciones = "DELETE FROM eliminaciones WHERE fecha < datetime('now', '-' || ? || ' days')"
+    # Identifica la base de datos entre procesos (instantánea del catálogo); None si la base
+    # no sobrevive al proceso
+    origen = None
+
+    def conectar(self):
+        """Abre y devuelve una conexión nueva."""
+        raise NotImplementedError
+
+    def es_transitorio(self, error):
+        """Indica si `error` es pasajero (red, tiempo agotado, bloqueo) y vale la pena reintentar."""
+        return False
+
+    # Máximo de parámetros por sentencia (SQL Server admite 2100; SQLite 3.32+, 32766)
+    maximo_parametros = 2000
+
+    def sql_guardar_filas(self, tabla, columnas, filas, actualizar, comprobar_version=False):
+        """
+        Sentencia única que inserta `filas` filas de `columnas` en `tabla` (columnas[0] es la
+        clave primaria) y, si `actualizar`, actualiza las que ya existen incrementando su
+        columna `version`. Devuelve una fila (clave, version) por cada fila insertada o
+        actualizada (version 0 = insertada); las que no devuelve chocaron con una existente.
+        Args:
+            tabla (str): Tabla destino (con columna `version` que por defecto vale 0).
+            columnas (tuple): Columnas en el orden de los parámetros; la primera es la clave.
+            filas (int): Número de filas de parámetros.
+            actualizar (bool): Actualizar las existentes (upsert) en lugar de dejarlas.
+            comprobar_version (bool): Solo actualizar si `version` coincide con un parámetro
+                adicional al final.
+        """
+        clave = columnas[0]
+        marcadores = "(" + ", ".join("?" * len(columnas)) + ")"
+        sql = (f"INSERT INTO {tabla} ({', '.join(columnas)}) VALUES {', '.join([marcadores] * filas)} "
+               f"ON CONFLICT ({clave}) ")
+        if actualizar:
+            asignaciones = ", ".join(f"{columna} = excluded.{columna}" for columna in columnas[1:])
+            sql += f"DO UPDATE SET {asignaciones}, version = {tabla}.version + 1 "
+            if comprobar_version:
+                sql += f"WHERE {tabla}.version = ? "
+        else:
+            sql += "DO NOTHING "
+        return sql + f"RETURNING {clave}, version"
+
+    # Puntos de guardado de conection_bd.transaccion(); `nombre` lo genera la transacción
+    def crear_punto_guardado(self, cursor, nombre):
+        cursor.execute(f"SAVEPOINT {nombre}")
+
+    def revertir_punto_guardado(self, cursor, nombre):
+        cursor.execute(f"ROLLBACK TO SAVEPOINT {nombre}")
+        cursor.execute(f"RELEASE SAVEPOINT {nombre}")
+
+    def liberar_punto_guardado(self, cursor, nombre):
+        cursor.execute(f"RELEASE SAVEPOINT {nombre}")
+
+    def cerrar(self):
+        """Libera los recursos propios del backend (no las conexiones prestadas)."""
+
+
+# ---------- SQL Server (pyodbc) ----------
+
+class BackendSQLServer(BackendBD):
+    """
+    Backend de producción: SQL Server a través de pyodbc.
+    Args:
+        servidor (str): Instancia de SQL Server.
+        base_datos (str): Nombre de la base de datos.
+        driver (str): Nombre del driver ODBC.
+        cadena (str): Cadena de conexión completa; si se indica, ignora los demás parámetros.
+        tiempo_conexion (float): Segundos de espera al iniciar sesión en el servidor.
+        tiempo_consulta (float): Segundos que puede durar una consulta (0 = sin límite).
+    """
+
+    nombre = 'sqlserver'
+    soporta_fast_executemany = True
+    clausula_limite = " OFFSET 0 ROWS FETCH NEXT ? ROWS ONLY"
+    # `cambio` es ROWVERSION: las filas de transacciones abiertas tienen una marca mayor o
+    # igual que MIN_ACTIVE_ROWVERSION(), así que se sincroniza solo hasta justo antes
+    sql_marca_cambios = "SELECT CAST(MIN_ACTIVE_ROWVERSION() AS BIGINT) - 1"
+    parametro_marca = "CAST(CAST(? AS BIGINT) AS BINARY(8))"
+    sql_purgar_eliminaciones = "DELETE FROM eliminaciones WHERE fecha < DATEADD(DAY, -?, SYSUTCDATETIME())"
+
+    # SQLSTATE de errores pasajeros: conexión rechazada o perdida, tiempo agotado, interbloqueo
+    ESTADOS_TRANSITORIOS = frozenset(('08001', '08004', '08S01', 'HYT00', 'HYT01', '40001'))
+
+    def __init__(self, servidor="GONVILLA\\OSCAR1", base_datos="hotel_reservaciones",
+                 driver="ODBC Driver 17 for SQL Server", cadena=None, tiempo_conexion=5.0, tiempo_consulta=30.0):
+        if pyodbc is None:
+            raise ImportError("El backend 'sqlserver' requiere el paquete pyodbc.")
+        self.cadena = cadena or (
+            f"DRIVER={{{driver}}};"
+            f"SERVER={servidor};"
+            f"DATABASE={base_datos};"
+            "Trusted_Connection=yes;"
+        )
+        self.errores = (pyodbc.Error,)
+        self.errores_integridad = (pyodbc.IntegrityError,)
+        # Resumen de la cadena: no se guarda la cadena, que puede llevar credenciales
+        self.origen = "sqlserver:" + hashlib.sha256(self.cadena.encode('utf-8')).hexdigest()[:16]
+        self.tiempo_conexion = tiempo_conexion
+        self.tiempo_consulta = tiempo_consulta
+
+    def conectar(self):
+        conexion = pyodbc.connect(self.cadena, timeout=int(self.tiempo_conexion))
+        conexion.timeout = int(self.tiempo_consulta)
+        return conexion
+
+    def es_transitorio(self, error):
+        if not isinstance(error, pyodbc.Error):
+            return False
+        estado = error.args[0] if error.args else None
+        return estado in self.ESTADOS_TRANSITORIOS or isinstance(error, pyodbc.OperationalError)
+
+    def sql_guardar_filas(self, tabla, columnas, filas, actualizar, comprobar_version=False):
+        # MERGE con HOLDLOCK: la comprobación de existencia y la escritura son atómicas
+        clave = columnas[0]
+        marcadores = "(" + ", ".join("?" * len(columnas)) + ")"
+        sql = (f"MERGE {tabla} WITH (HOLDLOCK) AS destino "
+               f"USING (VALUES {', '.join([marcadores] * filas)}) AS origen ({', '.join(columnas)}) "
+               f"ON destino.{clave} = origen.{clave} ")
+        if actualizar:
+            asignaciones = ", ".join(f"{columna} = origen.{columna}" for columna in columnas[1:])
+            condicion = " AND destino.version = ?" if comprobar_version else ""
+            sql += f"WHEN MATCHED{condicion} THEN UPDATE SET {asignaciones}, version = destino.version + 1 "
+        sql += (f"WHEN NOT MATCHED THEN INSERT ({', '.join(columnas)}) "
+                f"VALUES ({', '.join('origen.' + columna for columna in columnas)}) ")
+        return sql + f"OUTPUT inserted.{clave}, inserted.version;"
+
+    def crear_punto_guardado(self, cursor, nombre):
+        # SAVE TRANSACTION no abre la transacción implícita por sí solo
+        cursor.execute(f"IF @@TRANCOUNT = 0 BEGIN TRANSACTION; SAVE TRANSACTION {nombre}")
+
+    def revertir_punto_guardado(self, cursor, nombre):
+        cursor.execute(f"ROLLBACK TRANSACTION {nombre}")
+
+    def liberar_punto_guardado(self, cursor, nombre):
+        pass  # SQL Server no libera puntos de guardado: desaparecen con el commit
+
+
+# ---------- SQLite (sustituto local para pruebas y benchmarks) ----------
+
+ESQUEMA_SQLITE = """
+CREATE TABLE IF NOT EXISTS dbohabitaciones (
+    id INTEGER PRIMARY KEY,
+    descripcion TEXT,
+    camas INTEGER NOT NULL DEFAULT 1,
+    banos INTEGER NOT NULL DEFAULT 1,
+    vista TEXT COLLATE NOCASE,
+    balcon INTEGER NOT NULL DEFAULT 0,
+    precio REAL NOT NULL DEFAULT 0,
+    disponible INTEGER NOT NULL DEFAULT 1,
+    Lugar_Turistico TEXT,
+    version INTEGER NOT NULL DEFAULT 0,
+    cambio INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS ix_habitaciones_disponible_precio ON dbohabitaciones (disponible, precio);
+CREATE INDEX IF NOT EXISTS ix_habitaciones_vista_precio ON dbohabitaciones (vista, precio);
+
+CREATE TABLE IF NOT EXISTS ocupacion_habitaciones (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    habitacion_id INTEGER NOT NULL,
+    desde DATE NOT NULL,
+    hasta DATE NOT NULL,
+    motivo TEXT NOT NULL DEFAULT 'reserva',
+    huesped TEXT
+);
+
+CREATE INDEX IF NOT EXISTS ix_ocupacion_habitacion_desde ON ocupacion_habitaciones (habitacion_id, desde);
+CREATE INDEX IF NOT EXISTS ix_ocupacion_desde_hasta ON ocupacion_habitaciones (desde, hasta);
+
+CREATE TABLE IF NOT EXISTS servicios (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nombre TEXT NOT NULL,
+    precio REAL NOT NULL DEFAULT 0,
+    cambio INTEGER NOT NULL DEFAULT 0
+);
+
+-- Reglas de precio por temporada (precios.py)
+CREATE TABLE IF NOT EXISTS reglas_precio (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ambito TEXT NOT NULL CHECK (ambito IN ('habitaciones', 'servicios')),
+    porcentaje REAL NOT NULL,
+    vista TEXT,
+    camas INTEGER,
+    balcon INTEGER,
+    patron TEXT,
+    desde TEXT,
+    hasta TEXT,
+    descripcion TEXT
+);
+
+-- Sincronización incremental: cada alta o modificación toma el siguiente valor de
+-- secuencia_cambios en su columna `cambio` (como ROWVERSION en SQL Server) y cada baja
+-- deja una fila en eliminaciones
+CREATE TABLE IF NOT EXISTS secuencia_cambios (valor INTEGER NOT NULL);
+INSERT INTO secuencia_cambios (valor) SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM secuencia_cambios);
+
+CREATE TABLE IF NOT EXISTS eliminaciones (
+    tabla TEXT NOT NULL,
+    registro_id INTEGER NOT NULL,
+    cambio INTEGER NOT NULL,
+    fecha TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS ix_habitaciones_cambio ON dbohabitaciones (cambio);
+CREATE INDEX IF NOT EXISTS ix_servicios_cambio ON servicios (cambio);
+CREATE INDEX IF NOT EXISTS ix_eliminaciones_tabla_cambio ON eliminaciones (tabla, cambio);
+"""
+
+_DISPARADORES_CAMBIOS = """
+CREATE TRIGGER IF NOT EXISTS tr_{tabla}_insertar AFTER INSERT ON {tabla_bd}
+BEGIN
+    UPDATE secuencia_cambios SET valor = valor + 1;
+    UPDATE {tabla_bd} SET cambio = (SELECT valor FROM secuencia_cambios) WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_{tabla}_actualizar AFTER UPDATE ON {tabla_bd}
+WHEN NEW.cambio = OLD.cambio
+BEGIN
+    UPDATE secuencia_cambios SET valor = valor + 1;
+    UPDATE {tabla_bd} SET cambio = (SELECT valor FROM secuencia_cambios) WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_{tabla}_eliminar AFTER DELETE ON {tabla_bd}
+BEGIN
+    UPDATE secuencia_cambios SET valor = valor + 1;
+    INSERT INTO eliminaciones (tabla, registro_id, cambio)
+    VALUES ('{tabla}', OLD.id, (SELECT valor FROM secuencia_cambios));
+END;
+"""
+
+ESQUEMA_SQLITE += "".join(_DISPARADORES_CAMBIOS.format(tabla=tabla, tabla_bd=tabla_bd)
+                          for tabla, tabla_bd in (('habitaciones', 'dbohabitaciones'), ('servicios', 'servicios')))
+
+# SQLite no conoce el tipo DECIMAL que devuelve SQL Server
+sqlite3.register_adapter(Decimal, float)
+
+_PATRON_CALL = re.compile(r"^\s*\{\s*CALL\s+(\w+)\s*(?:\((.*)\))?\s*\}\s*$", re.IGNORECASE | re.DOTALL)
+_PATRON_ESQUEMA_DBO = re.compile(r"\bdbo\.", re.IGNORECASE)
+
+
+def _sp_registrar_servicio(cursor, usuario_id, nombre, precio):
+    # El procedimiento real también valida el rol de usuario_id; aquí solo se registra el servicio
+    return sqlite3.Cursor.execute(cursor, "INSERT INTO servicios (nombre, precio) VALUES (?, ?)",
+                                  (nombre, precio))
+
+
+def _sp_editar_servicio(cursor, usuario_id, servicio_id, nuevo_nombre, nuevo_precio):
+    return sqlite3.Cursor.execute(cursor, "UPDATE servicios SET nombre = ?, precio = ? WHERE id = ?",
+                                  (nuevo_nombre, nuevo_precio, servicio_id))
+
+
+def _sp_eliminar_servicio(cursor, usuario_id, servicio_id):
+    return sqlite3.Cursor.execute(cursor, "DELETE FROM servicios WHERE id = ?", (servicio_id,))
+
+
+# Procedimientos almacenados emulados, por nombre en minúsculas
+PROCEDIMIENTOS_SQLITE = {
+    'sp_registrar_servicio': _sp_registrar_servicio,
+    'sp_editar_servicio': _sp_editar_servicio,
+    'sp_eliminar_servicio': _sp_eliminar_servicio,
+}
+
+
+class CursorSQLite(sqlite3.Cursor):
+    """
+    Cursor que acepta el SQL que escriben los módulos CRUD para SQL Server:
+    quita el prefijo de esquema `dbo.` y ejecuta las llamadas `{CALL sp_...(?, ...)}`
+    con los procedimientos emulados de PROCEDIMIENTOS_SQLITE.
+    """
+
+    def execute(self, sql, parametros=()):
+        llamada = _PATRON_CALL.match(sql)
+        if llamada:
+            procedimiento = PROCEDIMIENTOS_SQLITE.get(llamada.group(1).lower())
+            if procedimiento is None:
+                raise sqlite3.OperationalError(f"Procedimiento almacenado no emulado: {llamada.group(1)}")
+            procedimiento(self, *parametros)
+            return self
+        return super().execute(_PATRON_ESQUEMA_DBO.sub("", sql), parametros)
+
+    def executemany(self, sql, secuencia_parametros):
+        llamada = _PATRON_CALL.match(sql)
+        if llamada:
+            for parametros in secuencia_parametros:
+                self.execute(sql, parametros)
+            return self
+        return super().executemany(_PATRON_ESQUEMA_DBO.sub("", sql), secuencia_parametros)
+
+
+class ConexionSQLite(sqlite3.Connection):
+    """Conexión SQLite cuyos cursores son CursorSQLite."""
+
+    def cursor(self, factory=CursorSQLite):
+        return super().cursor(factory)
+
+
+class BackendSQLite(BackendBD):
+    """
+    Backend local sobre SQLite, en archivo o en memoria (':memory:').
+    Crea el esquema de dbohabitaciones y servicios y emula los procedimientos
+    almacenados de servicios, de modo que las funciones *_bd funcionan sin cambios.
+
+    Con ':memory:' todas las conexiones del pool comparten la misma base en memoria
+    (caché compartida), que vive mientras el backend siga abierto. Para pruebas de carga
+    con muchos escritores concurrentes conviene usar un archivo (modo WAL).
+    Args:
+        ruta (str): Ruta del archivo o ':memory:'.
+        tiempo_espera (float): Segundos que se espera a que se libere un bloqueo.
+    """
+
+    nombre = 'sqlite'
+    errores = (sqlite3.Error,)
+    errores_integridad = (sqlite3.IntegrityError,)
+
+    _contador_memoria = itertools.count(1)
+
+    def __init__(self, ruta=":memory:", tiempo_espera=5.0):
+        self.ruta = ruta
+        self.tiempo_espera = tiempo_espera
+        self.origen = None if ruta == ":memory:" else "sqlite:" + os.path.abspath(ruta)
+        self._ancla = None
+        if ruta == ":memory:":
+            self._uri = f"file:hotel_memoria_{next(self._contador_memoria)}?mode=memory&cache=shared"
+            # Mantiene viva la base en memoria aunque el pool cierre todas sus conexiones
+            self._ancla = self._abrir()
+            conexion = self._ancla
+        else:
+            self._uri = None
+            conexion = self._abrir()
+            conexion.execute("PRAGMA journal_mode = WAL")
+        try:
+            conexion.executescript(ESQUEMA_SQLITE)
+            conexion.commit()
+        finally:
+            if conexion is not self._ancla:
+                conexion.close()
+
+    def _abrir(self):
+        if self._uri:
+            conexion = sqlite3.connect(self._uri, uri=True, timeout=self.tiempo_espera,
+                                       check_same_thread=False, factory=ConexionSQLite)
+        else:
+            conexion = sqlite3.connect(self.ruta, timeout=self.tiempo_espera,
+                                       check_same_thread=False, factory=ConexionSQLite)
+            conexion.execute("PRAGMA synchronous = NORMAL")
+        return conexion
+
+    def conectar(self):
+        return self._abrir()
+
+    def es_transitorio(self, error):
+        # "database is locked" / "database table is locked" cuando se agota tiempo_espera
+        return isinstance(error, sqlite3.OperationalError) and "locked" in str(error)
+
+    def crear_punto_guardado(self, cursor, nombre):
+        # Un SAVEPOINT fuera de transacción abriría una que su RELEASE confirmaría
+        if not cursor.connection.in_transaction:
+            cursor.execute("BEGIN")
+        cursor.execute(f"SAVEPOINT {nombre}")
+
+    def cerrar(self):
+        if self._ancla is not None:
+            self._ancla.close()
+            self._ancla = None
+
+
+BACKENDS = {
+    BackendSQLServer.nombre: BackendSQLServer,
+    BackendSQLite.nombre: BackendSQLite,
+}
+
+
+def crear_backend(nombre, **opciones):
+    """
+    Crea un backend por nombre ('sqlserver' o 'sqlite').
+    Args:
+        nombre (str): Nombre del backend.
+        **opciones: Parámetros del constructor del backend.
+    Returns:
+        BackendBD: El backend creado.
+    """
+    try:
+        clase = BACKENDS[nombre.lower()]
+    except KeyError:
+        raise ValueError(f"Backend de base de datos desconocido: {nombre!r}. "
+                         f"Opciones: {', '.join(sorted(BACKENDS))}") from None
+    return clase(**opciones)
@@ -0,0 +1,11 @@
+# ========== Benchmarks de la capa de acceso a datos ==========
+#
+# Generan datos sintéticos reproducibles (misma semilla = mismas filas) y miden las
+# funciones de los módulos CRUD contra un backend local (SQLite). Uso:
+#
+#   python -m benchmarks.crud --filas 1000 100000 --salida resultados.json
+#   python -m benchmarks.comparar base.json resultados.json --umbral 0.2
+#   python -m benchmarks.carga --usuarios 1 2 4 8 16 32 --lecturas 0.8 --salida carga.json
+#
+# comparar termina con código 1 si alguna operación empeora más que el umbral, de modo
+# que se puede usar para detectar regresiones entre commits.
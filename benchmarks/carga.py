@@ -0,0 +1,442 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import queue
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import CRUD_habitaciones
+import CRUD_servicios
+from benchmarks.crud import _commit_actual
+from benchmarks.datos import VISTAS, cargar_datos, generar_habitaciones
+from conection_bd import configurar_bd, cerrar_pool, POOL_MAXIMO
+
+# ========== Generador de carga concurrente ==========
+#
+# Simula recepcionistas y huéspedes trabajando a la vez: cada usuario virtual es un hilo
+# (o un proceso, con --modo procesos) que llama sin parar a las funciones *_bd de
+# habitaciones y servicios con una mezcla de lecturas y escrituras (--lecturas 0.8 = 80 %
+# lecturas), opcionalmente con una pausa entre operaciones. La concurrencia sube por
+# etapas (--usuarios 1 2 4 8 ...); en cada una se recargan los datos sintéticos y todos los
+# usuarios arrancan a la vez y trabajan --duracion segundos. Por etapa se informa el
+# rendimiento (operaciones por segundo), los percentiles de latencia y la tasa de errores,
+# en total y por operación. Uso:
+#
+#   python -m benchmarks.carga --usuarios 1 2 4 8 16 32 --duracion 10 --lecturas 0.8
+#   python -m benchmarks.carga --modo procesos --salida carga.json --limite-p95 250
+#
+# Las funciones *_bd no lanzan excepciones: registran el error y devuelven False, ERROR,
+# None o una lista vacía. Por eso una operación cuenta como fallida si lanza, si devuelve
+# uno de esos valores de error o si registró algún mensaje de nivel ERROR mientras se
+# ejecutaba.
+#
+# Siempre se usa un backend SQLite local (en archivo, modo WAL, para que los procesos
+# compartan la base); con --modo hilos los usuarios comparten además el pool y la caché de
+# catálogos, como las sesiones de un mismo servidor.
+
+USUARIOS_POR_DEFECTO = (1, 2, 4, 8, 16, 32)
+DURACION = 10.0
+PROPORCION_LECTURAS = 0.8
+FILAS = 10000
+PERCENTILES = (50, 90, 95, 99)
+TIEMPO_ARRANQUE = 60.0  # Segundos máximos que se espera a que arranquen todos los usuarios
+USUARIO_ADMINISTRADOR = 1
+
+
+# ---------- Operaciones ----------
+#
+# Cada operación recibe la sesión del usuario virtual y devuelve True si tuvo éxito. Los
+# pesos deciden la frecuencia relativa dentro de las lecturas y de las escrituras.
+
+class Sesion:
+    """Estado de un usuario virtual: generador aleatorio propio y habitaciones que creó."""
+
+    def __init__(self, usuario, configuracion):
+        self.usuario = usuario
+        self.filas = configuracion['filas']
+        self.servicios = configuracion['servicios']
+        self.azar = random.Random(configuracion['semilla'] * 1000 + usuario)
+        # Cada usuario crea habitaciones en su propio rango de IDs, fuera de los cargados
+        self.nuevas = generar_habitaciones(10 ** 9, configuracion['semilla'] + usuario,
+                                           primer_id=self.filas + 1 + usuario * 10 ** 7)
+        self.creadas = []
+
+    def id_habitacion(self):
+        return self.azar.randint(1, self.filas)
+
+    def id_servicio(self):
+        return self.azar.randint(1, self.servicios)
+
+
+def _buscar_habitacion(sesion):
+    CRUD_habitaciones.buscar_habitacion_por_id_bd(sesion.id_habitacion())
+    return True  # None también significa "no existe"; los fallos se ven en el registro
+
+
+def _pagina_habitaciones(sesion):
+    CRUD_habitaciones.obtener_pagina_habitaciones(sesion.id_habitacion(), solo_disponibles=sesion.azar.random() < 0.5)
+    return True
+
+
+def _habitaciones_disponibles(sesion):
+    return bool(CRUD_habitaciones.obtener_habitaciones_disponibles())
+
+
+def _buscar_habitaciones(sesion):
+    CRUD_habitaciones.buscar_habitaciones_bd(vista=sesion.azar.choice(VISTAS), camas=sesion.azar.randint(1, 4),
+                                             precio_max=sesion.azar.choice((100, 200, 400)), limite=20)
+    return True
+
+
+def _todos_servicios(sesion):
+    return bool(CRUD_servicios.obtener_todos_servicios_bd())
+
+
+def _buscar_servicio(sesion):
+    CRUD_servicios.buscar_servicio_por_id_bd(sesion.id_servicio())
+    return True
+
+
+def _actualizar_habitacion(sesion):
+    habitacion = dict(next(sesion.nuevas), id=sesion.id_habitacion())
+    return CRUD_habitaciones.guardar_habitacion_bd(habitacion) != CRUD_habitaciones.ERROR
+
+
+def _agregar_habitacion(sesion):
+    habitacion = next(sesion.nuevas)
+    if not CRUD_habitaciones.agregar_habitacion_bd(habitacion):
+        return False
+    sesion.creadas.append(habitacion['id'])
+    return True
+
+
+def _eliminar_habitacion(sesion):
+    if not sesion.creadas:
+        return _agregar_habitacion(sesion)
+    return CRUD_habitaciones.eliminar_habitacion_bd(sesion.creadas.pop())
+
+
+def _agregar_servicio(sesion):
+    return CRUD_servicios.agregar_servicio_bd(USUARIO_ADMINISTRADOR, f"Servicio de carga {sesion.usuario}",
+                                              round(sesion.azar.uniform(5, 150), 2))
+
+
+def _editar_servicio(sesion):
+    servicio_id = sesion.id_servicio()
+    return CRUD_servicios.editar_servicio_bd(USUARIO_ADMINISTRADOR, servicio_id, f"Servicio {servicio_id}",
+                                             round(sesion.azar.uniform(5, 150), 2))
+
+
+LECTURAS = {
+    'buscar_habitacion_por_id_bd': (_buscar_habitacion, 30),
+    'obtener_pagina_habitaciones': (_pagina_habitaciones, 20),
+    'obtener_habitaciones_disponibles': (_habitaciones_disponibles, 10),
+    'buscar_habitaciones_bd': (_buscar_habitaciones, 15),
+    'obtener_todos_servicios_bd': (_todos_servicios, 10),
+    'buscar_servicio_por_id_bd': (_buscar_servicio, 15),
+}
+ESCRITURAS = {
+    'actualizar_habitacion': (_actualizar_habitacion, 40),
+    'agregar_habitacion_bd': (_agregar_habitacion, 15),
+    'eliminar_habitacion_bd': (_eliminar_habitacion, 15),
+    'agregar_servicio_bd': (_agregar_servicio, 10),
+    'editar_servicio_bd': (_editar_servicio, 20),
+}
+
+
+class _ContadorErrores(logging.Handler):
+    """Cuenta, por hilo, los mensajes de nivel ERROR (así informan de sus fallos las funciones *_bd)."""
+
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self._local = threading.local()
+
+    def emit(self, mensaje):
+        self._local.errores = self.errores() + 1
+        self._local.ultimo = mensaje.getMessage()
+
+    def errores(self):
+        return getattr(self._local, 'errores', 0)
+
+    def ultimo(self):
+        return getattr(self._local, 'ultimo', None)
+
+
+_contador_errores = None
+
+
+def _instalar_contador():
+    # Sustituye la salida de los errores por el contador: con muchos usuarios fallando a la
+    # vez el registro inundaría la consola (los mensajes de ejemplo van al informe)
+    global _contador_errores
+    if _contador_errores is None:
+        _contador_errores = _ContadorErrores()
+        logging.getLogger().addHandler(_contador_errores)
+    return _contador_errores
+
+
+# ---------- Usuarios virtuales ----------
+
+def _usuario_virtual(usuario, configuracion, barrera, resultados):
+    """
+    Cuerpo de un usuario virtual (hilo o proceso): espera a que arranquen todos, ejecuta
+    operaciones durante configuracion['duracion'] segundos y deja en `resultados` un dict
+    {'latencias': {operacion: [segundos]}, 'errores': {operacion: n}, 'ejemplos': {operacion: mensaje}}.
+    """
+    contador = _instalar_contador()
+    sesion = Sesion(usuario, configuracion)
+    lecturas = list(LECTURAS.items())
+    escrituras = list(ESCRITURAS.items())
+    pesos_lecturas = [peso for _, (_, peso) in lecturas]
+    pesos_escrituras = [peso for _, (_, peso) in escrituras]
+    pausa = configuracion['pausa']
+    latencias = {}
+    errores = {}
+    ejemplos = {}
+    try:
+        barrera.wait(TIEMPO_ARRANQUE)
+    except threading.BrokenBarrierError:
+        resultados.put({'latencias': {}, 'errores': {}, 'ejemplos': {}})
+        return
+    limite = time.perf_counter() + configuracion['duracion']
+    while time.perf_counter() < limite:
+        if sesion.azar.random() < configuracion['lecturas']:
+            nombre, (operacion, _) = sesion.azar.choices(lecturas, pesos_lecturas)[0]
+        else:
+            nombre, (operacion, _) = sesion.azar.choices(escrituras, pesos_escrituras)[0]
+        errores_previos = contador.errores()
+        inicio = time.perf_counter()
+        try:
+            correcta = operacion(sesion)
+        except Exception as e:
+            correcta = False
+            ejemplos.setdefault(nombre, repr(e))
+        latencias.setdefault(nombre, []).append(time.perf_counter() - inicio)
+        if not correcta or contador.errores() != errores_previos:
+            errores[nombre] = errores.get(nombre, 0) + 1
+            if contador.errores() != errores_previos:
+                ejemplos.setdefault(nombre, contador.ultimo())
+        if pausa:
+            time.sleep(sesion.azar.expovariate(1 / pausa))
+    resultados.put({'latencias': latencias, 'errores': errores, 'ejemplos': ejemplos})
+
+
+def _usuario_en_proceso(usuario, configuracion, barrera, resultados):
+    # Cada proceso tiene su propio backend, pool y caché sobre el mismo archivo SQLite
+    configurar_bd('sqlite', ruta=configuracion['sqlite'])
+    try:
+        _usuario_virtual(usuario, configuracion, barrera, resultados)
+    finally:
+        cerrar_pool()
+
+
+def _lanzar_usuarios(usuarios, configuracion):
+    """Ejecuta `usuarios` usuarios virtuales a la vez y devuelve la lista de sus resultados."""
+    if configuracion['modo'] == 'procesos':
+        # 'spawn' en todas las plataformas: no se heredan hilos ni conexiones abiertas
+        contexto = multiprocessing.get_context('spawn')
+        barrera = contexto.Barrier(usuarios)
+        resultados = contexto.Queue()
+        trabajadores = [contexto.Process(target=_usuario_en_proceso, args=(usuario, configuracion, barrera, resultados),
+                                         daemon=True) for usuario in range(usuarios)]
+    else:
+        barrera = threading.Barrier(usuarios)
+        resultados = queue.Queue()
+        trabajadores = [threading.Thread(target=_usuario_virtual, args=(usuario, configuracion, barrera, resultados),
+                                         name=f"usuario-{usuario}", daemon=True) for usuario in range(usuarios)]
+    for trabajador in trabajadores:
+        trabajador.start()
+    # Los resultados se leen antes del join: un proceso no termina mientras su cola tenga datos
+    recogidos = []
+    espera = TIEMPO_ARRANQUE + configuracion['duracion'] + 30
+    for _ in trabajadores:
+        try:
+            recogidos.append(resultados.get(timeout=espera))
+        except queue.Empty:
+            break
+    for trabajador in trabajadores:
+        trabajador.join(timeout=5)
+    return recogidos
+
+
+# ---------- Estadísticas ----------
+
+def _percentil(ordenados, percentil):
+    # Método del rango más cercano, como benchmarks.crud.medir
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * percentil / 100))]
+
+
+def resumir_latencias(latencias, errores, segundos):
+    """
+    Args:
+        latencias (list): Latencias en segundos.
+        errores (int): Operaciones fallidas.
+        segundos (float): Duración de la etapa.
+    Returns:
+        dict: n, errores, tasa_error, ops_por_segundo, media_ms, max_ms y p50_ms, p90_ms, ...
+    """
+    resumen = {'n': len(latencias), 'errores': errores,
+               'tasa_error': errores / len(latencias) if latencias else 0.0,
+               'ops_por_segundo': len(latencias) / segundos if segundos else None}
+    if latencias:
+        ordenadas = sorted(latencias)
+        resumen['media_ms'] = statistics.fmean(ordenadas) * 1000
+        for percentil in PERCENTILES:
+            resumen[f'p{percentil}_ms'] = _percentil(ordenadas, percentil) * 1000
+        resumen['max_ms'] = ordenadas[-1] * 1000
+    return resumen
+
+
+def medir_etapa(usuarios, configuracion):
+    """
+    Recarga los datos sintéticos, ejecuta una etapa con `usuarios` usuarios concurrentes y
+    resume sus resultados.
+    Returns:
+        dict: Resumen global (ver resumir_latencias) más 'usuarios', 'lecturas',
+              'escrituras', 'por_operacion' y 'ejemplos_error'.
+    """
+    ruta = configuracion['sqlite']
+    for sufijo in ("", "-wal", "-shm"):
+        if os.path.exists(ruta + sufijo):
+            os.remove(ruta + sufijo)
+    configurar_bd('sqlite', ruta=ruta)
+    cargar_datos(configuracion['filas'], configuracion['servicios'], configuracion['semilla'])
+    if configuracion['modo'] == 'procesos':
+        cerrar_pool()  # Los procesos abren sus propias conexiones
+    try:
+        recogidos = _lanzar_usuarios(usuarios, configuracion)
+    finally:
+        cerrar_pool()
+
+    por_operacion = {}
+    ejemplos = {}
+    for resultado in recogidos:
+        for nombre, tiempos in resultado['latencias'].items():
+            acumulado = por_operacion.setdefault(nombre, {'latencias': [], 'errores': 0})
+            acumulado['latencias'].extend(tiempos)
+        for nombre, cantidad in resultado['errores'].items():
+            por_operacion.setdefault(nombre, {'latencias': [], 'errores': 0})['errores'] += cantidad
+        for nombre, mensaje in resultado['ejemplos'].items():
+            ejemplos.setdefault(nombre, mensaje)
+
+    segundos = configuracion['duracion']
+
+    def agrupar(nombres):
+        latencias = [t for nombre in nombres if nombre in por_operacion for t in por_operacion[nombre]['latencias']]
+        errores = sum(por_operacion[nombre]['errores'] for nombre in nombres if nombre in por_operacion)
+        return resumir_latencias(latencias, errores, segundos)
+
+    etapa = agrupar(list(por_operacion))
+    etapa['usuarios'] = usuarios
+    etapa['usuarios_completados'] = len(recogidos)
+    etapa['lecturas'] = agrupar(list(LECTURAS))
+    etapa['escrituras'] = agrupar(list(ESCRITURAS))
+    etapa['por_operacion'] = {nombre: resumir_latencias(datos['latencias'], datos['errores'], segundos)
+                              for nombre, datos in sorted(por_operacion.items())}
+    etapa['ejemplos_error'] = ejemplos
+    return etapa
+
+
+def _imprimir_etapa(etapa):
+    p95 = etapa.get('p95_ms')
+    print(f"  {etapa['usuarios']:>4} usuarios  {etapa['ops_por_segundo']:10.1f} ops/s"
+          f"   p50 {etapa.get('p50_ms', 0):9.2f} ms   p95 {p95 or 0:9.2f} ms   p99 {etapa.get('p99_ms', 0):9.2f} ms"
+          f"   errores {etapa['tasa_error']:6.1%}", file=sys.stderr)
+    for nombre, mensaje in etapa['ejemplos_error'].items():
+        print(f"         {nombre}: {mensaje}", file=sys.stderr)
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Prueba de carga de las funciones CRUD con usuarios concurrentes.")
+    parser.add_argument("--usuarios", type=int, nargs="+", default=list(USUARIOS_POR_DEFECTO),
+                        help="Usuarios concurrentes de cada etapa de la rampa (p. ej. 1 2 4 8 16 32).")
+    parser.add_argument("--duracion", type=float, default=DURACION, help="Segundos por etapa.")
+    parser.add_argument("--lecturas", type=float, default=PROPORCION_LECTURAS,
+                        help=f"Proporción de lecturas entre 0 y 1 (por defecto {PROPORCION_LECTURAS}).")
+    parser.add_argument("--modo", choices=("hilos", "procesos"), default="hilos",
+                        help="Usuarios virtuales como hilos de un proceso o como procesos independientes.")
+    parser.add_argument("--pausa", type=float, default=0.0,
+                        help="Pausa media en segundos entre operaciones de un usuario (0 = sin pausa).")
+    parser.add_argument("--filas", type=int, default=FILAS, help="Habitaciones del conjunto de datos.")
+    parser.add_argument("--servicios", type=int, default=None,
+                        help="Servicios del conjunto de datos (por defecto filas / 10, mínimo 100).")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--sqlite", default=os.path.join(tempfile.gettempdir(), "hotel_carga.db"),
+                        help="Archivo SQLite de la prueba; se borra y se recarga en cada etapa.")
+    parser.add_argument("--limite-p95", type=float, default=None,
+                        help="Detener la rampa cuando el p95 supere estos milisegundos.")
+    parser.add_argument("--limite-errores", type=float, default=None,
+                        help="Detener la rampa cuando la tasa de errores supere esta proporción (p. ej. 0.05).")
+    parser.add_argument("--salida", help="Archivo JSON donde guardar los resultados.")
+    opciones = parser.parse_args(argumentos)
+    if not 0 <= opciones.lecturas <= 1:
+        parser.error("--lecturas debe estar entre 0 y 1.")
+    if opciones.sqlite == ":memory:":
+        parser.error("La prueba de carga necesita un archivo SQLite (--sqlite ruta).")
+
+    configuracion = {
+        'modo': opciones.modo,
+        'duracion': opciones.duracion,
+        'lecturas': opciones.lecturas,
+        'pausa': opciones.pausa,
+        'filas': opciones.filas,
+        'servicios': opciones.servicios or max(opciones.filas // 10, 100),
+        'semilla': opciones.semilla,
+        'sqlite': opciones.sqlite,
+    }
+    informe = {
+        'meta': {
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'commit': _commit_actual(),
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'nucleos': os.cpu_count(),
+            'backend': 'sqlite',
+            'pool_maximo': POOL_MAXIMO,
+            **configuracion,
+        },
+        'etapas': [],
+    }
+    print(f"Carga {opciones.lecturas:.0%} lecturas con {opciones.modo}, {opciones.duracion:g} s por etapa "
+          f"({configuracion['filas']} habitaciones, {configuracion['servicios']} servicios)", file=sys.stderr)
+    for usuarios in opciones.usuarios:
+        etapa = medir_etapa(usuarios, configuracion)
+        informe['etapas'].append(etapa)
+        _imprimir_etapa(etapa)
+        if etapa['usuarios_completados'] < usuarios:
+            print(f"  Solo terminaron {etapa['usuarios_completados']} de {usuarios} usuarios; se detiene la rampa.",
+                  file=sys.stderr)
+            break
+        if opciones.limite_p95 is not None and etapa.get('p95_ms', 0) > opciones.limite_p95:
+            print(f"  p95 por encima de {opciones.limite_p95:g} ms; se detiene la rampa.", file=sys.stderr)
+            break
+        if opciones.limite_errores is not None and etapa['tasa_error'] > opciones.limite_errores:
+            print(f"  Tasa de errores por encima de {opciones.limite_errores:.1%}; se detiene la rampa.",
+                  file=sys.stderr)
+            break
+
+    if informe['etapas']:
+        mejor = max(informe['etapas'], key=lambda etapa: etapa['ops_por_segundo'])
+        informe['maximo_rendimiento'] = {'usuarios': mejor['usuarios'], 'ops_por_segundo': mejor['ops_por_segundo']}
+        print(f"Máximo rendimiento: {mejor['ops_por_segundo']:.1f} ops/s con {mejor['usuarios']} usuarios.",
+              file=sys.stderr)
+
+    texto = json.dumps(informe, indent=2, ensure_ascii=False)
+    if opciones.salida:
+        with open(opciones.salida, 'w', encoding='utf-8') as archivo:
+            archivo.write(texto)
+        print(f"Resultados guardados en {opciones.salida}", file=sys.stderr)
+    else:
+        print(texto)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import argparse
+import json
+import sys
+
+# ========== Comparación de resultados entre commits ==========
+
+UMBRAL_POR_DEFECTO = 0.20  # Empeoramiento relativo de la mediana que se considera regresión
+
+
+def comparar(base, nuevo, umbral=UMBRAL_POR_DEFECTO, metrica='mediana_ms'):
+    """
+    Compara dos informes de benchmarks.crud.
+    Args:
+        base (dict): Informe de referencia.
+        nuevo (dict): Informe a evaluar.
+        umbral (float): Cambio relativo a partir del cual se marca una regresión o mejora.
+        metrica (str): Campo que se compara ('mediana_ms', 'p95_ms', 'min_ms' o 'media_ms').
+    Returns:
+        list: Tuplas (filas, operacion, valor_base, valor_nuevo, cambio_relativo, veredicto)
+              con veredicto 'regresion', 'mejora' o 'igual'.
+    """
+    filas_comparadas = []
+    for filas, operaciones in nuevo['resultados'].items():
+        referencia = base['resultados'].get(filas, {})
+        for operacion, medida in operaciones.items():
+            anterior = referencia.get(operacion, {})
+            if metrica not in medida or metrica not in anterior or not anterior[metrica]:
+                continue
+            cambio = (medida[metrica] - anterior[metrica]) / anterior[metrica]
+            if cambio > umbral:
+                veredicto = 'regresion'
+            elif cambio < -umbral:
+                veredicto = 'mejora'
+            else:
+                veredicto = 'igual'
+            filas_comparadas.append((filas, operacion, anterior[metrica], medida[metrica], cambio, veredicto))
+    return filas_comparadas
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Compara dos resultados de benchmarks.crud.")
+    parser.add_argument("base", help="JSON de referencia (p. ej. el del commit anterior).")
+    parser.add_argument("nuevo", help="JSON a evaluar.")
+    parser.add_argument("--umbral", type=float, default=UMBRAL_POR_DEFECTO,
+                        help=f"Empeoramiento relativo tolerado (por defecto {UMBRAL_POR_DEFECTO}).")
+    parser.add_argument("--metrica", default="mediana_ms", choices=("mediana_ms", "p95_ms", "min_ms", "media_ms"))
+    opciones = parser.parse_args(argumentos)
+
+    with open(opciones.base, encoding='utf-8') as archivo:
+        base = json.load(archivo)
+    with open(opciones.nuevo, encoding='utf-8') as archivo:
+        nuevo = json.load(archivo)
+
+    print(f"Base: {base['meta'].get('commit')}   Nuevo: {nuevo['meta'].get('commit')}   Métrica: {opciones.metrica}")
+    resultado = comparar(base, nuevo, opciones.umbral, opciones.metrica)
+    for filas, operacion, anterior, actual, cambio, veredicto in resultado:
+        marca = {'regresion': '!!', 'mejora': '++', 'igual': '  '}[veredicto]
+        print(f"{marca} {filas:>8} {operacion:42} {anterior:10.3f} -> {actual:10.3f} ms  {cambio:+7.1%}")
+
+    regresiones = sum(1 for fila in resultado if fila[-1] == 'regresion')
+    if regresiones:
+        print(f"\n{regresiones} operación(es) empeoraron más de un {opciones.umbral:.0%}.")
+        return 1
+    print("\nSin regresiones.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
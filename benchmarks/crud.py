@@ -0,0 +1,196 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+import CRUD_habitaciones
+import CRUD_servicios
+import reservas
+from benchmarks.datos import cargar_datos, generar_habitaciones
+from cache_bd import cache_catalogo
+from conection_bd import configurar_bd, conexion_bd, obtener_backend, cerrar_pool
+
+# ========== Benchmark de las funciones CRUD ==========
+#
+# Para cada tamaño de tabla se carga un conjunto de datos sintético en un backend SQLite
+# nuevo y se mide cada punto de entrada de los módulos CRUD. Las lecturas cacheadas se
+# miden en frío (caché invalidada antes de cada llamada) y en caliente.
+
+FILAS_POR_DEFECTO = (1000, 10000, 100000)
+REPETICIONES = 200
+TIEMPO_MAXIMO = 5.0  # Segundos por operación; las más lentas se miden menos veces
+MINIMO_REPETICIONES = 3
+
+
+def medir(operacion, repeticiones=REPETICIONES, tiempo_maximo=TIEMPO_MAXIMO, preparar=None):
+    """
+    Mide `operacion(i)` para i = 0, 1, ... hasta `repeticiones` veces o `tiempo_maximo`
+    segundos (con un mínimo de MINIMO_REPETICIONES). `preparar(i)`, si se indica, se ejecuta
+    antes de cada llamada sin contar en el tiempo.
+    Returns:
+        dict: n, min_ms, mediana_ms, p95_ms, media_ms y ops_por_segundo.
+    """
+    tiempos = []
+    limite = time.perf_counter() + tiempo_maximo
+    for i in range(repeticiones):
+        if preparar is not None:
+            preparar(i)
+        inicio = time.perf_counter()
+        operacion(i)
+        tiempos.append(time.perf_counter() - inicio)
+        if len(tiempos) >= MINIMO_REPETICIONES and time.perf_counter() > limite:
+            break
+    tiempos.sort()
+    media = statistics.fmean(tiempos)
+    return {
+        'n': len(tiempos),
+        'min_ms': tiempos[0] * 1000,
+        'mediana_ms': statistics.median(tiempos) * 1000,
+        'p95_ms': tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.95))] * 1000,
+        'media_ms': media * 1000,
+        'ops_por_segundo': 1 / media if media else None,
+    }
+
+
+def _abrir_y_cerrar(_):
+    obtener_backend().conectar().close()
+
+
+def _prestar_del_pool(_):
+    with conexion_bd() as conexion:
+        conexion.cursor().execute("SELECT 1").fetchone()
+
+
+def _invalidar_todo(_):
+    cache_catalogo.invalidar()
+
+
+def medir_tamano(filas, servicios, semilla, repeticiones, tiempo_maximo, ruta_sqlite):
+    """Carga un conjunto de datos de `filas` habitaciones y mide todas las operaciones."""
+    if ruta_sqlite != ":memory:" and os.path.exists(ruta_sqlite):
+        os.remove(ruta_sqlite)
+    configurar_bd('sqlite', ruta=ruta_sqlite)
+    inicio = time.perf_counter()
+    cargar_datos(filas, servicios, semilla)
+    resultados = {'carga_datos': {'n': 1, 'segundos': time.perf_counter() - inicio}}
+
+    azar = random.Random(semilla)
+    ids = [azar.randint(1, filas) for _ in range(repeticiones)]
+    ids_servicio = [azar.randint(1, servicios) for _ in range(repeticiones)]
+    nuevas = list(generar_habitaciones(repeticiones, semilla + 7, primer_id=filas + 1))
+    hoy = datetime.now().date()
+
+    def medir_op(nombre, operacion, preparar=None, veces=repeticiones):
+        resultados[nombre] = medir(operacion, veces, tiempo_maximo, preparar)
+
+    # Coste de conexión: conexión nueva frente a préstamo del pool
+    medir_op('conexion_nueva', _abrir_y_cerrar)
+    medir_op('conexion_pool', _prestar_del_pool)
+
+    # Lecturas de habitaciones
+    medir_op('obtener_todas_habitaciones_frio', lambda i: CRUD_habitaciones.obtener_todas_habitaciones(),
+             preparar=_invalidar_todo)
+    medir_op('obtener_todas_habitaciones_caliente', lambda i: CRUD_habitaciones.obtener_todas_habitaciones())
+    medir_op('obtener_habitaciones_disponibles_frio',
+             lambda i: CRUD_habitaciones.obtener_habitaciones_disponibles(), preparar=_invalidar_todo)
+    medir_op('obtener_habitaciones_disponibles_fechas',
+             lambda i: CRUD_habitaciones.obtener_habitaciones_disponibles(hoy, hoy + timedelta(days=3)))
+    medir_op('buscar_habitacion_por_id_bd', lambda i: CRUD_habitaciones.buscar_habitacion_por_id_bd(ids[i]))
+    medir_op('obtener_pagina_habitaciones', lambda i: CRUD_habitaciones.obtener_pagina_habitaciones(ids[i]))
+    medir_op('buscar_habitaciones_bd', lambda i: CRUD_habitaciones.buscar_habitaciones_bd(
+        vista='mar', camas=2, precio_max=200, limite=20))
+    CRUD_habitaciones.buscar_habitaciones(usar_indice=True, vista='mar')  # Construye el índice
+    medir_op('buscar_habitaciones_indice', lambda i: CRUD_habitaciones.buscar_habitaciones(
+        usar_indice=True, vista='mar', camas=2, precio_max=200, limite=20))
+    medir_op('iterar_habitaciones', lambda i: sum(1 for _ in CRUD_habitaciones.iterar_habitaciones()), veces=5)
+
+    # Escrituras de habitaciones (sobre IDs nuevos, que después se eliminan)
+    medir_op('agregar_habitacion_bd', lambda i: CRUD_habitaciones.agregar_habitacion_bd(nuevas[i]))
+    medir_op('actualizar_habitacion_bd', lambda i: CRUD_habitaciones.actualizar_habitacion_bd(
+        dict(nuevas[i], precio=nuevas[i]['precio'] + 1)))
+    medir_op('reservar_habitacion', lambda i: reservas.reservar_habitacion(
+        nuevas[i]['id'], hoy + timedelta(days=30), hoy + timedelta(days=32), "Huésped de prueba"))
+    medir_op('eliminar_habitacion_bd', lambda i: CRUD_habitaciones.eliminar_habitacion_bd(nuevas[i]['id']))
+
+    # Servicios (procedimientos almacenados emulados)
+    medir_op('obtener_todos_servicios_frio', lambda i: CRUD_servicios.obtener_todos_servicios_bd(),
+             preparar=_invalidar_todo)
+    medir_op('buscar_servicio_por_id_bd', lambda i: CRUD_servicios.buscar_servicio_por_id_bd(ids_servicio[i]))
+    medir_op('obtener_servicio_indice', lambda i: CRUD_servicios.obtener_servicio(ids_servicio[i], usar_indice=True))
+    medir_op('agregar_servicio_bd', lambda i: CRUD_servicios.agregar_servicio_bd(1, f"Servicio {i}", 10 + i))
+    medir_op('editar_servicio_bd', lambda i: CRUD_servicios.editar_servicio_bd(
+        1, servicios + 1 + i, f"Servicio {i} editado", 20 + i))
+    medir_op('eliminar_servicio_bd', lambda i: CRUD_servicios.eliminar_servicio_bd(1, servicios + 1 + i))
+
+    cerrar_pool()
+    return resultados
+
+
+def _commit_actual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Benchmark de las funciones CRUD con datos sintéticos.")
+    parser.add_argument("--filas", type=int, nargs="+", default=list(FILAS_POR_DEFECTO),
+                        help="Tamaños de la tabla de habitaciones (p. ej. 1000 100000 1000000).")
+    parser.add_argument("--servicios", type=int, default=None,
+                        help="Servicios por conjunto de datos (por defecto filas / 10, mínimo 100).")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--repeticiones", type=int, default=REPETICIONES)
+    parser.add_argument("--tiempo-maximo", type=float, default=TIEMPO_MAXIMO,
+                        help="Segundos máximos por operación.")
+    parser.add_argument("--sqlite", default=":memory:", help="Archivo SQLite a usar (por defecto en memoria).")
+    parser.add_argument("--salida", help="Archivo JSON donde guardar los resultados.")
+    parser.add_argument("--detallado", action="store_true", help="Mostrar los mensajes de los módulos CRUD.")
+    opciones = parser.parse_args(argumentos)
+
+    informe = {
+        'meta': {
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'commit': _commit_actual(),
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'backend': 'sqlite',
+            'sqlite': opciones.sqlite,
+            'semilla': opciones.semilla,
+            'repeticiones': opciones.repeticiones,
+        },
+        'resultados': {},
+    }
+    for filas in opciones.filas:
+        servicios = opciones.servicios or max(filas // 10, 100)
+        print(f"Midiendo con {filas} habitaciones y {servicios} servicios...", file=sys.stderr)
+        with open(os.devnull, 'w') as nulo:
+            salida = contextlib.nullcontext() if opciones.detallado else contextlib.redirect_stdout(nulo)
+            with salida:
+                resultados = medir_tamano(filas, servicios, opciones.semilla, opciones.repeticiones,
+                                          opciones.tiempo_maximo, opciones.sqlite)
+        informe['resultados'][str(filas)] = resultados
+        for nombre, medida in resultados.items():
+            if 'mediana_ms' in medida:
+                print(f"  {nombre:42} mediana {medida['mediana_ms']:10.3f} ms   p95 {medida['p95_ms']:10.3f} ms"
+                      f"   (n={medida['n']})", file=sys.stderr)
+
+    texto = json.dumps(informe, indent=2, ensure_ascii=False)
+    if opciones.salida:
+        with open(opciones.salida, 'w', encoding='utf-8') as archivo:
+            archivo.write(texto)
+        print(f"Resultados guardados en {opciones.salida}", file=sys.stderr)
+    else:
+        print(texto)
+
+
+if __name__ == "__main__":
+    main()
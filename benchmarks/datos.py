@@ -0,0 +1,82 @@
+import random
+
+from cache_bd import cache_catalogo
+from conection_bd import conexion_bd
+from importar_habitaciones import SQL_INSERTAR_HABITACION
+
+# ========== Datos sintéticos reproducibles ==========
+
+VISTAS = ('Mar', 'Montaña', 'Ciudad', 'Jardín', 'Piscina', 'Interior')
+LUGARES = ('Playa del Carmen', 'Centro Histórico', 'Cenote Azul', 'Zona Arqueológica',
+           'Malecón', 'Mercado de Artesanías', 'Parque Nacional', 'Mirador')
+SERVICIOS = ('Spa', 'Desayuno buffet', 'Lavandería', 'Traslado al aeropuerto', 'Gimnasio',
+             'Tour guiado', 'Cena romántica', 'Masaje', 'Estacionamiento', 'Minibar')
+
+TAMANO_LOTE = 5000
+
+
+def generar_habitaciones(cantidad, semilla=42, primer_id=1):
+    """
+    Genera `cantidad` habitaciones como las que maneja CRUD_habitaciones.
+    Yields:
+        dict: Habitación con las claves de agregar_habitacion_bd.
+    """
+    azar = random.Random(semilla)
+    for id_habitacion in range(primer_id, primer_id + cantidad):
+        camas = azar.randint(1, 4)
+        vista = azar.choice(VISTAS)
+        yield {
+            'id': id_habitacion,
+            'descripcion': f"Habitación {id_habitacion} con {camas} camas y vista {vista.lower()}",
+            'camas': camas,
+            'banos': azar.randint(1, 3),
+            'vista': vista,
+            'balcon': azar.random() < 0.4,
+            'precio': round(azar.uniform(40, 400) * camas / 2, 2),
+            'disponible': azar.random() < 0.8,
+            'lugar_turistico': azar.choice(LUGARES),
+        }
+
+
+def generar_servicios(cantidad, semilla=42):
+    """
+    Yields:
+        tuple: (nombre, precio) de `cantidad` servicios.
+    """
+    azar = random.Random(semilla + 1)
+    for numero in range(1, cantidad + 1):
+        yield f"{azar.choice(SERVICIOS)} {numero}", round(azar.uniform(5, 150), 2)
+
+
+def _insertar_en_lotes(cursor, sql, filas):
+    lote = []
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) >= TAMANO_LOTE:
+            cursor.executemany(sql, lote)
+            lote = []
+    if lote:
+        cursor.executemany(sql, lote)
+
+
+def cargar_datos(habitaciones, servicios, semilla=42):
+    """
+    Vacía las tablas del backend activo y carga los datos sintéticos en una transacción.
+    Args:
+        habitaciones (int): Número de habitaciones.
+        servicios (int): Número de servicios.
+        semilla (int): Semilla del generador.
+    """
+    with conexion_bd() as conexion:
+        cursor = conexion.cursor()
+        cursor.execute("DELETE FROM ocupacion_habitaciones")
+        cursor.execute("DELETE FROM dbohabitaciones")
+        cursor.execute("DELETE FROM servicios")
+        _insertar_en_lotes(cursor, SQL_INSERTAR_HABITACION, (
+            (hab['id'], hab['descripcion'], hab['camas'], hab['banos'], hab['vista'],
+             1 if hab['balcon'] else 0, hab['precio'], 1 if hab['disponible'] else 0, hab['lugar_turistico'])
+            for hab in generar_habitaciones(habitaciones, semilla)))
+        _insertar_en_lotes(cursor, "INSERT INTO servicios (nombre, precio) VALUES (?, ?)",
+                           generar_servicios(servicios, semilla))
+        conexion.commit()
+    cache_catalogo.invalidar()
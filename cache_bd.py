@@ -0,0 +1,166 @@
+import contextvars
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# ========== Caché en proceso para los catálogos de habitaciones y servicios ==========
+#
+# Las claves son tuplas cuyo primer elemento es el espacio de nombres ('habitaciones',
+# 'servicios', ...). Las funciones de escritura invalidan su espacio de nombres completo.
+#
+# Dentro de sin_cache() (lo activa conection_bd.transaccion) las lecturas se saltan la caché:
+# el cargador lee con la conexión de la transacción y lo que devuelve, que puede incluir
+# filas aún sin confirmar, no se guarda para los demás hilos.
+
+CACHE_TTL = float(os.environ.get("HOTEL_CACHE_TTL", "30"))
+CACHE_CAPACIDAD = int(os.environ.get("HOTEL_CACHE_CAPACIDAD", "256"))
+
+_sin_cache = contextvars.ContextVar('hotel_sin_cache', default=False)
+
+
+@contextmanager
+def sin_cache():
+    """Dentro del bloque (y de lo que se lance desde él), obtener_o_cargar no lee ni guarda en la caché."""
+    testigo = _sin_cache.set(True)
+    try:
+        yield
+    finally:
+        _sin_cache.reset(testigo)
+
+
+class CacheTTL:
+    """
+    Caché de lectura con caducidad (TTL) y expulsión LRU por tamaño, segura entre hilos.
+
+    Si varios hilos piden a la vez una clave ausente, solo uno ejecuta el cargador y los
+    demás esperan su resultado. Un resultado cargado mientras se invalidaba su espacio de
+    nombres no se guarda, para no volver a publicar datos ya obsoletos.
+    Args:
+        capacidad (int): Número máximo de entradas.
+        ttl (float): Segundos de validez de cada entrada (0 desactiva la caché).
+    """
+
+    def __init__(self, capacidad=256, ttl=30.0):
+        self.capacidad = capacidad
+        self.ttl = ttl
+        self._entradas = OrderedDict()  # clave -> (valor, instante_caducidad)
+        self._generaciones = {}         # espacio de nombres -> contador de invalidaciones
+        self._cargando = {}             # clave -> threading.Event de la carga en curso
+        self._candado = threading.Lock()
+        self._estadisticas = {
+            'aciertos': 0,
+            'fallos': 0,
+            'expirados': 0,
+            'desalojos': 0,
+            'invalidaciones': 0,
+        }
+
+    def obtener_o_cargar(self, clave, cargador):
+        """
+        Devuelve el valor en caché de `clave` o lo obtiene llamando a `cargador()`.
+        Si el cargador lanza una excepción no se guarda nada y la excepción se propaga.
+        """
+        if self.ttl <= 0 or self.capacidad <= 0 or _sin_cache.get():
+            with self._candado:
+                self._estadisticas['fallos'] += 1
+            return cargador()
+
+        espacio = clave[0]
+        while True:
+            with self._candado:
+                entrada = self._entradas.get(clave)
+                if entrada is not None:
+                    valor, caducidad = entrada
+                    if time.monotonic() < caducidad:
+                        self._entradas.move_to_end(clave)
+                        self._estadisticas['aciertos'] += 1
+                        return valor
+                    del self._entradas[clave]
+                    self._estadisticas['expirados'] += 1
+                en_curso = self._cargando.get(clave)
+                if en_curso is None:
+                    self._estadisticas['fallos'] += 1
+                    en_curso = self._cargando[clave] = threading.Event()
+                    generacion = self._generaciones.get(espacio, 0)
+                    break
+            # Otro hilo ya está cargando esta clave: se espera y se vuelve a consultar
+            en_curso.wait()
+
+        try:
+            valor = cargador()
+        except BaseException:
+            with self._candado:
+                del self._cargando[clave]
+            en_curso.set()
+            raise
+        with self._candado:
+            del self._cargando[clave]
+            if self._generaciones.get(espacio, 0) == generacion:
+                self._entradas[clave] = (valor, time.monotonic() + self.ttl)
+                self._entradas.move_to_end(clave)
+                while len(self._entradas) > self.capacidad:
+                    self._entradas.popitem(last=False)
+                    self._estadisticas['desalojos'] += 1
+        en_curso.set()
+        return valor
+
+    def invalidar(self, espacio=None):
+        """
+        Elimina las entradas de un espacio de nombres, o todas si `espacio` es None.
+        """
+        with self._candado:
+            self._estadisticas['invalidaciones'] += 1
+            if espacio is None:
+                self._entradas.clear()
+                for nombre in self._generaciones:
+                    self._generaciones[nombre] += 1
+                for clave in self._cargando:
+                    self._generaciones[clave[0]] = self._generaciones.get(clave[0], 0) + 1
+                return
+            self._generaciones[espacio] = self._generaciones.get(espacio, 0) + 1
+            for clave in [clave for clave in self._entradas if clave[0] == espacio]:
+                del self._entradas[clave]
+
+    def generacion(self, espacio):
+        """Número de invalidaciones de `espacio` (cambia cada vez que se invalida)."""
+        with self._candado:
+            return self._generaciones.get(espacio, 0)
+
+    def estadisticas(self):
+        """
+        Returns:
+            dict: Contadores de aciertos, fallos, expirados, desalojos e invalidaciones,
+                  más el número de entradas y la tasa de aciertos.
+        """
+        with self._candado:
+            estadisticas = dict(self._estadisticas)
+            estadisticas['entradas'] = len(self._entradas)
+        consultas = estadisticas['aciertos'] + estadisticas['fallos']
+        estadisticas['tasa_aciertos'] = estadisticas['aciertos'] / consultas if consultas else 0.0
+        return estadisticas
+
+
+# Caché compartida por los módulos CRUD
+cache_catalogo = CacheTTL(capacidad=CACHE_CAPACIDAD, ttl=CACHE_TTL)
+
+
+def invalidar_habitaciones():
+    """Invalida todo lo cacheado sobre habitaciones (llamar tras cada escritura)."""
+    cache_catalogo.invalidar('habitaciones')
+    # Los calendarios de ocupación tienen un bit por habitación existente
+    cache_catalogo.invalidar('ocupacion')
+    # Las tablas de tarifas tienen una fila por habitación y por servicio
+    cache_catalogo.invalidar('tarifas')
+
+
+def invalidar_servicios():
+    """Invalida todo lo cacheado sobre servicios (llamar tras cada escritura)."""
+    cache_catalogo.invalidar('servicios')
+    cache_catalogo.invalidar('tarifas')
+
+
+def estadisticas_cache():
+    """Devuelve los contadores de la caché de catálogos."""
+    return cache_catalogo.estadisticas()
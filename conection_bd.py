@@ -1,21 +1,741 @@
-import pyodbc
+import asyncio
+import contextvars
+import functools
+import logging
 import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from backends_bd import crear_backend, pyodbc
+from cache_bd import estadisticas_cache, sin_cache
+from metricas_bd import metricas, ConexionInstrumentada, METRICAS_ACTIVAS
+from resiliencia_bd import Interruptor, CircuitoAbierto, reintentar
+
+registro = logging.getLogger(__name__)
+
+# Parámetros de conexión (se pueden ajustar con variables de entorno)
+#   HOTEL_BD_BACKEND: 'sqlserver' (por defecto) o 'sqlite'
+#   HOTEL_BD_SERVIDOR, HOTEL_BD_NOMBRE, HOTEL_BD_DRIVER, HOTEL_BD_CADENA: backend sqlserver
+#   HOTEL_BD_TIMEOUT_CONEXION, HOTEL_BD_TIMEOUT_CONSULTA: segundos (backend sqlserver)
+#   HOTEL_BD_SQLITE_RUTA: archivo de SQLite o ':memory:' (por defecto)
+# Los reintentos y el interruptor se ajustan con las variables HOTEL_BD_* de resiliencia_bd.
+
+BD_BACKEND = os.environ.get("HOTEL_BD_BACKEND", "sqlserver")
+
+# Parámetros del pool
+POOL_MINIMO = int(os.environ.get("HOTEL_POOL_MINIMO", "1"))
+POOL_MAXIMO = int(os.environ.get("HOTEL_POOL_MAXIMO", "10"))
+POOL_TIEMPO_INACTIVO = float(os.environ.get("HOTEL_POOL_TIEMPO_INACTIVO", "300"))
+POOL_TIEMPO_ESPERA = float(os.environ.get("HOTEL_POOL_TIEMPO_ESPERA", "30"))
+POOL_INTERVALO_VALIDACION = float(os.environ.get("HOTEL_POOL_INTERVALO_VALIDACION", "30"))
+
+# Hilos del ejecutor de la API asíncrona; por defecto uno por conexión del pool, de modo
+# que ninguna llamada asíncrona ocupa un hilo esperando una conexión libre
+ASYNC_HILOS = int(os.environ.get("HOTEL_ASYNC_HILOS", str(POOL_MAXIMO)))
+
+
+class ErrorConexion(Exception):
+    """Error al obtener una conexión del pool (pool cerrado o tiempo de espera agotado)."""
+
+
+# Errores que las funciones *_bd tratan como fallos de base de datos, sea cual sea el backend
+ERRORES_BD = ((pyodbc.Error,) if pyodbc else ()) + (sqlite3.Error, ErrorConexion, CircuitoAbierto)
+ERRORES_INTEGRIDAD = ((pyodbc.IntegrityError,) if pyodbc else ()) + (sqlite3.IntegrityError,)
+
+
+def _opciones_entorno(nombre):
+    """Opciones del backend `nombre` tomadas de las variables de entorno."""
+    if nombre == 'sqlite':
+        return {'ruta': os.environ.get("HOTEL_BD_SQLITE_RUTA", ":memory:")}
+    claves = {
+        'servidor': "HOTEL_BD_SERVIDOR",
+        'base_datos': "HOTEL_BD_NOMBRE",
+        'driver': "HOTEL_BD_DRIVER",
+        'cadena': "HOTEL_BD_CADENA",
+    }
+    opciones = {opcion: os.environ[variable] for opcion, variable in claves.items() if variable in os.environ}
+    for opcion, variable in (('tiempo_conexion', "HOTEL_BD_TIMEOUT_CONEXION"),
+                             ('tiempo_consulta', "HOTEL_BD_TIMEOUT_CONSULTA")):
+        if variable in os.environ:
+            opciones[opcion] = float(os.environ[variable])
+    return opciones
+
+
+_backend = None
+_candado_backend = threading.RLock()
+
+
+def obtener_backend():
+    """Devuelve el backend configurado, creándolo la primera vez a partir del entorno."""
+    global _backend
+    if _backend is None:
+        with _candado_backend:
+            if _backend is None:
+                _backend = crear_backend(BD_BACKEND, **_opciones_entorno(BD_BACKEND.lower()))
+    return _backend
+
+
+def configurar_bd(backend, **opciones):
+    """
+    Selecciona el backend de base de datos y reinicia el pool global.
+    Args:
+        backend (str | BackendBD): Nombre del backend ('sqlserver' o 'sqlite') o una instancia ya creada.
+        **opciones: Parámetros del backend (p. ej. ruta=':memory:' para sqlite).
+    Returns:
+        BackendBD: El backend activo.
+    """
+    global _backend
+    nuevo = crear_backend(backend, **opciones) if isinstance(backend, str) else backend
+    with _candado_backend:
+        cerrar_pool()
+        anterior, _backend = _backend, nuevo
+    if anterior is not None and anterior is not nuevo:
+        anterior.cerrar()
+    interruptor_bd.reiniciar()
+    return nuevo
+
+
+# Interruptor compartido por todas las aperturas de conexión
+interruptor_bd = Interruptor()
+
+
+def es_transitorio(error):
+    """Indica si `error` es un fallo pasajero del backend activo que se puede reintentar."""
+    return obtener_backend().es_transitorio(error)
+
+
+def _abrir_conexion(operacion):
+    # Reintenta los fallos transitorios y falla enseguida si el interruptor está abierto
+    backend = obtener_backend()
+    inicio = time.perf_counter()
+    try:
+        conexion = reintentar(backend.conectar, backend.es_transitorio, interruptor=interruptor_bd)
+    except Exception:
+        metricas.contar('fallos_conexion', operacion)
+        raise
+    metricas.observar('conectar', operacion, time.perf_counter() - inicio)
+    return conexion
 
-# Parámetros de conexión
 
 def conectar_bd():
+    """
+    Abre una conexión fuera del pool.
+    Returns:
+        Conexión abierta, o None si no se pudo conectar (el error queda en el log).
+    """
     try:
-        con_str_param = (
-            "DRIVER={ODBC Driver 17 for SQL Server};"
-            "SERVER=GONVILLA\\OSCAR1;"
-            "DATABASE=hotel_reservaciones;"
-            "Trusted_Connection=yes;"
-        )
-        
-        conexion = pyodbc.connect(con_str_param) 
-        print("\nConexión a la base de datos establecida con éxito.") # Confirmación visual
+        conexion = _abrir_conexion('conectar_bd')
+    except ERRORES_BD as e:
+        registro.error("Error al conectar a la base de datos: %s", e)
+        return None
+    registro.info("Conexión a la base de datos establecida con éxito.")
+    if METRICAS_ACTIVAS:
+        return ConexionInstrumentada(conexion, 'conectar_bd')
+    return conexion
+
+
+def _crear_conexion():
+    return _abrir_conexion('pool')
+
+
+def _validar_conexion(conexion):
+    cursor = conexion.cursor()
+    try:
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+    finally:
+        cursor.close()
+
+
+class PoolConexiones:
+    """
+    Pool de conexiones reutilizables y seguro entre hilos.
+
+    Mantiene entre `minimo` y `maximo` conexiones abiertas. Las conexiones que llevan
+    más de `tiempo_inactivo` segundos sin usarse se cierran (respetando el mínimo) y las
+    que llevan más de `intervalo_validacion` segundos se comprueban con un SELECT 1
+    antes de entregarse.
+    Args:
+        fabrica (callable): Función que abre una conexión nueva.
+        minimo (int): Conexiones que se mantienen abiertas aunque estén inactivas.
+        maximo (int): Número máximo de conexiones abiertas a la vez.
+        tiempo_inactivo (float): Segundos tras los cuales se cierra una conexión inactiva.
+        tiempo_espera (float): Segundos que se espera una conexión libre antes de fallar.
+        intervalo_validacion (float): Segundos de inactividad a partir de los cuales se valida
+            la conexión al entregarla (0 = validar siempre).
+        validador (callable): Función que lanza una excepción si la conexión no sirve.
+    """
+
+    def __init__(self, fabrica, minimo=1, maximo=10, tiempo_inactivo=300.0,
+                 tiempo_espera=30.0, intervalo_validacion=30.0, validador=_validar_conexion):
+        if minimo < 0 or maximo < 1 or minimo > maximo:
+            raise ValueError("Tamaño de pool inválido: se requiere 0 <= minimo <= maximo y maximo >= 1.")
+        self.fabrica = fabrica
+        self.minimo = minimo
+        self.maximo = maximo
+        self.tiempo_inactivo = tiempo_inactivo
+        self.tiempo_espera = tiempo_espera
+        self.intervalo_validacion = intervalo_validacion
+        self.validador = validador
+
+        self._condicion = threading.Condition(threading.Lock())
+        self._libres = []  # Pila de (conexion, instante_devolucion); la última es la más reciente
+        self._total = 0    # Conexiones abiertas (libres + en uso)
+        self._cerrado = False
+        self._estadisticas = {
+            'obtenidas': 0,
+            'devueltas': 0,
+            'esperas': 0,
+            'tiempos_agotados': 0,
+            'creadas': 0,
+            'cerradas': 0,
+            'fallos_validacion': 0,
+        }
+
+    # ---------- API pública ----------
+
+    def obtener(self):
+        """
+        Entrega una conexión del pool, creando una nueva si hace falta y hay espacio.
+        Returns:
+            Conexión abierta y validada.
+        Raises:
+            ErrorConexion: Si el pool está cerrado o se agota el tiempo de espera.
+        """
+        limite = time.monotonic() + self.tiempo_espera
+        with self._condicion:
+            self._estadisticas['obtenidas'] += 1
+            esperado = False
+            while True:
+                if self._cerrado:
+                    raise ErrorConexion("El pool de conexiones está cerrado.")
+                self._descartar_inactivas()
+                if self._libres:
+                    conexion, devuelta = self._libres.pop()
+                    break
+                if self._total < self.maximo:
+                    self._total += 1
+                    conexion, devuelta = None, None
+                    break
+                if not esperado:
+                    self._estadisticas['esperas'] += 1
+                    esperado = True
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    self._estadisticas['tiempos_agotados'] += 1
+                    raise ErrorConexion(
+                        f"No hay conexiones libres tras esperar {self.tiempo_espera} segundos.")
+                self._condicion.wait(restante)
+
+        # La creación y la validación se hacen fuera del candado para no bloquear a otros hilos
+        if conexion is None:
+            return self._abrir()
+        if time.monotonic() - devuelta >= self.intervalo_validacion:
+            try:
+                self.validador(conexion)
+            except Exception:
+                with self._condicion:
+                    self._estadisticas['fallos_validacion'] += 1
+                self._cerrar_conexion(conexion)
+                return self._abrir()
+        return conexion
+
+    def devolver(self, conexion, descartar=False):
+        """
+        Devuelve una conexión al pool.
+        Args:
+            conexion: Conexión obtenida con obtener().
+            descartar (bool): Si es True la conexión se cierra en lugar de reutilizarse.
+        """
+        if not descartar:
+            try:
+                # Deja la conexión sin transacciones abiertas antes de reutilizarla
+                conexion.rollback()
+            except Exception:
+                descartar = True
+        with self._condicion:
+            self._estadisticas['devueltas'] += 1
+            if not descartar and not self._cerrado:
+                self._libres.append((conexion, time.monotonic()))
+                self._condicion.notify()
+                return
+        self._cerrar_conexion(conexion)
+
+    @contextmanager
+    def conexion(self):
+        """
+        Context manager que presta una conexión y la devuelve al salir del bloque.
+        Lo que no se haya confirmado con commit() se revierte al devolverla.
+        """
+        conexion = self.obtener()
+        try:
+            yield conexion
+        finally:
+            self.devolver(conexion)
+
+    def precalentar(self, cantidad=None, cancelado=None):
+        """
+        Abre conexiones hasta tener `cantidad` abiertas (sin pasar de `maximo`) y las deja
+        libres, para que las primeras consultas no esperen a conectarse.
+        Args:
+            cantidad (int): Conexiones abiertas que se quieren tener; por defecto `minimo`.
+            cancelado (threading.Event): Si se activa, no se abren más conexiones.
+        Returns:
+            int: Conexiones abiertas por esta llamada.
+        Raises:
+            Los errores de la fábrica de conexiones (las ya abiertas se conservan).
+        """
+        objetivo = min(self.minimo if cantidad is None else cantidad, self.maximo)
+        abiertas = 0
+        while cancelado is None or not cancelado.is_set():
+            with self._condicion:
+                if self._cerrado or self._total >= objetivo:
+                    break
+                self._total += 1
+            conexion = self._abrir()
+            abiertas += 1
+            self.devolver(conexion)
+        return abiertas
+
+    def estadisticas(self):
+        """
+        Returns:
+            dict: Contadores del pool (obtenidas, esperas, creadas, cerradas...) y su estado actual.
+        """
+        with self._condicion:
+            estadisticas = dict(self._estadisticas)
+            estadisticas['abiertas'] = self._total
+            estadisticas['libres'] = len(self._libres)
+            estadisticas['en_uso'] = self._total - len(self._libres)
+            estadisticas['minimo'] = self.minimo
+            estadisticas['maximo'] = self.maximo
+        return estadisticas
+
+    def cerrar(self):
+        """Cierra todas las conexiones libres; las que estén en uso se cierran al devolverse."""
+        with self._condicion:
+            self._cerrado = True
+            libres = [conexion for conexion, _ in self._libres]
+            self._libres = []
+            self._condicion.notify_all()
+        for conexion in libres:
+            self._cerrar_conexion(conexion)
+
+    # ---------- Internos ----------
+
+    def _abrir(self):
+        try:
+            conexion = self.fabrica()
+        except BaseException:
+            with self._condicion:
+                self._total -= 1
+                self._condicion.notify()
+            raise
+        with self._condicion:
+            self._estadisticas['creadas'] += 1
         return conexion
+
+    def _cerrar_conexion(self, conexion):
+        try:
+            conexion.close()
+        except Exception:
+            pass
+        with self._condicion:
+            self._total -= 1
+            self._estadisticas['cerradas'] += 1
+            self._condicion.notify()
+
+    def _descartar_inactivas(self):
+        # Se llama con el candado tomado. Las más antiguas están al principio de la lista.
+        if not self._libres:
+            return
+        ahora = time.monotonic()
+        caducadas = []
+        while (self._libres and self._total - len(caducadas) > self.minimo
+               and ahora - self._libres[0][1] >= self.tiempo_inactivo):
+            caducadas.append(self._libres.pop(0)[0])
+        for conexion in caducadas:
+            try:
+                conexion.close()
+            except Exception:
+                pass
+            self._total -= 1
+            self._estadisticas['cerradas'] += 1
+
+
+_pool = None
+_candado_pool = threading.Lock()
+
+
+def obtener_pool():
+    """Devuelve el pool global de la aplicación, creándolo la primera vez."""
+    global _pool
+    if _pool is None:
+        with _candado_pool:
+            if _pool is None:
+                _pool = PoolConexiones(
+                    _crear_conexion,
+                    minimo=POOL_MINIMO,
+                    maximo=POOL_MAXIMO,
+                    tiempo_inactivo=POOL_TIEMPO_INACTIVO,
+                    tiempo_espera=POOL_TIEMPO_ESPERA,
+                    intervalo_validacion=POOL_INTERVALO_VALIDACION,
+                )
+    return _pool
+
+
+def precalentar_pool(cantidad=None, cancelado=None):
+    """
+    Abre por adelantado conexiones del pool global (ver PoolConexiones.precalentar).
+    Returns:
+        int: Conexiones abiertas, 0 si no se pudo conectar (el error queda en el log).
+    """
+    inicio = time.perf_counter()
+    try:
+        abiertas = obtener_pool().precalentar(cantidad, cancelado)
+    except ERRORES_BD as e:
+        registro.warning("No se pudieron abrir conexiones por adelantado: %s", e)
+        return 0
+    if abiertas:
+        registro.info("Pool precalentado: %d conexiones en %.2f s.", abiertas, time.perf_counter() - inicio)
+    return abiertas
+
+
+def cerrar_pool():
+    """Cierra el pool global y el ejecutor asíncrono (por ejemplo al salir de la aplicación)."""
+    global _pool
+    cerrar_ejecutor()
+    with _candado_pool:
+        if _pool is not None:
+            _pool.cerrar()
+            _pool = None
+
+
+@contextmanager
+def conexion_bd(operacion='sin_nombre'):
+    """
+    Context manager que presta una conexión del pool global.
+    Args:
+        operacion (str): Nombre con el que se registran las métricas de las consultas
+            hechas con esta conexión (normalmente el de la función que la pide).
+    Uso:
+        with conexion_bd('obtener_todas_habitaciones') as conexion:
+            cursor = conexion.cursor()
+            ...
+    Dentro de un bloque transaccion() presta la conexión de la transacción: commit() y
+    rollback() no tienen efecto y todo se confirma o revierte al final del bloque.
+    """
+    actual = _transaccion_actual.get()
+    if actual is not None:
+        with actual.participar(operacion) as prestada:
+            yield prestada
+        return
+    # Con la base caída no se entregan conexiones del pool que fallarían al usarse
+    interruptor_bd.comprobar()
+    pool = obtener_pool()
+    inicio = time.perf_counter()
+    conexion = pool.obtener()
+    if METRICAS_ACTIVAS:
+        metricas.observar('conexion', operacion, time.perf_counter() - inicio)
+        prestada = ConexionInstrumentada(conexion, operacion)
+    else:
+        prestada = conexion
+    descartar = False
+    try:
+        yield prestada
     except Exception as e:
-        print(f"\nError al conectar a la base de datos: {e}")
-        input("Presione Enter para continuar...")
-        return None
\ No newline at end of file
+        # Tras un error de red o de tiempo agotado la conexión no se reutiliza
+        descartar = es_transitorio(e)
+        raise
+    finally:
+        if prestada is not conexion:
+            prestada.finalizar()
+        pool.devolver(conexion, descartar=descartar)
+
+
+# ========== Transacciones (unidad de trabajo) ==========
+#
+# transaccion() abre una transacción y la deja activa en el contexto (contextvars): las
+# funciones *_bd llamadas dentro del bloque usan su conexión a través de conexion_bd(), de
+# modo que varias operaciones comparten una conexión y un único commit, y o se aplican
+# todas o ninguna. Un transaccion() anidado crea un punto de guardado que, si falla, solo
+# deshace lo hecho dentro de él.
+#
+# Las funciones *_bd capturan sus errores y devuelven False/None; para que la transacción
+# no confirme un trabajo a medias, cualquier excepción dentro de un conexion_bd() la marca
+# como fallida y al cerrarse se revierte con ErrorTransaccion. Si una función devuelve un
+# resultado que el llamador considera un fallo, basta con lanzar una excepción en el bloque.
+#
+# Las invalidaciones de caché se registran con al_confirmar() y se ejecutan tras el commit,
+# para que ningún otro hilo vuelva a cargar en la caché datos aún sin confirmar. Por lo
+# mismo, dentro de la transacción las lecturas se saltan la caché (cache_bd.sin_cache):
+# leen con su conexión, así que ven lo escrito en ella, y su resultado no se guarda, porque
+# si la transacción se revierte las invalidaciones de al_confirmar() no llegan a ejecutarse.
+# Las estructuras compartidas que se alimentan del catálogo (réplica, índice de texto)
+# tampoco se actualizan desde una transacción: ver en_transaccion().
+#
+# Las llamadas asíncronas (ejecutar_async) copian el contexto y participan en la misma
+# transacción; sus operaciones se ejecutan de una en una sobre la conexión compartida.
+
+_transaccion_actual = contextvars.ContextVar('hotel_transaccion_bd', default=None)
+
+
+class ErrorTransaccion(Exception):
+    """Una operación de la transacción (o del punto de guardado) falló y se ha revertido."""
+
+
+class _ConexionTransaccion:
+    """Conexión prestada a una operación dentro de una transacción: commit/rollback los hace la transacción."""
+
+    __slots__ = ('_conexion',)
+
+    def __init__(self, conexion):
+        self._conexion = conexion
+
+    def __getattr__(self, nombre):
+        return getattr(self._conexion, nombre)
+
+    def cursor(self):
+        return self._conexion.cursor()
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        # Las funciones *_bd solo revierten escrituras que no afectaron filas; el fallo
+        # real llega como excepción y marca la transacción
+        pass
+
+    def close(self):
+        pass
+
+
+class Transaccion:
+    """
+    Transacción activa creada por transaccion(). No se instancia directamente.
+    """
+
+    def __init__(self, conexion, operacion, backend):
+        self.operacion = operacion
+        self._conexion = conexion
+        self._backend = backend
+        self._candado = threading.RLock()
+        self._fallos = [False]   # Un indicador por nivel: transacción y puntos de guardado abiertos
+        self._pendientes = []    # Funciones a ejecutar tras el commit
+        self._puntos = 0
+
+    @property
+    def fallida(self):
+        return self._fallos[0]
+
+    def al_confirmar(self, funcion):
+        """Ejecuta `funcion()` después del commit (no se ejecuta si la transacción se revierte)."""
+        if funcion not in self._pendientes:
+            self._pendientes.append(funcion)
+
+    @contextmanager
+    def participar(self, operacion):
+        with self._candado:
+            if METRICAS_ACTIVAS:
+                conexion = ConexionInstrumentada(self._conexion, operacion)
+            else:
+                conexion = self._conexion
+            try:
+                yield _ConexionTransaccion(conexion)
+            except Exception:
+                self._fallos[-1] = True
+                raise
+            finally:
+                if conexion is not self._conexion:
+                    conexion.finalizar()
+
+    @contextmanager
+    def punto_guardado(self):
+        """
+        Bloque que se puede deshacer sin abortar la transacción. Si dentro falla algo, se
+        revierte hasta el punto de guardado y se lanza la excepción (ErrorTransaccion si
+        el fallo lo había capturado una función *_bd).
+        """
+        with self._candado:
+            self._puntos += 1
+            nombre = f"punto_{self._puntos}"
+            cursor = self._conexion.cursor()
+            self._backend.crear_punto_guardado(cursor, nombre)
+            self._fallos.append(False)
+            pendientes = len(self._pendientes)
+        try:
+            yield self
+            if self._fallos[-1]:
+                raise ErrorTransaccion(f"Falló una operación dentro del punto de guardado {nombre}.")
+        except BaseException:
+            with self._candado:
+                try:
+                    self._backend.revertir_punto_guardado(cursor, nombre)
+                except Exception:
+                    self._fallos[0] = True  # No se pudo volver atrás: solo queda revertirlo todo
+                    raise
+                finally:
+                    del self._pendientes[pendientes:]
+            raise
+        else:
+            with self._candado:
+                self._backend.liberar_punto_guardado(cursor, nombre)
+        finally:
+            self._fallos.pop()
+            cursor.close()
+
+    def _ejecutar_pendientes(self):
+        for funcion in self._pendientes:
+            try:
+                funcion()
+            except Exception as e:
+                registro.error("Error tras confirmar la transacción %s: %s", self.operacion, e)
+
+
+@contextmanager
+def transaccion(operacion='transaccion'):
+    """
+    Context manager que agrupa varias operaciones en una transacción con un solo commit.
+    Anidado dentro de otra transacción crea un punto de guardado.
+    Args:
+        operacion (str): Nombre para las métricas del commit.
+    Uso:
+        with transaccion('alta_habitacion_con_servicios'):
+            if not agregar_habitacion_bd(habitacion):
+                raise ValueError("No se pudo agregar la habitación")
+            ...
+    Raises:
+        ErrorTransaccion: Si una operación falló y por eso se revirtió todo.
+    """
+    actual = _transaccion_actual.get()
+    if actual is not None:
+        with actual.punto_guardado() as transaccion_actual:
+            yield transaccion_actual
+        return
+
+    interruptor_bd.comprobar()
+    pool = obtener_pool()
+    inicio = time.perf_counter()
+    conexion = pool.obtener()
+    if METRICAS_ACTIVAS:
+        metricas.observar('conexion', operacion, time.perf_counter() - inicio)
+    actual = Transaccion(conexion, operacion, obtener_backend())
+    testigo = _transaccion_actual.set(actual)
+    descartar = False
+    try:
+        with sin_cache():
+            yield actual
+        if actual.fallida:
+            raise ErrorTransaccion(f"Falló una operación de la transacción {operacion}; se ha revertido.")
+        inicio = time.perf_counter()
+        conexion.commit()
+        if METRICAS_ACTIVAS:
+            metricas.observar('commit', operacion, time.perf_counter() - inicio)
+    except BaseException as e:
+        descartar = isinstance(e, Exception) and es_transitorio(e)
+        try:
+            conexion.rollback()
+        except Exception:
+            descartar = True
+        raise
+    finally:
+        _transaccion_actual.reset(testigo)
+        pool.devolver(conexion, descartar=descartar)
+    actual._ejecutar_pendientes()
+
+
+def en_transaccion():
+    """Indica si hay una transacción activa en el contexto actual (ver transaccion())."""
+    return _transaccion_actual.get() is not None
+
+
+def al_confirmar(funcion):
+    """
+    Ejecuta `funcion()` tras el commit de la transacción activa, o enseguida si no hay
+    ninguna. Se usa para invalidar cachés después de escribir.
+    """
+    actual = _transaccion_actual.get()
+    if actual is None:
+        funcion()
+    else:
+        actual.al_confirmar(funcion)
+
+
+def estadisticas_pool():
+    """Devuelve las estadísticas del pool global."""
+    return obtener_pool().estadisticas()
+
+
+def estadisticas_interruptor():
+    """Devuelve el estado del interruptor de la base de datos."""
+    return interruptor_bd.estadisticas()
+
+
+def exportar_metricas():
+    """
+    Devuelve las métricas de consultas, del pool y de la caché de catálogos en el formato
+    de texto de Prometheus.
+    """
+    lineas = [metricas.texto_prometheus().rstrip("\n")]
+    for nombre, valor in estadisticas_pool().items():
+        lineas.append(f"# TYPE hotel_pool_{nombre} gauge")
+        lineas.append(f"hotel_pool_{nombre} {valor}")
+    for nombre, valor in estadisticas_interruptor().items():
+        if nombre == 'estado':
+            nombre, valor = 'abierto', int(valor != 'cerrado')
+        lineas.append(f"# TYPE hotel_interruptor_{nombre} gauge")
+        lineas.append(f"hotel_interruptor_{nombre} {valor}")
+    for nombre, valor in estadisticas_cache().items():
+        lineas.append(f"# TYPE hotel_cache_{nombre} gauge")
+        lineas.append(f"hotel_cache_{nombre} {valor}")
+    return "\n".join(lineas) + "\n"
+
+
+# ========== Ejecución asíncrona ==========
+#
+# Los drivers (pyodbc, sqlite3) son bloqueantes, así que la API asíncrona de los módulos
+# CRUD ejecuta las funciones *_bd en un ejecutor de hilos acotado. El bucle de eventos
+# nunca se bloquea y las llamadas que superan ASYNC_HILOS esperan en la cola del
+# ejecutor sin consumir hilos ni conexiones.
+
+_ejecutor = None
+_candado_ejecutor = threading.Lock()
+
+
+def obtener_ejecutor():
+    """Devuelve el ejecutor de hilos de la API asíncrona, creándolo la primera vez."""
+    global _ejecutor
+    if _ejecutor is None:
+        with _candado_ejecutor:
+            if _ejecutor is None:
+                _ejecutor = ThreadPoolExecutor(max_workers=max(ASYNC_HILOS, 1),
+                                               thread_name_prefix="hotel-bd")
+    return _ejecutor
+
+
+def cerrar_ejecutor():
+    """Cierra el ejecutor asíncrono esperando a que terminen las llamadas en curso."""
+    global _ejecutor
+    with _candado_ejecutor:
+        ejecutor, _ejecutor = _ejecutor, None
+    if ejecutor is not None:
+        ejecutor.shutdown(wait=True)
+
+
+async def ejecutar_async(funcion, *args, **kwargs):
+    """
+    Ejecuta una función bloqueante de acceso a datos en el ejecutor y espera su resultado
+    sin bloquear el bucle de eventos. Las variables de contexto del llamador se propagan.
+    Args:
+        funcion (callable): Función síncrona (normalmente una función *_bd).
+        *args, **kwargs: Argumentos de la función.
+    Returns:
+        Lo que devuelva `funcion`.
+    """
+    bucle = asyncio.get_running_loop()
+    contexto = contextvars.copy_context()
+    return await bucle.run_in_executor(
+        obtener_ejecutor(), functools.partial(contexto.run, funcion, *args, **kwargs))
@@ -0,0 +1,490 @@
+import argparse
+import json
+import logging
+import math
+import os
+import sys
+from datetime import date, timedelta
+
+try:
+    import numpy as np
+except ImportError:  # sin numpy las cotizaciones en lote se calculan una a una
+    np = None
+
+from cache_bd import cache_catalogo
+from disponibilidad import a_fecha, VENTANA_CALENDARIO
+from precios import aplicar_reglas, coincide, vigente
+import precios
+import CRUD_habitaciones
+import CRUD_servicios
+
+registro = logging.getLogger(__name__)
+
+# ========== Cotizaciones de estancias ==========
+#
+# Una cotización es el importe de una estancia: las noches [desde, hasta) de una habitación
+# más los servicios contratados, con los descuentos por duración y el impuesto. Se calcula
+# sobre una tabla de tarifas precalculada y cacheada (TablaTarifas), sin consultar la BD:
+#
+#   - Las habitaciones que cumplen las mismas reglas de temporada forman un grupo. Para
+#     cada grupo, cada noche de la ventana tiene una "variante": la combinación de reglas
+#     vigentes esa noche (ninguna, solo la de temporada alta...). La tabla guarda el precio
+#     de cada habitación en cada variante de su grupo, con el mismo redondeo por regla que
+#     precio_en_fecha(), y por grupo el número acumulado de noches de cada variante. El
+#     importe de una estancia es la suma, por variante, de precio * noches, sin recorrer
+#     las noches. Con pocas reglas hay pocos grupos y variantes, y la tabla ocupa poco
+#     aunque haya muchas habitaciones. Lo mismo para los servicios.
+#   - cotizar_lote() calcula miles de cotizaciones (los resultados de búsqueda de la web)
+#     en una pasada con arrays de NumPy; sin NumPy, o para estancias fuera de la ventana,
+#     se calcula cada cotización por separado con los mismos precios por noche.
+#
+# Un servicio se cotiza por unidades al precio de la noche de llegada, o con la cantidad
+# POR_NOCHE (p. ej. el desayuno) una unidad por noche, cada una al precio de su noche.
+
+VENTANA_TARIFAS = int(os.environ.get("HOTEL_VENTANA_TARIFAS", str(VENTANA_CALENDARIO)))
+TASA_IMPUESTO = float(os.environ.get("HOTEL_TASA_IMPUESTO", "0.16"))
+# Descuento por duración de la estancia: "noches_minimas:porcentaje,..."
+DESCUENTOS_ESTANCIA = os.environ.get("HOTEL_DESCUENTOS_ESTANCIA", "7:5,28:10")
+
+POR_NOCHE = 'noche'
+
+
+def _leer_descuentos(texto):
+    tramos = []
+    for tramo in texto.split(','):
+        if tramo.strip():
+            noches, porcentaje = tramo.split(':')
+            tramos.append((int(noches), float(porcentaje)))
+    return sorted(tramos)
+
+
+TRAMOS_ESTANCIA = _leer_descuentos(DESCUENTOS_ESTANCIA)
+
+
+def _centimos(importe):
+    # Mitades hacia arriba, como precios.redondear(); los importes nunca son negativos
+    return math.floor(importe * 100 + 0.5) / 100
+
+
+def descuento_estancia(noches, tramos=None):
+    """Porcentaje de descuento por duración para una estancia de `noches` noches."""
+    porcentaje = 0.0
+    for minimo, valor in TRAMOS_ESTANCIA if tramos is None else tramos:
+        if noches >= minimo:
+            porcentaje = valor
+    return porcentaje
+
+
+def _desglose(habitacion, servicios, estancia, descuento, tasa):
+    """Importes redondeados de una cotización a partir de los importes brutos."""
+    habitacion, servicios = _centimos(habitacion), _centimos(servicios)
+    # El descuento por duración se aplica a la habitación; el descuento de la cotización
+    # (código promocional...), después, a todo lo demás
+    rebaja = habitacion * estancia / 100
+    rebaja = _centimos(rebaja + (habitacion - rebaja + servicios) * descuento / 100)
+    base = habitacion + servicios - rebaja
+    impuestos = _centimos(base * tasa)
+    return habitacion, servicios, rebaja, impuestos, _centimos(base + impuestos)
+
+
+class _Solicitud:
+    __slots__ = ('habitacion_id', 'desde', 'hasta', 'fila', 'inicio', 'noches', 'servicios', 'descuento')
+
+
+class TablaTarifas:
+    """
+    Precios por noche de todas las habitaciones y servicios entre `fecha_inicio` y
+    `fecha_inicio + dias`, con las reglas de temporada aplicadas.
+    Args:
+        habitaciones (list): Habitaciones del catálogo.
+        servicios (list): Servicios del catálogo.
+        reglas (list): Reglas de temporada (ReglaPrecio) en orden de aplicación.
+        fecha_inicio (date): Primera noche de la tabla.
+        dias (int): Número de noches que cubre.
+        tasa_impuesto (float): Impuesto sobre la base (0.16 = 16 %).
+        tramos_estancia (list): Tuplas (noches_minimas, porcentaje) del descuento por duración.
+    """
+
+    def __init__(self, habitaciones, servicios, reglas, fecha_inicio, dias, tasa_impuesto=TASA_IMPUESTO,
+                 tramos_estancia=None):
+        self.fecha_inicio = a_fecha(fecha_inicio)
+        self.dias = dias
+        self.tasa_impuesto = tasa_impuesto
+        self.tramos_estancia = TRAMOS_ESTANCIA if tramos_estancia is None else sorted(tramos_estancia)
+        self._ambitos = {}
+        for ambito, elementos in (('habitaciones', habitaciones), ('servicios', servicios)):
+            self._ambitos[ambito] = self._preparar(
+                elementos, [regla for regla in reglas if regla.ambito == ambito])
+
+    @property
+    def fecha_fin(self):
+        return self.fecha_inicio + timedelta(days=self.dias)
+
+    def _preparar(self, elementos, reglas):
+        posicion, grupos, firmas = {}, [], {}
+        for elemento in elementos:
+            firma = tuple(numero for numero, regla in enumerate(reglas) if coincide(regla, elemento))
+            posicion[elemento['id']] = len(grupos)
+            grupos.append(firmas.setdefault(firma, len(firmas)))
+        fechas = [self.fecha_inicio + timedelta(days=dia) for dia in range(self.dias)]
+        variantes, variante_dia, conteos = [], [], []
+        for firma in firmas:
+            locales, dias = {}, []
+            for fecha in fechas:
+                vigentes = tuple(numero for numero in firma if vigente(reglas[numero], fecha))
+                dias.append(locales.setdefault(vigentes, len(locales)))
+            conteo = [[0] * (self.dias + 1) for _ in locales]
+            for dia, variante in enumerate(dias):
+                for numero, acumulado in enumerate(conteo):
+                    acumulado[dia + 1] = acumulado[dia] + (numero == variante)
+            variantes.append(list(locales))
+            variante_dia.append(dias)
+            conteos.append(conteo)
+        # Precio de cada elemento en cada variante de su grupo; los elementos con el mismo
+        # precio base y grupo comparten la lista
+        precios = [elemento['precio'] for elemento in elementos]
+        tarifas, calculadas = [], {}
+        for precio, grupo in zip(precios, grupos):
+            lista = calculadas.get((precio, grupo))
+            if lista is None:
+                lista = calculadas[(precio, grupo)] = [
+                    float(aplicar_reglas(precio, [reglas[numero] for numero in variante]))
+                    for variante in variantes[grupo]]
+            tarifas.append(lista)
+        ambito = {
+            'posicion': posicion,
+            'precios': precios,
+            'grupos': grupos,
+            'reglas': reglas,
+            'firmas': list(firmas),
+            'variante_dia': variante_dia,
+            'conteos': conteos,
+            'tarifas': tarifas,
+        }
+        if np is not None:
+            maximo = max((len(lista) for lista in variantes), default=1)
+            tarifas_array = np.zeros((len(tarifas), maximo))
+            conteos_array = np.zeros((len(conteos), maximo, self.dias + 1), dtype=np.int32)
+            for fila, lista in enumerate(tarifas):
+                tarifas_array[fila, :len(lista)] = lista
+            for grupo, conteo in enumerate(conteos):
+                conteos_array[grupo, :len(conteo)] = conteo
+            ambito['arrays'] = (np.array(grupos, dtype=np.intp), tarifas_array, conteos_array,
+                                np.array(variante_dia, dtype=np.intp).reshape(len(conteos), self.dias))
+        return ambito
+
+    def _importe(self, ambito, fila, inicio, noches, cantidad=POR_NOCHE):
+        """
+        Importe de un elemento durante `noches` noches desde el día `inicio` de la tabla
+        (POR_NOCHE), o de `cantidad` unidades al precio de la noche `inicio`.
+        """
+        datos = self._ambitos[ambito]
+        grupo = datos['grupos'][fila]
+        tarifas = datos['tarifas'][fila]
+        if 0 <= inicio and inicio + noches <= self.dias:
+            if cantidad != POR_NOCHE:
+                return tarifas[datos['variante_dia'][grupo][inicio]] * cantidad
+            fin = inicio + noches
+            return sum(tarifa * (conteo[fin] - conteo[inicio])
+                       for tarifa, conteo in zip(tarifas, datos['conteos'][grupo]))
+        # Fuera de la ventana: las reglas del grupo se evalúan noche a noche
+        importe = 0.0
+        for dia in range(inicio, inicio + noches if cantidad == POR_NOCHE else inicio + 1):
+            fecha = self.fecha_inicio + timedelta(days=dia)
+            vigentes = [datos['reglas'][numero] for numero in datos['firmas'][grupo]
+                        if vigente(datos['reglas'][numero], fecha)]
+            importe += float(aplicar_reglas(datos['precios'][fila], vigentes))
+        return importe if cantidad == POR_NOCHE else importe * cantidad
+
+    # ---------- Validación de las solicitudes ----------
+
+    def _solicitud(self, datos, fechas):
+        """Convierte una solicitud (dict) en _Solicitud. Raises: ValueError si no es válida."""
+        solicitud = _Solicitud()
+        try:
+            solicitud.habitacion_id = int(datos['habitacion_id'])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("'habitacion_id' debe ser un número entero.") from None
+        for campo in ('desde', 'hasta'):
+            valor = datos.get(campo)
+            fecha = fechas.get(valor)
+            if fecha is None:
+                if valor is None:
+                    raise ValueError(f"Falta '{campo}'.")
+                try:
+                    fecha = fechas[valor] = a_fecha(valor)
+                except (TypeError, ValueError):
+                    raise ValueError(f"'{campo}' debe ser una fecha AAAA-MM-DD.") from None
+            setattr(solicitud, campo, fecha)
+        solicitud.noches = (solicitud.hasta - solicitud.desde).days
+        if solicitud.noches <= 0:
+            raise ValueError("La fecha de salida debe ser posterior a la de llegada.")
+        solicitud.inicio = (solicitud.desde - self.fecha_inicio).days
+        solicitud.fila = self._ambitos['habitaciones']['posicion'].get(solicitud.habitacion_id)
+        if solicitud.fila is None:
+            raise ValueError(f"No existe la habitación {solicitud.habitacion_id}.")
+        solicitud.servicios = []
+        servicios = datos.get('servicios') or {}
+        if not isinstance(servicios, dict):
+            # Lista de IDs o de pares [id, cantidad]
+            servicios = dict(servicio if isinstance(servicio, (list, tuple)) else (servicio, 1)
+                             for servicio in servicios)
+        posiciones = self._ambitos['servicios']['posicion']
+        for servicio_id, cantidad in servicios.items():
+            try:
+                servicio_id = int(servicio_id)
+                if cantidad != POR_NOCHE:
+                    cantidad = float(cantidad)
+            except (TypeError, ValueError):
+                raise ValueError(f"Servicio inválido: {servicio_id!r}: {cantidad!r}.") from None
+            if cantidad != POR_NOCHE and cantidad < 0:
+                raise ValueError("La cantidad de un servicio no puede ser negativa.")
+            fila = posiciones.get(servicio_id)
+            if fila is None:
+                raise ValueError(f"No existe el servicio {servicio_id}.")
+            solicitud.servicios.append((fila, cantidad))
+        try:
+            solicitud.descuento = float(datos.get('descuento') or 0)
+        except (TypeError, ValueError):
+            raise ValueError("'descuento' debe ser un número.") from None
+        if not 0 <= solicitud.descuento <= 100:
+            raise ValueError("'descuento' debe estar entre 0 y 100.")
+        return solicitud
+
+    def _resultado(self, solicitud, importes):
+        habitacion, servicios, descuento, impuestos, total = importes
+        return {
+            'habitacion_id': solicitud.habitacion_id,
+            'desde': solicitud.desde.isoformat(),
+            'hasta': solicitud.hasta.isoformat(),
+            'noches': solicitud.noches,
+            'habitacion': habitacion,
+            'servicios': servicios,
+            'descuento': descuento,
+            'impuestos': impuestos,
+            'total': total,
+        }
+
+    # ---------- Cálculo ----------
+
+    def _cotizar_una(self, solicitud):
+        habitacion = self._importe('habitaciones', solicitud.fila, solicitud.inicio, solicitud.noches)
+        servicios = sum(self._importe('servicios', fila, solicitud.inicio, solicitud.noches, cantidad)
+                        for fila, cantidad in solicitud.servicios)
+        return _desglose(habitacion, servicios, descuento_estancia(solicitud.noches, self.tramos_estancia),
+                         solicitud.descuento, self.tasa_impuesto)
+
+    def _cotizar_vectorizado(self, solicitudes):
+        """Importes de solicitudes dentro de la ventana, con arrays de NumPy."""
+        n = len(solicitudes)
+        fila = np.fromiter((solicitud.fila for solicitud in solicitudes), dtype=np.intp, count=n)
+        inicio = np.fromiter((solicitud.inicio for solicitud in solicitudes), dtype=np.intp, count=n)
+        noches = np.fromiter((solicitud.noches for solicitud in solicitudes), dtype=np.intp, count=n)
+        descuento = np.fromiter((solicitud.descuento for solicitud in solicitudes), dtype=np.float64, count=n)
+        fin = inicio + noches
+
+        # (n, variantes): noches de cada variante en cada estancia, por el precio de la variante
+        grupos, tarifas, conteos, _ = self._ambitos['habitaciones']['arrays']
+        grupo = grupos[fila]
+        habitacion = (tarifas[fila] * (conteos[grupo, :, fin] - conteos[grupo, :, inicio])).sum(axis=1)
+
+        # Las líneas de servicio de todas las solicitudes en un solo array; el importe de
+        # cada solicitud es la suma de sus líneas (np.bincount por número de solicitud)
+        lineas = [(indice, fila_servicio, cantidad)
+                  for indice, solicitud in enumerate(solicitudes)
+                  for fila_servicio, cantidad in solicitud.servicios]
+        servicios = np.zeros(n)
+        if lineas:
+            indice = np.fromiter((linea[0] for linea in lineas), dtype=np.intp, count=len(lineas))
+            fila_servicio = np.fromiter((linea[1] for linea in lineas), dtype=np.intp, count=len(lineas))
+            por_noche = np.fromiter((linea[2] == POR_NOCHE for linea in lineas), dtype=bool, count=len(lineas))
+            cantidad = np.fromiter((0.0 if linea[2] == POR_NOCHE else linea[2] for linea in lineas),
+                                   dtype=np.float64, count=len(lineas))
+            grupos, tarifas, conteos, variante_dia = self._ambitos['servicios']['arrays']
+            grupo = grupos[fila_servicio]
+            desde, hasta = inicio[indice], fin[indice]
+            noche = (tarifas[fila_servicio] * (conteos[grupo, :, hasta] - conteos[grupo, :, desde])).sum(axis=1)
+            unidad = tarifas[fila_servicio, variante_dia[grupo, desde]] * cantidad
+            servicios = np.bincount(indice, weights=np.where(por_noche, noche, unidad), minlength=n)
+
+        if self.tramos_estancia:
+            minimos = np.array([minimo for minimo, _ in self.tramos_estancia])
+            porcentajes = np.array([0.0] + [valor for _, valor in self.tramos_estancia])
+            estancia = porcentajes[np.searchsorted(minimos, noches, side='right')]
+        else:
+            estancia = np.zeros(n)
+
+        def centimos(importe):
+            return np.floor(importe * 100 + 0.5) / 100
+
+        # Mismas operaciones que _desglose(), sobre arrays
+        habitacion, servicios = centimos(habitacion), centimos(servicios)
+        rebaja = habitacion * estancia / 100
+        rebaja = centimos(rebaja + (habitacion - rebaja + servicios) * descuento / 100)
+        base = habitacion + servicios - rebaja
+        impuestos = centimos(base * self.tasa_impuesto)
+        total = centimos(base + impuestos)
+        return zip(habitacion.tolist(), servicios.tolist(), rebaja.tolist(), impuestos.tolist(), total.tolist())
+
+    def cotizar_lote(self, solicitudes, vectorizar=None):
+        """
+        Cotiza un lote de estancias.
+        Args:
+            solicitudes (iterable): Diccionarios {'habitacion_id', 'desde', 'hasta',
+                'servicios' (opcional: {id: cantidad o POR_NOCHE}, lista de IDs o de pares
+                [id, cantidad]), 'descuento' (opcional, %)}.
+            vectorizar (bool): Usar NumPy (por defecto, si está instalado).
+        Returns:
+            list: Una cotización por solicitud y en el mismo orden: {'habitacion_id', 'desde',
+                  'hasta', 'noches', 'habitacion', 'servicios', 'descuento', 'impuestos',
+                  'total'}, o {'habitacion_id', 'error'} si la solicitud no es válida.
+        """
+        if vectorizar is None:
+            vectorizar = np is not None
+        elif vectorizar and np is None:
+            raise ImportError("La cotización vectorizada requiere el paquete numpy (pip install numpy).")
+        resultados, validas, fechas = [], [], {}
+        for posicion, datos in enumerate(solicitudes):
+            try:
+                solicitud = self._solicitud(datos, fechas)
+            except ValueError as e:
+                resultados.append({'habitacion_id': datos.get('habitacion_id'), 'error': str(e)})
+                continue
+            resultados.append(None)
+            if vectorizar and 0 <= solicitud.inicio and solicitud.inicio + solicitud.noches <= self.dias:
+                validas.append((posicion, solicitud))
+            else:
+                resultados[posicion] = self._resultado(solicitud, self._cotizar_una(solicitud))
+        if validas:
+            importes = self._cotizar_vectorizado([solicitud for _, solicitud in validas])
+            for (posicion, solicitud), importe in zip(validas, importes):
+                resultados[posicion] = self._resultado(solicitud, importe)
+        return resultados
+
+    def cotizar(self, habitacion_id, desde, hasta, servicios=None, descuento=0):
+        """
+        Cotiza una estancia.
+        Returns:
+            dict: La cotización (ver cotizar_lote).
+        Raises:
+            ValueError: Si la solicitud no es válida (habitación o servicio inexistente, fechas...).
+        """
+        solicitud = self._solicitud({'habitacion_id': habitacion_id, 'desde': desde, 'hasta': hasta,
+                                     'servicios': servicios, 'descuento': descuento}, {})
+        return self._resultado(solicitud, self._cotizar_una(solicitud))
+
+
+# ========== Tabla cacheada ==========
+
+def _cargar_tabla(fecha_inicio, dias):
+    # Se usan los cargadores de los catálogos y de las reglas (que lanzan los errores de BD)
+    # en lugar de obtener_todas_*() / obtener_reglas(), que devuelven una lista vacía: una
+    # tabla vacía, o sin los recargos y descuentos de temporada, no debe cachearse
+    habitaciones = cache_catalogo.obtener_o_cargar(('habitaciones', 'todas'),
+                                                   CRUD_habitaciones._cargar_todas_habitaciones)
+    servicios = cache_catalogo.obtener_o_cargar(('servicios', 'todos'), CRUD_servicios._cargar_todos_servicios)
+    reglas = cache_catalogo.obtener_o_cargar(('precios', 'reglas'), precios._cargar_reglas)
+    tabla = TablaTarifas(habitaciones, servicios, reglas, fecha_inicio, dias)
+    registro.debug("Tabla de tarifas: %d habitaciones, %d servicios, %d noches.",
+                   len(habitaciones), len(servicios), dias)
+    return tabla
+
+
+def obtener_tabla():
+    """
+    Devuelve la tabla de tarifas de la ventana por defecto (hoy + VENTANA_TARIFAS noches),
+    guardada en la caché de catálogos. Se invalida con cada cambio de habitaciones,
+    servicios o reglas de temporada.
+    Raises:
+        Las excepciones de base de datos (ERRORES_BD).
+    """
+    hoy = date.today()
+    return cache_catalogo.obtener_o_cargar(('tarifas', 'tabla', hoy), lambda: _cargar_tabla(hoy, VENTANA_TARIFAS))
+
+
+def invalidar_tarifas():
+    cache_catalogo.invalidar('tarifas')
+
+
+def cotizar(habitacion_id, desde, hasta, servicios=None, descuento=0):
+    """
+    Cotiza una estancia con la tabla de tarifas cacheada.
+    Args:
+        habitacion_id (int): Habitación.
+        desde, hasta (date | str): Llegada y salida.
+        servicios: {id: cantidad o POR_NOCHE}, lista de IDs o de pares (id, cantidad).
+        descuento (float): Descuento adicional en %.
+    Returns:
+        dict: {'habitacion_id', 'desde', 'hasta', 'noches', 'habitacion', 'servicios',
+               'descuento', 'impuestos', 'total'}
+    Raises:
+        ValueError: Si la solicitud no es válida.
+        Las excepciones de base de datos (ERRORES_BD) si hay que cargar la tabla.
+    """
+    return obtener_tabla().cotizar(habitacion_id, desde, hasta, servicios, descuento)
+
+
+def cotizar_lote(solicitudes):
+    """Cotiza un lote de estancias con la tabla cacheada (ver TablaTarifas.cotizar_lote)."""
+    return obtener_tabla().cotizar_lote(solicitudes)
+
+
+def cotizar_disponibles(desde, hasta, servicios=None, descuento=0):
+    """
+    Cotiza la misma estancia en todas las habitaciones libres entre `desde` y `hasta`
+    (resultados de búsqueda de la web).
+    Returns:
+        list: Las cotizaciones, de menor a mayor total.
+    """
+    libres = CRUD_habitaciones.obtener_habitaciones_disponibles(desde, hasta)
+    cotizaciones = cotizar_lote({'habitacion_id': habitacion['id'], 'desde': desde, 'hasta': hasta,
+                                 'servicios': servicios, 'descuento': descuento} for habitacion in libres)
+    return sorted((cotizacion for cotizacion in cotizaciones if 'error' not in cotizacion),
+                  key=lambda cotizacion: cotizacion['total'])
+
+
+def leer_servicios(texto):
+    """Interpreta una lista de servicios en texto: "3,5:2,7:noche" -> {3: 1, 5: 2, 7: POR_NOCHE}."""
+    servicios = {}
+    for parte in (texto or '').split(','):
+        if parte.strip():
+            servicio_id, _, cantidad = parte.partition(':')
+            servicios[int(servicio_id)] = cantidad.strip() or 1
+    return servicios
+
+
+# ---------- Línea de órdenes ----------
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Cotiza estancias con la tabla de tarifas.")
+    parser.add_argument("desde", help="Llegada (AAAA-MM-DD)")
+    parser.add_argument("hasta", help="Salida (AAAA-MM-DD)")
+    parser.add_argument("--habitacion", type=int, help="Habitación (por defecto, todas las libres)")
+    parser.add_argument("--servicios", help="IDs de servicio con cantidad opcional: 3,5:2,7:noche")
+    parser.add_argument("--descuento", type=float, default=0, help="Descuento adicional en %%")
+    parser.add_argument("--json", action="store_true", help="Salida en JSON")
+    args = parser.parse_args(argumentos)
+
+    try:
+        servicios = leer_servicios(args.servicios)
+        if args.habitacion is not None:
+            cotizaciones = [cotizar(args.habitacion, args.desde, args.hasta, servicios, args.descuento)]
+        else:
+            cotizaciones = cotizar_disponibles(args.desde, args.hasta, servicios, args.descuento)
+    except ValueError as e:
+        print(f"\nError: {e}")
+        return 1
+    if args.json:
+        print(json.dumps(cotizaciones, ensure_ascii=False, indent=2))
+        return 0
+    for cotizacion in cotizaciones:
+        print(f"  Habitación {cotizacion['habitacion_id']:>6}  {cotizacion['noches']} noche(s)  "
+              f"habitación {cotizacion['habitacion']:10.2f}  servicios {cotizacion['servicios']:8.2f}  "
+              f"descuento {cotizacion['descuento']:8.2f}  impuestos {cotizacion['impuestos']:8.2f}  "
+              f"total {cotizacion['total']:10.2f}")
+    print(f"\n{len(cotizaciones)} cotización(es).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,283 @@
+import logging
+import os
+from datetime import date, datetime, timedelta
+
+from cache_bd import cache_catalogo, invalidar_habitaciones
+from conection_bd import conexion_bd, al_confirmar, ERRORES_BD
+
+registro = logging.getLogger(__name__)
+
+# ========== Calendario de disponibilidad por fechas ==========
+#
+# Cada ocupación (reserva, mantenimiento...) se guarda en ocupacion_habitaciones como un
+# rango de noches [desde, hasta): `hasta` es el día de salida y esa noche queda libre.
+# En memoria el calendario guarda un mapa de bits por noche, con un bit por habitación,
+# de modo que saber qué habitaciones están libres entre dos fechas es un OR de los mapas
+# de esas noches, sin recorrer habitación por habitación.
+
+# Noches que cubre el calendario cacheado a partir de hoy
+VENTANA_CALENDARIO = int(os.environ.get("HOTEL_VENTANA_CALENDARIO", "400"))
+
+
+def a_fecha(valor):
+    """Convierte a date un valor de la BD o del usuario ('AAAA-MM-DD', date o datetime)."""
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    return date.fromisoformat(str(valor).strip()[:10])
+
+
+def _validar_rango(desde, hasta):
+    desde, hasta = a_fecha(desde), a_fecha(hasta)
+    if hasta <= desde:
+        raise ValueError("La fecha de salida debe ser posterior a la de llegada.")
+    return desde, hasta
+
+
+class CalendarioOcupacion:
+    """
+    Ocupación por noche de todas las habitaciones entre `fecha_inicio` y
+    `fecha_inicio + dias`, guardada como un mapa de bits (int) por noche.
+    Args:
+        habitaciones_ids (iterable): IDs de las habitaciones (uno por bit).
+        fecha_inicio (date): Primera noche del calendario.
+        dias (int): Número de noches que cubre.
+    """
+
+    def __init__(self, habitaciones_ids, fecha_inicio, dias):
+        self.fecha_inicio = a_fecha(fecha_inicio)
+        self.dias = dias
+        self._ids = list(habitaciones_ids)
+        self._posicion = {id_habitacion: posicion for posicion, id_habitacion in enumerate(self._ids)}
+        self._noches = [0] * dias
+        self._todas = (1 << len(self._ids)) - 1
+
+    @property
+    def fecha_fin(self):
+        return self.fecha_inicio + timedelta(days=self.dias)
+
+    def cubre(self, desde, hasta):
+        """Indica si el rango [desde, hasta) está dentro del calendario."""
+        return self.fecha_inicio <= a_fecha(desde) and a_fecha(hasta) <= self.fecha_fin
+
+    def _indices(self, desde, hasta, recortar=False):
+        desde, hasta = _validar_rango(desde, hasta)
+        inicio = (desde - self.fecha_inicio).days
+        fin = (hasta - self.fecha_inicio).days
+        if recortar:
+            return max(inicio, 0), min(fin, self.dias)
+        if inicio < 0 or fin > self.dias:
+            raise ValueError(f"El rango {desde} - {hasta} está fuera del calendario "
+                             f"({self.fecha_inicio} - {self.fecha_fin}).")
+        return inicio, fin
+
+    def cargar(self, ocupaciones):
+        """
+        Marca en bloque un iterable de (habitacion_id, desde, hasta). Los rangos se recortan
+        a la ventana del calendario y las habitaciones desconocidas se ignoran.
+        """
+        bytes_por_noche = (len(self._ids) + 7) // 8
+        noches = {}
+        for habitacion_id, desde, hasta in ocupaciones:
+            posicion = self._posicion.get(habitacion_id)
+            if posicion is None:
+                continue
+            inicio, fin = self._indices(desde, hasta, recortar=True)
+            for dia in range(inicio, fin):
+                octetos = noches.get(dia)
+                if octetos is None:
+                    octetos = noches[dia] = bytearray(bytes_por_noche)
+                octetos[posicion >> 3] |= 1 << (posicion & 7)
+        for dia, octetos in noches.items():
+            self._noches[dia] |= int.from_bytes(octetos, 'little')
+
+    def marcar(self, habitacion_id, desde, hasta):
+        """Marca como ocupada una habitación en las noches [desde, hasta)."""
+        self._cambiar(habitacion_id, desde, hasta, ocupar=True)
+
+    def desmarcar(self, habitacion_id, desde, hasta):
+        """Libera una habitación en las noches [desde, hasta)."""
+        self._cambiar(habitacion_id, desde, hasta, ocupar=False)
+
+    def _cambiar(self, habitacion_id, desde, hasta, ocupar):
+        posicion = self._posicion.get(habitacion_id)
+        if posicion is None:
+            return
+        bit = 1 << posicion
+        inicio, fin = self._indices(desde, hasta, recortar=True)
+        for dia in range(inicio, fin):
+            if ocupar:
+                self._noches[dia] |= bit
+            else:
+                self._noches[dia] &= ~bit
+
+    def mascara_ocupadas(self, desde, hasta):
+        """Mapa de bits de las habitaciones ocupadas alguna noche de [desde, hasta)."""
+        inicio, fin = self._indices(desde, hasta)
+        ocupadas = 0
+        for mapa in self._noches[inicio:fin]:
+            ocupadas |= mapa
+        return ocupadas
+
+    def libres(self, desde, hasta):
+        """
+        Returns:
+            list: IDs de las habitaciones libres todas las noches de [desde, hasta).
+        """
+        libres = self._todas & ~self.mascara_ocupadas(desde, hasta)
+        bits = bin(libres)[2:][::-1]
+        resultado = []
+        posicion = bits.find('1')
+        while posicion != -1:
+            resultado.append(self._ids[posicion])
+            posicion = bits.find('1', posicion + 1)
+        return resultado
+
+    def esta_libre(self, habitacion_id, desde, hasta):
+        """Indica si una habitación está libre todas las noches de [desde, hasta)."""
+        posicion = self._posicion.get(habitacion_id)
+        if posicion is None:
+            return False  # No es una habitación de este calendario (o no existe)
+        return not (self.mascara_ocupadas(desde, hasta) >> posicion) & 1
+
+    def ocupacion_por_noche(self):
+        """
+        Returns:
+            list: Tuplas (fecha, habitaciones_ocupadas) para cada noche del calendario.
+        """
+        return [(self.fecha_inicio + timedelta(days=dia), mapa.bit_count())
+                for dia, mapa in enumerate(self._noches)]
+
+
+# ========== Acceso a la BD ==========
+
+def _cargar_calendario(fecha_inicio, dias):
+    fecha_fin = fecha_inicio + timedelta(days=dias)
+    with conexion_bd('cargar_calendario') as conexion:
+        cursor = conexion.cursor()
+        cursor.execute("SELECT id FROM dbohabitaciones ORDER BY id")
+        calendario = CalendarioOcupacion([row[0] for row in cursor.fetchall()], fecha_inicio, dias)
+        cursor.execute(
+            "SELECT habitacion_id, desde, hasta FROM ocupacion_habitaciones WHERE desde < ? AND hasta > ?",
+            (fecha_fin.isoformat(), fecha_inicio.isoformat()))
+        while True:
+            filas = cursor.fetchmany(5000)
+            if not filas:
+                break
+            calendario.cargar((row[0], row[1], row[2]) for row in filas)
+    return calendario
+
+
+def obtener_calendario(desde=None, hasta=None):
+    """
+    Devuelve un calendario que cubre [desde, hasta). El calendario de la ventana por
+    defecto (hoy + VENTANA_CALENDARIO noches) se guarda en la caché de catálogos y se
+    invalida con cada cambio de ocupación o de habitaciones. Sin `hasta`, cubre
+    VENTANA_CALENDARIO noches desde `desde`.
+    Raises:
+        ValueError: Si las fechas no son válidas.
+        Las excepciones de base de datos (ERRORES_BD).
+    """
+    hoy = date.today()
+    if desde is not None and hasta is None:
+        hasta = a_fecha(desde) + timedelta(days=VENTANA_CALENDARIO)
+    if desde is None or (a_fecha(desde) >= hoy and a_fecha(hasta) <= hoy + timedelta(days=VENTANA_CALENDARIO)):
+        return cache_catalogo.obtener_o_cargar(
+            ('ocupacion', 'calendario', hoy),
+            lambda: _cargar_calendario(hoy, VENTANA_CALENDARIO))
+    desde, hasta = _validar_rango(desde, hasta)
+    return _cargar_calendario(desde, (hasta - desde).days)
+
+
+def invalidar_ocupacion():
+    """Invalida los calendarios cacheados (llamar tras cambiar ocupaciones o habitaciones)."""
+    cache_catalogo.invalidar('ocupacion')
+
+
+def habitaciones_libres(desde, hasta):
+    """
+    Returns:
+        set: IDs de las habitaciones sin ocupación ninguna noche de [desde, hasta).
+             Conjunto vacío en caso de error.
+    """
+    try:
+        return set(obtener_calendario(desde, hasta).libres(desde, hasta))
+    except ERRORES_BD as e:
+        registro.error("Error al consultar la disponibilidad: %s", e)
+        return set()
+
+
+def esta_libre(habitacion_id, desde, hasta):
+    """Indica si una habitación está libre en [desde, hasta) (False en caso de error)."""
+    try:
+        return obtener_calendario(desde, hasta).esta_libre(habitacion_id, desde, hasta)
+    except ERRORES_BD as e:
+        registro.error("Error al consultar la disponibilidad: %s", e)
+        return False
+
+
+def registrar_ocupacion_bd(habitacion_id, desde, hasta, motivo='reserva'):
+    """
+    Registra una ocupación si la habitación no tiene otra que se solape.
+    Args:
+        habitacion_id (int): ID de la habitación.
+        desde (date | str): Noche de llegada.
+        hasta (date | str): Día de salida (esa noche no se ocupa).
+        motivo (str): 'reserva', 'mantenimiento', etc.
+    Returns:
+        bool: True si se registró, False si la habitación no existe, se solapa con otra
+              ocupación o hay un error.
+    """
+    desde, hasta = _validar_rango(desde, hasta)
+    try:
+        with conexion_bd('registrar_ocupacion_bd') as conexion:
+            cursor = conexion.cursor()
+            # Subir la versión bloquea la fila de la habitación hasta el commit, así que las
+            # ocupaciones de una misma habitación no se solapan aunque lleguen a la vez, y
+            # las reservas optimistas en curso (reservas.py) detectan el cambio
+            cursor.execute("UPDATE dbohabitaciones SET version = version + 1 WHERE id = ?", (habitacion_id,))
+            if cursor.rowcount <= 0:
+                return False
+            cursor.execute("""
+                INSERT INTO ocupacion_habitaciones (habitacion_id, desde, hasta, motivo)
+                SELECT ?, ?, ?, ?
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM ocupacion_habitaciones
+                    WHERE habitacion_id = ? AND desde < ? AND hasta > ?
+                )
+            """, (habitacion_id, desde.isoformat(), hasta.isoformat(), motivo,
+                  habitacion_id, hasta.isoformat(), desde.isoformat()))
+            if cursor.rowcount <= 0:
+                return False
+            conexion.commit()
+    except ERRORES_BD as e:
+        registro.error("Error al registrar la ocupación: %s", e)
+        return False
+    # La versión de la habitación cambió: también el catálogo cacheado (y con él los calendarios)
+    al_confirmar(invalidar_habitaciones)
+    return True
+
+
+def liberar_ocupacion_bd(habitacion_id, desde, hasta):
+    """
+    Elimina las ocupaciones de una habitación que empiezan en `desde` y terminan en `hasta`.
+    Returns:
+        bool: True si se eliminó alguna, False si no existía o hay un error.
+    """
+    desde, hasta = _validar_rango(desde, hasta)
+    try:
+        with conexion_bd('liberar_ocupacion_bd') as conexion:
+            cursor = conexion.cursor()
+            cursor.execute("UPDATE dbohabitaciones SET version = version + 1 WHERE id = ?", (habitacion_id,))
+            cursor.execute(
+                "DELETE FROM ocupacion_habitaciones WHERE habitacion_id = ? AND desde = ? AND hasta = ?",
+                (habitacion_id, desde.isoformat(), hasta.isoformat()))
+            eliminadas = cursor.rowcount
+            conexion.commit()
+    except ERRORES_BD as e:
+        registro.error("Error al liberar la ocupación: %s", e)
+        return False
+    # La versión de la habitación cambió: también el catálogo cacheado (y con él los calendarios)
+    al_confirmar(invalidar_habitaciones)
+    return eliminadas > 0
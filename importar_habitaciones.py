@@ -0,0 +1,241 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+from cache_bd import invalidar_habitaciones
+from conection_bd import conexion_bd, al_confirmar, obtener_backend, ERRORES_BD
+from indice_texto import indice_texto
+
+# ========== Carga masiva de habitaciones (CSV / JSON lines) ==========
+
+TAMANO_LOTE_POR_DEFECTO = 500
+IDS_POR_CONSULTA = 1000     # Parámetros por IN (...): SQL Server admite como mucho 2100
+
+SQL_INSERTAR_HABITACION = """
+    INSERT INTO dbohabitaciones
+    (id, descripcion, camas, banos, vista, balcon, precio, disponible, Lugar_Turistico)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_VALORES_VERDADEROS = {'si', 'sí', 's', 'true', '1', 'yes', 'y'}
+_VALORES_FALSOS = {'no', 'n', 'false', '0', ''}
+
+
+def _detectar_formato(ruta):
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension == '.csv':
+        return 'csv'
+    if extension in ('.jsonl', '.ndjson', '.json'):
+        return 'jsonl'
+    raise ValueError(f"No se reconoce el formato de '{ruta}'. Indique formato='csv' o formato='jsonl'.")
+
+
+def leer_habitaciones(ruta, formato=None):
+    """
+    Recorre un archivo de habitaciones sin cargarlo entero en memoria.
+    Args:
+        ruta (str): Archivo CSV (con encabezados) o JSON lines (un objeto por línea).
+        formato (str): 'csv' o 'jsonl'; si se omite se deduce de la extensión.
+    Yields:
+        tuple: (numero_de_linea, registro) donde registro es un diccionario, o None si la
+               línea no se pudo interpretar.
+    """
+    formato = formato or _detectar_formato(ruta)
+    with open(ruta, encoding='utf-8-sig', newline='') as archivo:
+        if formato == 'csv':
+            lector = csv.DictReader(archivo)
+            for registro in lector:
+                yield lector.line_num, registro
+        elif formato == 'jsonl':
+            for numero, linea in enumerate(archivo, start=1):
+                if not linea.strip():
+                    continue
+                try:
+                    registro = json.loads(linea)
+                except json.JSONDecodeError:
+                    registro = None
+                yield numero, registro if isinstance(registro, dict) else None
+        else:
+            raise ValueError(f"Formato no soportado: {formato!r}")
+
+
+def _a_booleano(valor):
+    if isinstance(valor, bool):
+        return valor
+    if isinstance(valor, (int, float)):
+        return bool(valor)
+    texto = str(valor if valor is not None else '').strip().lower()
+    if texto in _VALORES_VERDADEROS:
+        return True
+    if texto in _VALORES_FALSOS:
+        return False
+    raise ValueError(f"valor booleano inválido: {valor!r}")
+
+
+def validar_habitacion(registro):
+    """
+    Valida y normaliza un registro leído del archivo.
+    Args:
+        registro (dict): Campos de la habitación (acepta 'lugar_turistico' o 'Lugar_Turistico').
+    Returns:
+        tuple: (fila, None) con la tupla lista para el INSERT, o (None, motivo) si es inválido.
+    """
+    if registro is None:
+        return None, "línea con formato inválido"
+    campos = {str(clave).strip().lower(): valor for clave, valor in registro.items() if clave is not None}
+    try:
+        id_habitacion = int(str(campos.get('id', '')).strip())
+    except ValueError:
+        return None, f"ID inválido: {campos.get('id')!r}"
+    try:
+        camas = int(campos.get('camas'))
+        banos = int(campos.get('banos'))
+        precio = float(campos.get('precio'))
+    except (TypeError, ValueError):
+        return None, "camas, banos y precio deben ser numéricos"
+    if camas < 0 or banos < 0 or precio < 0:
+        return None, "camas, banos y precio no pueden ser negativos"
+    try:
+        balcon = _a_booleano(campos.get('balcon'))
+        disponible = _a_booleano(campos.get('disponible', True))
+    except ValueError as e:
+        return None, str(e)
+    fila = (
+        id_habitacion,
+        (campos.get('descripcion') or '').strip(),
+        camas,
+        banos,
+        (campos.get('vista') or '').strip(),
+        1 if balcon else 0,
+        precio,
+        1 if disponible else 0,
+        (campos.get('lugar_turistico') or '').strip(),
+    )
+    return fila, None
+
+
+def _ids_existentes(cursor, ids):
+    # Solo los IDs del lote: no hace falta traer a memoria todos los de la tabla
+    existentes = set()
+    for inicio in range(0, len(ids), IDS_POR_CONSULTA):
+        parte = ids[inicio:inicio + IDS_POR_CONSULTA]
+        cursor.execute(f"SELECT id FROM dbohabitaciones WHERE id IN ({', '.join('?' * len(parte))})", parte)
+        existentes.update(fila[0] for fila in cursor.fetchall())
+    return existentes
+
+
+def importar_habitaciones(ruta, tamano_lote=TAMANO_LOTE_POR_DEFECTO, formato=None, mostrar_progreso=True):
+    """
+    Inserta en dbohabitaciones las habitaciones de un archivo CSV o JSON lines.
+
+    Todas las filas válidas se insertan con executemany en lotes de `tamano_lote`,
+    usando una sola conexión y una sola transacción: si falla la base de datos no se
+    guarda ninguna. Las filas inválidas o con ID repetido (en el archivo o en la BD)
+    se rechazan y se informan sin detener la carga.
+    Args:
+        ruta (str): Archivo a importar.
+        tamano_lote (int): Filas por llamada a executemany.
+        formato (str): 'csv' o 'jsonl'; si se omite se deduce de la extensión.
+        mostrar_progreso (bool): Si es True imprime el rendimiento de cada lote.
+    Returns:
+        dict: {'insertadas', 'rechazadas' (lista de {'linea', 'id', 'motivo'}),
+               'lotes' (lista de {'lote', 'filas', 'segundos', 'filas_por_segundo'}), 'segundos'}
+    Raises:
+        Las excepciones de base de datos (ERRORES_BD); en ese caso la transacción se revierte.
+    """
+    if tamano_lote < 1:
+        raise ValueError("tamano_lote debe ser mayor que cero.")
+    inicio = time.perf_counter()
+    resumen = {'insertadas': 0, 'rechazadas': [], 'lotes': [], 'segundos': 0.0}
+
+    with conexion_bd('importar_habitaciones') as conexion:
+        cursor = conexion.cursor()
+        vistos = set()  # IDs ya leídos del archivo; los de la BD se comprueban por lote
+        if obtener_backend().soporta_fast_executemany:
+            cursor.fast_executemany = True
+
+        def insertar_lote(pendientes):
+            inicio_lote = time.perf_counter()
+            existentes = _ids_existentes(cursor, [fila[0] for _, fila in pendientes])
+            lote = []
+            for linea, fila in pendientes:
+                if fila[0] in existentes:
+                    resumen['rechazadas'].append({'linea': linea, 'id': fila[0], 'motivo': "ID duplicado"})
+                else:
+                    lote.append(fila)
+            if not lote:
+                return
+            cursor.executemany(SQL_INSERTAR_HABITACION, lote)
+            segundos = time.perf_counter() - inicio_lote
+            estadistica = {
+                'lote': len(resumen['lotes']) + 1,
+                'filas': len(lote),
+                'segundos': segundos,
+                'filas_por_segundo': len(lote) / segundos if segundos > 0 else float('inf'),
+            }
+            resumen['lotes'].append(estadistica)
+            resumen['insertadas'] += len(lote)
+            if mostrar_progreso:
+                print(f"Lote {estadistica['lote']}: {estadistica['filas']} filas en "
+                      f"{segundos:.3f} s ({estadistica['filas_por_segundo']:.0f} filas/s)")
+
+        lote = []
+        for linea, registro in leer_habitaciones(ruta, formato):
+            fila, motivo = validar_habitacion(registro)
+            if fila is None:
+                resumen['rechazadas'].append({'linea': linea, 'id': (registro or {}).get('id'), 'motivo': motivo})
+                continue
+            if fila[0] in vistos:
+                resumen['rechazadas'].append({'linea': linea, 'id': fila[0], 'motivo': "ID duplicado"})
+                continue
+            vistos.add(fila[0])
+            lote.append((linea, fila))
+            if len(lote) >= tamano_lote:
+                insertar_lote(lote)
+                lote = []
+        if lote:
+            insertar_lote(lote)
+        conexion.commit()
+    resumen['rechazadas'].sort(key=lambda rechazo: rechazo['linea'])
+
+    if resumen['insertadas']:
+        al_confirmar(invalidar_habitaciones)
+        # Tras una carga en bloque sale más a cuenta reconstruir el índice de texto que actualizarlo
+        al_confirmar(indice_texto.invalidar)
+
+    resumen['segundos'] = time.perf_counter() - inicio
+    return resumen
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Importa habitaciones en bloque desde un archivo CSV o JSON lines.")
+    parser.add_argument("archivo", help="Ruta del archivo .csv o .jsonl")
+    parser.add_argument("--formato", choices=('csv', 'jsonl'), help="Formato del archivo (por defecto según la extensión)")
+    parser.add_argument("--lote", type=int, default=TAMANO_LOTE_POR_DEFECTO, help="Filas por lote (por defecto %(default)s)")
+    parser.add_argument("--silencioso", action="store_true", help="No mostrar el progreso por lote")
+    args = parser.parse_args(argumentos)
+
+    try:
+        resumen = importar_habitaciones(args.archivo, tamano_lote=args.lote, formato=args.formato,
+                                        mostrar_progreso=not args.silencioso)
+    except (OSError, ValueError) as e:
+        print(f"\nError al leer el archivo: {e}")
+        return 1
+    except ERRORES_BD as e:
+        print(f"\nError de base de datos; no se importó ninguna habitación: {e}")
+        return 1
+
+    segundos = resumen['segundos']
+    print(f"\nHabitaciones insertadas: {resumen['insertadas']} en {segundos:.2f} s "
+          f"({resumen['insertadas'] / segundos if segundos > 0 else 0:.0f} filas/s)")
+    print(f"Filas rechazadas: {len(resumen['rechazadas'])}")
+    for rechazo in resumen['rechazadas']:
+        print(f"  Línea {rechazo['linea']} (ID={rechazo['id']}): {rechazo['motivo']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+import heapq
+from bisect import bisect_left, bisect_right
+
+# ========== Índice en memoria de habitaciones por varios atributos ==========
+#
+# Las habitaciones se numeran por orden de precio (posición 0 = la más barata) y cada
+# valor de atributo se guarda como un mapa de bits (un int de Python) con un bit por
+# posición. Filtrar es hacer AND entre mapas de bits, un rango de precios es un rango
+# contiguo de bits, y recorrer los bits encendidos de menor a mayor devuelve el
+# resultado ya ordenado por precio.
+
+# Atributos que se filtran por igualdad y cómo se normaliza su valor
+ATRIBUTOS_IGUALDAD = {
+    'camas': int,
+    'banos': int,
+    'vista': lambda valor: str(valor).strip().lower(),
+    'balcon': bool,
+    'disponible': bool,
+}
+
+# Columnas por las que se puede ordenar un resultado
+COLUMNAS_ORDEN = ('id', 'precio', 'camas', 'banos')
+
+
+def _valor(habitacion, campo):
+    # Las filas de la BD traen 'Lugar_Turistico' y similares; se toleran ambos casos
+    if campo in habitacion:
+        return habitacion[campo]
+    for clave in habitacion:
+        if clave.lower() == campo:
+            return habitacion[clave]
+    return None
+
+
+def _posiciones(mascara, descendente=False):
+    """Genera las posiciones de los bits encendidos de `mascara`, en orden."""
+    bits = bin(mascara)[2:]  # El bit más significativo va primero
+    ultimo = len(bits) - 1
+    if descendente:
+        indice = bits.find('1')
+        while indice != -1:
+            yield ultimo - indice
+            indice = bits.find('1', indice + 1)
+    else:
+        bits = bits[::-1]
+        indice = bits.find('1')
+        while indice != -1:
+            yield indice
+            indice = bits.find('1', indice + 1)
+
+
+def _mapa_de_bits(posiciones, total):
+    """Construye el int con los bits `posiciones` encendidos, en tiempo lineal."""
+    octetos = bytearray((total + 7) // 8)
+    for posicion in posiciones:
+        octetos[posicion >> 3] |= 1 << (posicion & 7)
+    return int.from_bytes(octetos, 'little')
+
+
+class IndiceHabitaciones:
+    """
+    Índice de habitaciones por varios atributos basado en mapas de bits.
+    Args:
+        habitaciones (iterable): Habitaciones como las devuelve obtener_todas_habitaciones().
+    """
+
+    def __init__(self, habitaciones):
+        self._filas = sorted(habitaciones, key=lambda hab: (float(_valor(hab, 'precio') or 0), hab['id']))
+        self._precios = [float(_valor(hab, 'precio') or 0) for hab in self._filas]
+        self._posicion = {}
+        posiciones_por_valor = {atributo: {} for atributo in ATRIBUTOS_IGUALDAD}
+        for posicion, habitacion in enumerate(self._filas):
+            self._posicion[habitacion['id']] = posicion
+            for atributo, normalizar in ATRIBUTOS_IGUALDAD.items():
+                valor = _valor(habitacion, atributo)
+                if valor is not None:
+                    posiciones_por_valor[atributo].setdefault(normalizar(valor), []).append(posicion)
+        self._mapas = {
+            atributo: {valor: _mapa_de_bits(posiciones, len(self._filas)) for valor, posiciones in valores.items()}
+            for atributo, valores in posiciones_por_valor.items()
+        }
+        self._todas = (1 << len(self._filas)) - 1
+
+    def __len__(self):
+        return len(self._filas)
+
+    def obtener(self, id_habitacion):
+        """Devuelve la habitación con ese id, o None."""
+        posicion = self._posicion.get(id_habitacion)
+        return None if posicion is None else self._filas[posicion]
+
+    def mascara(self, criterios):
+        """
+        Devuelve el mapa de bits (por posición de precio) de las habitaciones que cumplen
+        los criterios de igualdad y de rango de precio.
+        """
+        mascara = self._todas
+        for atributo, normalizar in ATRIBUTOS_IGUALDAD.items():
+            valor = criterios.get(atributo)
+            if valor is None:
+                continue
+            mascara &= self._mapas[atributo].get(normalizar(valor), 0)
+            if not mascara:
+                return 0
+        precio_min = criterios.get('precio_min')
+        precio_max = criterios.get('precio_max')
+        if precio_min is not None or precio_max is not None:
+            inicio = 0 if precio_min is None else bisect_left(self._precios, float(precio_min))
+            fin = len(self._precios) if precio_max is None else bisect_right(self._precios, float(precio_max))
+            if inicio >= fin:
+                return 0
+            mascara &= ((1 << fin) - 1) ^ ((1 << inicio) - 1)
+        return mascara
+
+    def buscar(self, criterios, orden='precio', descendente=False, limite=None):
+        """
+        Busca habitaciones que cumplan todos los criterios.
+        Args:
+            criterios (dict): Atributos de ATRIBUTOS_IGUALDAD y/o 'precio_min' / 'precio_max'.
+                Los valores None se ignoran.
+            orden (str): Columna de COLUMNAS_ORDEN por la que ordenar.
+            descendente (bool): Orden descendente.
+            limite (int): Número máximo de resultados.
+        Returns:
+            list: Habitaciones encontradas.
+        """
+        if orden not in COLUMNAS_ORDEN:
+            raise ValueError(f"No se puede ordenar por {orden!r}. Opciones: {', '.join(COLUMNAS_ORDEN)}")
+        mascara = self.mascara(criterios)
+        if not mascara:
+            return []
+
+        if orden == 'precio':
+            # Las posiciones ya están en orden de precio: basta con leer los primeros bits
+            resultado = []
+            for posicion in _posiciones(mascara, descendente):
+                resultado.append(self._filas[posicion])
+                if limite is not None and len(resultado) >= limite:
+                    break
+            return resultado
+
+        resultado = [self._filas[posicion] for posicion in _posiciones(mascara)]
+
+        def clave(habitacion):
+            return (_valor(habitacion, orden), habitacion['id'])
+
+        if limite is not None and limite < len(resultado):
+            elegir = heapq.nlargest if descendente else heapq.nsmallest
+            return elegir(limite, resultado, key=clave)
+        resultado.sort(key=clave, reverse=descendente)
+        return resultado
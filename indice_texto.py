@@ -0,0 +1,340 @@
+import heapq
+import math
+import os
+import re
+import threading
+import time
+import unicodedata
+
+# ========== Búsqueda de texto en las habitaciones ==========
+#
+# Índice invertido sobre la descripción y el lugar turístico de cada habitación: para cada
+# término, las habitaciones que lo contienen y cuántas veces. Una búsqueda solo recorre las
+# listas de sus términos (empezando por la más corta) y ordena por relevancia (BM25), sin
+# leer la tabla ni las descripciones.
+#
+# El texto se normaliza sin acentos ni mayúsculas ("Montaña" -> "montana", "baño" ->
+# "bano"), se quitan las palabras vacías del español y los plurales regulares se reducen
+# al singular ("suites" -> "suite", "jardines" -> "jardin"), igual en las habitaciones que
+# en la consulta. Una coincidencia en el lugar turístico pesa más que en la descripción.
+#
+# El índice no vive en la caché de catálogos, que se invalida entera con cada escritura:
+# se construye una vez a partir del catálogo y las funciones de escritura de
+# CRUD_habitaciones le aplican cada alta, modificación o baja tras el commit. Los cambios
+# hechos desde otros procesos se recogen al reconstruirlo, cuando tiene más de
+# TTL_INDICE_TEXTO segundos.
+
+TTL_INDICE_TEXTO = float(os.environ.get("HOTEL_INDICE_TEXTO_TTL", "300"))
+
+# Campos indexados y peso de cada aparición de un término en ellos
+CAMPOS_TEXTO = {'descripcion': 1.0, 'lugar_turistico': 2.0}
+
+PALABRAS_VACIAS = frozenset((
+    'a', 'al', 'ante', 'bajo', 'cerca', 'como', 'con', 'de', 'del', 'desde', 'e', 'el', 'en', 'entre',
+    'es', 'esta', 'hacia', 'hasta', 'la', 'las', 'lo', 'los', 'muy', 'o', 'para', 'por', 'que', 'se',
+    'sin', 'sobre', 'su', 'sus', 'tras', 'u', 'un', 'una', 'unas', 'unos', 'y',
+))
+
+# Parámetros de BM25: saturación de la frecuencia y normalización por longitud
+K1 = 1.2
+B = 0.75
+
+_PALABRA = re.compile(r"[^\W_]+")
+
+
+def normalizar_texto(texto):
+    """Quita acentos y diéresis (también la tilde de la ñ) y pasa a minúsculas."""
+    descompuesto = unicodedata.normalize('NFD', str(texto))
+    return ''.join(caracter for caracter in descompuesto if not unicodedata.combining(caracter)).casefold()
+
+
+def _singular(palabra):
+    # Plurales regulares: luces -> luz, habitaciones -> habitacion, mares -> mar, vistas -> vista
+    if len(palabra) <= 3 or not palabra.endswith('s') or palabra[-2].isdigit():
+        return palabra
+    if palabra.endswith('ces'):
+        return palabra[:-3] + 'z'
+    if palabra.endswith('es') and palabra[-3] in 'dlnrj':
+        return palabra[:-2]
+    return palabra[:-1]
+
+
+def tokenizar(texto):
+    """
+    Divide `texto` en los términos que usa el índice.
+    Returns:
+        list: Términos normalizados, sin palabras vacías, en el orden del texto.
+    """
+    if not texto:
+        return []
+    return [_singular(palabra) for palabra in _PALABRA.findall(normalizar_texto(texto))
+            if palabra not in PALABRAS_VACIAS]
+
+
+def _campo(habitacion, campo):
+    try:
+        return habitacion[campo]
+    except KeyError:
+        return None
+
+
+def _frecuencias(habitacion):
+    # {término: apariciones ponderadas por el peso del campo} y la longitud ponderada
+    frecuencias = {}
+    longitud = 0.0
+    for campo, peso in CAMPOS_TEXTO.items():
+        for termino in tokenizar(_campo(habitacion, campo)):
+            frecuencias[termino] = frecuencias.get(termino, 0.0) + peso
+            longitud += peso
+    return frecuencias, longitud
+
+
+def _mejores(puntos, limite, filtro):
+    # Ordena {id: puntuación} de mayor a menor (a igual puntuación, por id). Con límite solo
+    # se ordena la cabeza; si el filtro descarta demasiadas, se recorre el resto en orden.
+    ordenables = [(-suma, id_) for id_, suma in puntos.items()]
+    resultado = []
+    if limite is not None and limite * 4 < len(ordenables):
+        cabeza = heapq.nsmallest(limite * 4, ordenables)
+        for suma, id_ in cabeza:
+            if filtro is None or filtro(id_):
+                resultado.append((id_, -suma))
+                if len(resultado) == limite:
+                    return resultado
+        resultado = []
+    for suma, id_ in sorted(ordenables):
+        if filtro is None or filtro(id_):
+            resultado.append((id_, -suma))
+            if limite is not None and len(resultado) == limite:
+                break
+    return resultado
+
+
+class IndiceTexto:
+    """
+    Índice invertido de las habitaciones por los términos de CAMPOS_TEXTO. Seguro entre
+    hilos. Hasta que se construye (construir() o reconstruir()) no contiene nada y
+    actualizar() / eliminar() no tienen efecto.
+    """
+
+    def __init__(self):
+        self._candado = threading.Lock()
+        self._candado_reconstruccion = threading.Lock()
+        self._vaciar()
+        self.construido_en = None     # time.monotonic() de la última construcción
+        self._invalidado = False
+        self._pendientes = None       # Cambios recibidos durante una reconstrucción
+
+    def _vaciar(self):
+        self._terminos = {}      # término -> {id: impacto BM25 del término en la habitación}
+        self._documentos = {}    # id -> términos de la habitación
+        self._ordenadas = {}     # término -> [(-impacto, id)] ordenada, calculada al buscar
+        self._maximos = {}       # término -> mayor impacto, calculado al buscar
+        self._media = 1.0        # Longitud ponderada media al construir
+
+    def __len__(self):
+        return len(self._documentos)
+
+    @property
+    def construido(self):
+        return self.construido_en is not None
+
+    def vigente(self, ttl=TTL_INDICE_TEXTO):
+        """Indica si está construido y tiene menos de `ttl` segundos."""
+        return self.construido and not self._invalidado and time.monotonic() - self.construido_en < ttl
+
+    # ---------- Construcción ----------
+
+    def construir(self, habitaciones):
+        """Sustituye el contenido por el de `habitaciones` (dict o Habitacion con 'id')."""
+        analizadas = [(habitacion['id'],) + _frecuencias(habitacion) for habitacion in habitaciones]
+        nuevo = IndiceTexto()
+        if analizadas:
+            nuevo._media = sum(longitud for _, _, longitud in analizadas) / len(analizadas) or 1.0
+        for id_habitacion, frecuencias, longitud in analizadas:
+            nuevo._agregar(id_habitacion, frecuencias, longitud)
+        with self._candado:
+            self._terminos = nuevo._terminos
+            self._documentos = nuevo._documentos
+            self._ordenadas = {}
+            self._maximos = {}
+            self._media = nuevo._media
+            self.construido_en = time.monotonic()
+            self._invalidado = False
+            pendientes, self._pendientes = self._pendientes, None
+            # Lo escrito mientras se leía el catálogo puede no estar en `habitaciones`
+            for operacion, argumento in pendientes or ():
+                operacion(self, argumento)
+
+    def reconstruir(self, cargar, ttl=TTL_INDICE_TEXTO):
+        """
+        Reconstruye el índice con las habitaciones de `cargar()` si no está vigente. Solo
+        un hilo reconstruye a la vez: si el índice ya existe, los demás siguen usando el
+        anterior mientras tanto; si no, esperan a que termine.
+        Raises:
+            Las excepciones de `cargar`.
+        """
+        if self.vigente(ttl):
+            return
+        if not self._candado_reconstruccion.acquire(blocking=not self.construido):
+            return
+        try:
+            if self.vigente(ttl):
+                return
+            with self._candado:
+                self._pendientes = []
+            try:
+                self.construir(cargar())
+            finally:
+                with self._candado:
+                    self._pendientes = None
+        finally:
+            self._candado_reconstruccion.release()
+
+    def invalidar(self):
+        """Fuerza la reconstrucción en la próxima búsqueda (p. ej. tras una importación en bloque)."""
+        self._invalidado = True
+
+    # ---------- Cambios incrementales ----------
+
+    def _agregar(self, id_habitacion, frecuencias, longitud):
+        # Cada entrada guarda ya la parte de BM25 que depende de la habitación; la longitud
+        # media es la de la última construcción
+        ajuste = K1 * (1 - B + B * longitud / self._media)
+        for termino, frecuencia in frecuencias.items():
+            impacto = frecuencia * (K1 + 1) / (frecuencia + ajuste)
+            self._terminos.setdefault(termino, {})[id_habitacion] = impacto
+            self._ordenadas.pop(termino, None)
+            if termino in self._maximos and impacto > self._maximos[termino]:
+                self._maximos[termino] = impacto
+        self._documentos[id_habitacion] = tuple(frecuencias)
+
+    def _quitar(self, id_habitacion):
+        terminos = self._documentos.pop(id_habitacion, None)
+        if terminos is None:
+            return
+        for termino in terminos:
+            self._ordenadas.pop(termino, None)
+            habitaciones = self._terminos[termino]
+            if habitaciones.pop(id_habitacion) == self._maximos.get(termino):
+                del self._maximos[termino]
+            if not habitaciones:
+                del self._terminos[termino]
+
+    def _aplicar_actualizacion(self, habitaciones):
+        for habitacion in habitaciones:
+            self._quitar(habitacion['id'])
+            self._agregar(habitacion['id'], *_frecuencias(habitacion))
+
+    def _aplicar_eliminacion(self, ids):
+        for id_habitacion in ids:
+            self._quitar(id_habitacion)
+
+    def _cambiar(self, operacion, argumento):
+        with self._candado:
+            if self._pendientes is not None:
+                self._pendientes.append((operacion, argumento))
+            if self.construido:
+                operacion(self, argumento)
+
+    def actualizar(self, habitaciones):
+        """Indexa de nuevo `habitaciones` (altas o modificaciones) con su texto actual."""
+        self._cambiar(IndiceTexto._aplicar_actualizacion, list(habitaciones))
+
+    def eliminar(self, ids):
+        """Quita del índice las habitaciones con esos ids."""
+        self._cambiar(IndiceTexto._aplicar_eliminacion, list(ids))
+
+    # ---------- Búsqueda ----------
+
+    def buscar(self, consulta, limite=None, todas=True, filtro=None):
+        """
+        Busca habitaciones por los términos de `consulta`.
+        Args:
+            consulta (str): Texto libre ("suite con jacuzzi", "cenote").
+            limite (int): Número máximo de resultados.
+            todas (bool): Exigir todos los términos; si es False basta con uno (y las que
+                tienen más términos suben en la clasificación).
+            filtro (callable): id -> bool; solo se devuelven las habitaciones que lo cumplen.
+        Returns:
+            list: Tuplas (id, puntuación) de mayor a menor puntuación (a igual puntuación,
+                  por id).
+        """
+        terminos = list(dict.fromkeys(tokenizar(consulta)))
+        if not terminos:
+            return []
+        with self._candado:
+            listas = [self._terminos.get(termino) for termino in terminos]
+            if todas and not all(listas):
+                return []
+            total = len(self._documentos)
+            pesos = sorted(((termino, lista, math.log(1 + (total - len(lista) + 0.5) / (len(lista) + 0.5)))
+                            for termino, lista in zip(terminos, listas) if lista), key=lambda peso: len(peso[1]))
+            if not pesos:
+                return []
+            if todas and limite is not None:
+                # Se recorren las habitaciones del término más selectivo de mayor a menor
+                # impacto: en cuanto ni sumando el máximo de los demás términos se supera al
+                # peor de los `limite` mejores, no hace falta mirar el resto
+                termino, lista, idf = pesos[0]
+                ordenada = self._ordenadas.get(termino)
+                if ordenada is None:
+                    ordenada = self._ordenadas[termino] = sorted((-impacto, id_) for id_, impacto in lista.items())
+                otros = [(lista, idf) for _, lista, idf in pesos[1:]]
+                cota_otros = sum(idf_otro * self._maximo(termino_otro, lista_otro)
+                                 for termino_otro, lista_otro, idf_otro in pesos[1:])
+            elif todas:
+                # Se parte de la lista más corta y cada término siguiente solo la reduce
+                _, lista, idf = pesos[0]
+                puntos = {id_: idf * impacto for id_, impacto in lista.items()}
+                for _, lista, idf in pesos[1:]:
+                    puntos = {id_: suma + idf * lista[id_] for id_, suma in puntos.items() if id_ in lista}
+                return _mejores(puntos, limite, filtro)
+            else:
+                puntos = {}
+                for _, lista, idf in pesos:
+                    for id_, impacto in lista.items():
+                        puntos[id_] = puntos.get(id_, 0.0) + idf * impacto
+                return _mejores(puntos, limite, filtro)
+
+            mejores = []  # Montículo de (puntuación, -id): arriba el peor de los elegidos
+            for impacto, id_ in ordenada:
+                # A igual impacto la lista sigue por id creciente, así que un empate con el
+                # peor elegido ya tampoco puede entrar
+                if len(mejores) == limite and (-impacto * idf + cota_otros, -id_) < mejores[0]:
+                    break
+                suma = -impacto * idf
+                for lista_otro, idf_otro in otros:
+                    impacto_otro = lista_otro.get(id_)
+                    if impacto_otro is None:
+                        break
+                    suma += idf_otro * impacto_otro
+                else:
+                    if filtro is not None and not filtro(id_):
+                        continue
+                    if len(mejores) < limite:
+                        heapq.heappush(mejores, (suma, -id_))
+                    elif (suma, -id_) > mejores[0]:
+                        heapq.heapreplace(mejores, (suma, -id_))
+        return [(-id_, suma) for suma, id_ in sorted(mejores, reverse=True)]
+
+    def _maximo(self, termino, lista):
+        maximo = self._maximos.get(termino)
+        if maximo is None:
+            maximo = self._maximos[termino] = max(lista.values())
+        return maximo
+
+    def estadisticas(self):
+        """
+        Returns:
+            dict: habitaciones, terminos y antiguedad (segundos desde la construcción o None).
+        """
+        return {
+            'habitaciones': len(self._documentos),
+            'terminos': len(self._terminos),
+            'antiguedad': None if self.construido_en is None else time.monotonic() - self.construido_en,
+        }
+
+
+# Índice compartido por CRUD_habitaciones (ver buscar_habitaciones_texto)
+indice_texto = IndiceTexto()
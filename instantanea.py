@@ -0,0 +1,303 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from decimal import Decimal
+
+from cache_bd import cache_catalogo
+from conection_bd import obtener_backend, ERRORES_BD
+from sincronizacion import replica_catalogo, TABLAS_SINCRONIZADAS
+
+registro = logging.getLogger(__name__)
+
+# ========== Instantánea local del catálogo ==========
+#
+# Con HOTEL_INSTANTANEA_RUTA, las habitaciones y servicios de replica_catalogo se guardan
+# en un archivo SQLite local junto con su marca de cambios, el origen (qué base de datos) y
+# la hora de la sincronización. Al arrancar, la réplica se restaura del archivo y los
+# listados se sirven de ella enseguida, sin esperar a la red; un hilo en segundo plano la
+# pone al día cada INSTANTANEA_INTERVALO segundos leyendo solo los cambios
+# (sincronizacion.py) y vuelve a guardar el archivo cuando cambia.
+#
+#   - Mientras la réplica tenga menos de INSTANTANEA_ANTIGUEDAD_MAXIMA segundos, las
+#     lecturas no tocan la red. Si es más antigua se sincroniza antes de responder y, si la
+#     base de datos no responde, se sirve lo que hay solo si sigue dentro del límite.
+#   - Tras una escritura de este proceso (que invalida la caché de su tabla) la siguiente
+#     lectura sincroniza antes de responder, para que se vea el cambio.
+#   - El archivo se escribe completo en uno temporal que luego sustituye al anterior, así
+#     que un lector nunca ve una instantánea a medias. Se lee en modo de solo lectura con
+#     la E/S mapeada en memoria (PRAGMA mmap_size).
+#
+# Solo se guardan habitaciones y servicios: las consultas de ocupación por fechas siguen
+# necesitando la base de datos.
+
+INSTANTANEA_RUTA = os.environ.get("HOTEL_INSTANTANEA_RUTA", "")
+INSTANTANEA_ANTIGUEDAD_MAXIMA = float(os.environ.get("HOTEL_INSTANTANEA_ANTIGUEDAD_MAXIMA", "3600"))
+INSTANTANEA_INTERVALO = float(os.environ.get("HOTEL_INSTANTANEA_INTERVALO", "60"))
+INSTANTANEA_MMAP = int(os.environ.get("HOTEL_INSTANTANEA_MMAP", str(64 * 1024 * 1024)))
+INSTANTANEA_ACTIVA = bool(INSTANTANEA_RUTA)
+
+# Se incrementa si cambia el formato del archivo; las instantáneas de otro formato se ignoran
+FORMATO_INSTANTANEA = 1
+
+
+def _a_sqlite(valor):
+    # Los precios de SQL Server llegan como Decimal: se guardan como texto, sin perder precisión
+    return str(valor) if isinstance(valor, Decimal) else valor
+
+
+class InstantaneaCatalogo:
+    """
+    Archivo SQLite con una copia de las tablas sincronizadas.
+    Args:
+        ruta (str): Ruta del archivo.
+        mmap (int): Bytes del archivo que SQLite lee mapeados en memoria.
+    """
+
+    def __init__(self, ruta, mmap=INSTANTANEA_MMAP):
+        self.ruta = ruta
+        self.mmap = mmap
+
+    def guardar(self, estado):
+        """
+        Escribe el estado de una réplica (ReplicaCatalogo.estado()) y sustituye el archivo.
+        Raises:
+            OSError / sqlite3.Error: Si no se puede escribir; el archivo anterior no cambia.
+        """
+        temporal = f"{self.ruta}.{os.getpid()}.tmp"
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        conexion = sqlite3.connect(temporal)
+        try:
+            conexion.execute("CREATE TABLE meta (clave TEXT PRIMARY KEY, valor)")
+            conexion.executemany("INSERT INTO meta VALUES (?, ?)", [
+                ('formato', FORMATO_INSTANTANEA),
+                ('marca', estado['marca']),
+                ('origen', estado['origen']),
+                ('sincronizada_en', estado['sincronizada_en']),
+            ])
+            for tabla, (_, _, clase) in TABLAS_SINCRONIZADAS.items():
+                columnas = clase.__slots__
+                conexion.execute(f"CREATE TABLE {tabla} ({', '.join(columnas)})")
+                conexion.executemany(
+                    f"INSERT INTO {tabla} VALUES ({', '.join('?' * len(columnas))})",
+                    ([_a_sqlite(valor) for valor in registro_.values()] for registro_ in estado[tabla]))
+            conexion.commit()
+        finally:
+            conexion.close()
+        os.replace(temporal, self.ruta)
+
+    def sellar(self, sincronizada_en):
+        """Actualiza solo la hora de sincronización (la réplica se comprobó y no cambió)."""
+        conexion = sqlite3.connect(self.ruta)
+        try:
+            conexion.execute("UPDATE meta SET valor = ? WHERE clave = 'sincronizada_en'", (sincronizada_en,))
+            conexion.commit()
+        finally:
+            conexion.close()
+
+    def cargar(self):
+        """
+        Lee la instantánea.
+        Returns:
+            dict: Estado para ReplicaCatalogo.restaurar(), o None si no hay archivo o no es
+                  válido (otro formato, dañado...).
+        """
+        if not os.path.exists(self.ruta):
+            return None
+        try:
+            conexion = sqlite3.connect(f"file:{self.ruta}?mode=ro", uri=True)
+        except sqlite3.Error as e:
+            registro.warning("No se pudo abrir la instantánea %s: %s", self.ruta, e)
+            return None
+        try:
+            conexion.execute(f"PRAGMA mmap_size = {int(self.mmap)}")
+            meta = dict(conexion.execute("SELECT clave, valor FROM meta"))
+            if meta.get('formato') != FORMATO_INSTANTANEA:
+                registro.warning("La instantánea %s tiene otro formato; se ignora.", self.ruta)
+                return None
+            estado = {'marca': meta['marca'], 'origen': meta['origen'], 'sincronizada_en': meta['sincronizada_en']}
+            for tabla, (_, _, clase) in TABLAS_SINCRONIZADAS.items():
+                cursor = conexion.execute(f"SELECT * FROM {tabla}")
+                registros = clase.desde_cursor(cursor, cursor.fetchall())
+                for registro_ in registros:
+                    if isinstance(registro_.precio, str):
+                        registro_.precio = Decimal(registro_.precio)
+                estado[tabla] = registros
+            return estado
+        except (sqlite3.Error, KeyError) as e:
+            registro.warning("La instantánea %s no es válida; se ignora: %s", self.ruta, e)
+            return None
+        finally:
+            conexion.close()
+
+
+class RefrescoInstantanea:
+    """
+    Hilo que sincroniza replica_catalogo cada `intervalo` segundos y guarda la instantánea
+    cuando la réplica cambia.
+    Args:
+        instantanea (InstantaneaCatalogo): Dónde guardar.
+        intervalo (float): Segundos entre sincronizaciones.
+    """
+
+    def __init__(self, instantanea, intervalo=INSTANTANEA_INTERVALO):
+        self.instantanea = instantanea
+        self.intervalo = intervalo
+        self.marca_guardada = None
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._ejecutar, name="refresco-instantanea", daemon=True)
+
+    def iniciar(self):
+        self._hilo.start()
+
+    def detener(self, esperar=5.0):
+        self._detener.set()
+        if self._hilo.is_alive():
+            self._hilo.join(esperar)
+
+    def refrescar(self):
+        """Sincroniza la réplica y guarda la instantánea si cambió. Returns: True si la guardó."""
+        try:
+            replica_catalogo.sincronizar()
+        except ERRORES_BD as e:
+            registro.warning("No se pudo actualizar el catálogo (antigüedad %.0f s): %s",
+                             replica_catalogo.antiguedad(), e)
+            return False
+        if self.guardar_si_cambio():
+            return True
+        if self.marca_guardada is not None and replica_catalogo.marca == self.marca_guardada:
+            # Sin cambios: basta con anotar que la instantánea sigue al día
+            try:
+                self.instantanea.sellar(replica_catalogo.ultima_sincronizacion)
+            except (OSError, sqlite3.Error) as e:
+                registro.error("No se pudo actualizar la instantánea %s: %s", self.instantanea.ruta, e)
+        return False
+
+    def guardar_si_cambio(self):
+        # La réplica también se sincroniza desde leer_catalogo(); se guarda lo que haya
+        if not replica_catalogo.sincronizada or replica_catalogo.marca == self.marca_guardada:
+            return False
+        estado = replica_catalogo.estado()
+        if estado['origen'] is None:
+            return False  # Base en memoria: no tiene sentido guardarla para otro proceso
+        try:
+            self.instantanea.guardar(estado)
+        except (OSError, sqlite3.Error) as e:
+            registro.error("No se pudo guardar la instantánea %s: %s", self.instantanea.ruta, e)
+            return False
+        self.marca_guardada = estado['marca']
+        registro.debug("Instantánea guardada en %s (marca %s).", self.instantanea.ruta, estado['marca'])
+        return True
+
+    def _ejecutar(self):
+        while True:
+            self.refrescar()
+            if self._detener.wait(self.intervalo):
+                self.guardar_si_cambio()
+                return
+
+
+_candado = threading.Lock()
+_refresco = None
+_generaciones_vistas = {}
+
+
+def iniciar_instantanea(ruta=None, intervalo=INSTANTANEA_INTERVALO):
+    """
+    Restaura replica_catalogo de la instantánea (si existe y es de esta misma base de datos)
+    y arranca el refresco en segundo plano. No hace nada si ya está iniciada.
+    Args:
+        ruta (str): Archivo de la instantánea; por defecto HOTEL_INSTANTANEA_RUTA.
+        intervalo (float): Segundos entre sincronizaciones en segundo plano.
+    Returns:
+        bool: True si se restauró una instantánea.
+    """
+    global _refresco
+    with _candado:
+        if _refresco is not None:
+            return False
+        instantanea = InstantaneaCatalogo(ruta or INSTANTANEA_RUTA)
+        inicio = time.perf_counter()
+        estado = instantanea.cargar()
+        restaurada = False
+        if estado is not None:
+            origen = obtener_backend().origen
+            if origen is not None and estado['origen'] == origen:
+                replica_catalogo.restaurar(estado)
+                for tabla in TABLAS_SINCRONIZADAS:
+                    _generaciones_vistas[tabla] = cache_catalogo.generacion(tabla)
+                restaurada = True
+                registro.info("Catálogo restaurado de %s en %.3f s (%s, antigüedad %.0f s).", instantanea.ruta,
+                              time.perf_counter() - inicio,
+                              ", ".join(f"{len(estado[tabla])} {tabla}" for tabla in TABLAS_SINCRONIZADAS),
+                              replica_catalogo.antiguedad())
+            else:
+                registro.warning("La instantánea %s es de otra base de datos; se ignora.", instantanea.ruta)
+        _refresco = RefrescoInstantanea(instantanea, intervalo)
+        _refresco.marca_guardada = replica_catalogo.marca if restaurada else None
+        _refresco.iniciar()
+        return restaurada
+
+
+def detener_instantanea():
+    """Detiene el refresco en segundo plano y guarda la instantánea si quedó algo pendiente."""
+    global _refresco
+    with _candado:
+        refresco, _refresco = _refresco, None
+    if refresco is not None:
+        refresco.detener()
+
+
+def preparar_catalogo(tabla):
+    """
+    Deja replica_catalogo lista para leer `tabla` ('habitaciones' o 'servicios'): no toca
+    la red si la réplica es reciente y no hubo escrituras locales en la tabla desde la
+    última sincronización; si no, sincroniza antes.
+    Raises:
+        Las excepciones de base de datos (ERRORES_BD) si hay que sincronizar y no se puede
+        y la réplica supera INSTANTANEA_ANTIGUEDAD_MAXIMA.
+    """
+    iniciar_instantanea()
+    generacion = cache_catalogo.generacion(tabla)
+    if (replica_catalogo.sincronizada and replica_catalogo.antiguedad() <= INSTANTANEA_ANTIGUEDAD_MAXIMA
+            and _generaciones_vistas.get(tabla) == generacion):
+        return
+    try:
+        replica_catalogo.sincronizar()
+    except ERRORES_BD as e:
+        if not replica_catalogo.sincronizada or replica_catalogo.antiguedad() > INSTANTANEA_ANTIGUEDAD_MAXIMA:
+            raise
+        registro.warning("Base de datos no disponible; se sirve el catálogo local (antigüedad %.0f s): %s",
+                         replica_catalogo.antiguedad(), e)
+        return
+    _generaciones_vistas[tabla] = generacion
+
+
+def leer_catalogo(tabla):
+    """
+    Registros de `tabla` según la política de preparar_catalogo().
+    Returns:
+        list: Registros compartidos (no modificarlos, usar copiar()).
+    """
+    preparar_catalogo(tabla)
+    return _registros(tabla)
+
+
+def _registros(tabla):
+    return replica_catalogo.habitaciones() if tabla == 'habitaciones' else replica_catalogo.servicios()
+
+
+def estadisticas_instantanea():
+    """
+    Returns:
+        dict: activa, ruta, antiguedad (s) de la réplica y marca guardada.
+    """
+    refresco = _refresco
+    return {
+        'activa': refresco is not None,
+        'ruta': refresco.instantanea.ruta if refresco is not None else INSTANTANEA_RUTA,
+        'antiguedad': replica_catalogo.antiguedad(),
+        'marca_guardada': refresco.marca_guardada if refresco is not None else None,
+    }
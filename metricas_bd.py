@@ -0,0 +1,296 @@
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# ========== Métricas de acceso a la base de datos ==========
+#
+# conection_bd envuelve las conexiones y cursores que presta en ConexionInstrumentada /
+# CursorInstrumentado, que miden cada consulta bajo el nombre de la operación que la
+# pidió (conexion_bd('obtener_todas_habitaciones')):
+#   - conexion: espera hasta obtener la conexión del pool (y apertura física si hizo falta)
+#   - ejecucion: execute / executemany
+#   - lectura: fetchone / fetchmany / fetchall
+#   - commit
+#   - filas: filas leídas (o afectadas, en escrituras) por consulta
+# Las consultas cuya ejecución + lectura supera UMBRAL_CONSULTA_LENTA se registran en el
+# logger 'hotel.bd.lentas'. texto_prometheus() vuelca todo en el formato de texto de
+# Prometheus.
+
+METRICAS_ACTIVAS = os.environ.get("HOTEL_METRICAS", "1") != "0"
+UMBRAL_CONSULTA_LENTA = float(os.environ.get("HOTEL_UMBRAL_CONSULTA_LENTA_MS", "200")) / 1000
+NIVEL_REGISTRO = os.environ.get("HOTEL_LOG_NIVEL", "WARNING")
+
+# Límites superiores de los intervalos de los histogramas
+INTERVALOS_SEGUNDOS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                       0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+INTERVALOS_FILAS = (0, 1, 10, 100, 1000, 10000, 100000, 1000000)
+
+registro_lentas = logging.getLogger("hotel.bd.lentas")
+
+
+def configurar_registro(nivel=None):
+    """
+    Configura el logging de la aplicación (formato y nivel). Con nivel DEBUG o INFO se ven
+    los mensajes de detalle de las funciones *_bd; con WARNING (por defecto) solo avisos,
+    errores y consultas lentas.
+    Args:
+        nivel (str | int): Nivel de logging; por defecto HOTEL_LOG_NIVEL.
+    """
+    nivel = nivel or NIVEL_REGISTRO
+    if isinstance(nivel, str):
+        nivel = logging.getLevelName(nivel.upper())
+    logging.basicConfig(level=nivel, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    logging.getLogger().setLevel(nivel)
+
+
+class Histograma:
+    """Histograma acumulativo con intervalos fijos, seguro entre hilos."""
+
+    __slots__ = ('intervalos', '_cuentas', '_suma', '_total', '_candado')
+
+    def __init__(self, intervalos):
+        self.intervalos = intervalos
+        self._cuentas = [0] * (len(intervalos) + 1)  # El último es +Inf
+        self._suma = 0.0
+        self._total = 0
+        self._candado = threading.Lock()
+
+    def observar(self, valor):
+        indice = bisect_left(self.intervalos, valor)
+        with self._candado:
+            self._cuentas[indice] += 1
+            self._suma += valor
+            self._total += 1
+
+    def instantanea(self):
+        """Devuelve (cuentas acumuladas por intervalo, suma, total)."""
+        with self._candado:
+            cuentas, suma, total = list(self._cuentas), self._suma, self._total
+        acumuladas = []
+        acumulado = 0
+        for cuenta in cuentas:
+            acumulado += cuenta
+            acumuladas.append(acumulado)
+        return acumuladas, suma, total
+
+
+class MetricasBD:
+    """Registro de histogramas y contadores por operación."""
+
+    def __init__(self, umbral_lenta=UMBRAL_CONSULTA_LENTA):
+        self.umbral_lenta = umbral_lenta
+        self._histogramas = {}  # (métrica, operación) -> Histograma
+        self._contadores = {}   # (métrica, operación) -> int
+        self._candado = threading.Lock()
+
+    def _histograma(self, metrica, operacion, intervalos):
+        clave = (metrica, operacion)
+        histograma = self._histogramas.get(clave)
+        if histograma is None:
+            with self._candado:
+                histograma = self._histogramas.setdefault(clave, Histograma(intervalos))
+        return histograma
+
+    def observar(self, metrica, operacion, segundos):
+        """Añade una duración al histograma `metrica` de `operacion`."""
+        self._histograma(metrica, operacion, INTERVALOS_SEGUNDOS).observar(segundos)
+
+    def contar(self, metrica, operacion, cantidad=1):
+        with self._candado:
+            self._contadores[(metrica, operacion)] = self._contadores.get((metrica, operacion), 0) + cantidad
+
+    def registrar_consulta(self, operacion, sql, ejecucion, lectura, filas):
+        """Registra una consulta terminada y la anota en el log de lentas si procede."""
+        self.observar('ejecucion', operacion, ejecucion)
+        if lectura:
+            self.observar('lectura', operacion, lectura)
+        self._histograma('filas', operacion, INTERVALOS_FILAS).observar(filas)
+        total = ejecucion + lectura
+        if total >= self.umbral_lenta:
+            self.contar('consultas_lentas', operacion)
+            registro_lentas.warning("Consulta lenta en %s: %.1f ms (ejecución %.1f ms, lectura %.1f ms, "
+                                    "%d filas): %s", operacion, total * 1000, ejecucion * 1000,
+                                    lectura * 1000, filas, " ".join(str(sql).split()))
+
+    def reiniciar(self):
+        with self._candado:
+            self._histogramas.clear()
+            self._contadores.clear()
+
+    def resumen(self):
+        """
+        Returns:
+            dict: {operación: {métrica: {'total', 'suma'} o contador}} para inspección rápida.
+        """
+        with self._candado:
+            histogramas = dict(self._histogramas)
+            contadores = dict(self._contadores)
+        resumen = {}
+        for (metrica, operacion), histograma in histogramas.items():
+            _, suma, total = histograma.instantanea()
+            resumen.setdefault(operacion, {})[metrica] = {'total': total, 'suma': suma}
+        for (metrica, operacion), valor in contadores.items():
+            resumen.setdefault(operacion, {})[metrica] = valor
+        return resumen
+
+    def texto_prometheus(self, prefijo="hotel_bd"):
+        """Devuelve las métricas en el formato de exposición de texto de Prometheus."""
+        with self._candado:
+            histogramas = sorted(self._histogramas.items())
+            contadores = sorted(self._contadores.items())
+        lineas = []
+        metrica_anterior = None
+        for (metrica, operacion), histograma in histogramas:
+            nombre = f"{prefijo}_{metrica}" if metrica == 'filas' else f"{prefijo}_{metrica}_segundos"
+            if metrica != metrica_anterior:
+                lineas.append(f"# TYPE {nombre} histogram")
+                metrica_anterior = metrica
+            acumuladas, suma, total = histograma.instantanea()
+            for limite, cuenta in zip(histograma.intervalos, acumuladas):
+                lineas.append(f'{nombre}_bucket{{operacion="{operacion}",le="{limite}"}} {cuenta}')
+            lineas.append(f'{nombre}_bucket{{operacion="{operacion}",le="+Inf"}} {acumuladas[-1]}')
+            lineas.append(f'{nombre}_sum{{operacion="{operacion}"}} {suma}')
+            lineas.append(f'{nombre}_count{{operacion="{operacion}"}} {total}')
+        metrica_anterior = None
+        for (metrica, operacion), valor in contadores:
+            nombre = f"{prefijo}_{metrica}_total"
+            if metrica != metrica_anterior:
+                lineas.append(f"# TYPE {nombre} counter")
+                metrica_anterior = metrica
+            lineas.append(f'{nombre}{{operacion="{operacion}"}} {valor}')
+        return "\n".join(lineas) + "\n"
+
+
+# Registro global que usan conection_bd y los módulos CRUD
+metricas = MetricasBD()
+
+
+class CursorInstrumentado:
+    """
+    Envoltorio de un cursor del driver que mide sus consultas. Los atributos que no
+    redefine (description, rowcount, fast_executemany...) se leen y escriben en el cursor real.
+    """
+
+    __slots__ = ('_cursor', '_operacion', '_sql', '_ejecucion', '_lectura', '_filas', '_leidas', '_pendiente')
+
+    def __init__(self, cursor, operacion):
+        object.__setattr__(self, '_cursor', cursor)
+        object.__setattr__(self, '_operacion', operacion)
+        object.__setattr__(self, '_pendiente', False)
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
+
+    def __setattr__(self, nombre, valor):
+        if nombre in CursorInstrumentado.__slots__:
+            object.__setattr__(self, nombre, valor)
+        else:
+            setattr(self._cursor, nombre, valor)
+
+    def _ejecutar(self, metodo, sql, parametros):
+        self.finalizar()
+        inicio = time.perf_counter()
+        try:
+            metodo(sql, *parametros)
+        except Exception:
+            metricas.contar('errores', self._operacion)
+            raise
+        self._sql = sql
+        self._ejecucion = time.perf_counter() - inicio
+        self._lectura = 0.0
+        self._filas = 0
+        self._leidas = False
+        self._pendiente = True
+        return self
+
+    def execute(self, sql, *parametros):
+        return self._ejecutar(self._cursor.execute, sql, parametros)
+
+    def executemany(self, sql, *parametros):
+        return self._ejecutar(self._cursor.executemany, sql, parametros)
+
+    def _leer(self, metodo, *argumentos):
+        inicio = time.perf_counter()
+        resultado = metodo(*argumentos)
+        if self._pendiente:
+            self._lectura += time.perf_counter() - inicio
+            self._leidas = True
+        return resultado
+
+    def fetchone(self):
+        fila = self._leer(self._cursor.fetchone)
+        if fila is not None and self._pendiente:
+            self._filas += 1
+        return fila
+
+    def fetchmany(self, *tamano):
+        filas = self._leer(self._cursor.fetchmany, *tamano)
+        if self._pendiente:
+            self._filas += len(filas)
+        return filas
+
+    def fetchall(self):
+        filas = self._leer(self._cursor.fetchall)
+        if self._pendiente:
+            self._filas += len(filas)
+        return filas
+
+    def __iter__(self):
+        while True:
+            filas = self.fetchmany(500)
+            if not filas:
+                return
+            yield from filas
+
+    def finalizar(self):
+        """Registra la última consulta del cursor, si no se había registrado ya."""
+        if not self._pendiente:
+            return
+        self._pendiente = False
+        filas = self._filas
+        if not self._leidas:
+            try:
+                filas = max(self._cursor.rowcount, 0)  # Filas afectadas por una escritura
+            except Exception:
+                filas = 0
+        metricas.registrar_consulta(self._operacion, self._sql, self._ejecucion, self._lectura, filas)
+
+    def close(self):
+        self.finalizar()
+        self._cursor.close()
+
+
+class ConexionInstrumentada:
+    """Envoltorio de una conexión cuyos cursores son CursorInstrumentado."""
+
+    __slots__ = ('_conexion', '_operacion', '_cursores')
+
+    def __init__(self, conexion, operacion):
+        self._conexion = conexion
+        self._operacion = operacion
+        self._cursores = []
+
+    def __getattr__(self, nombre):
+        return getattr(self._conexion, nombre)
+
+    def cursor(self):
+        cursor = CursorInstrumentado(self._conexion.cursor(), self._operacion)
+        self._cursores.append(cursor)
+        return cursor
+
+    def commit(self):
+        inicio = time.perf_counter()
+        self._conexion.commit()
+        metricas.observar('commit', self._operacion, time.perf_counter() - inicio)
+
+    def finalizar(self):
+        """Registra las consultas pendientes de todos los cursores abiertos con esta conexión."""
+        for cursor in self._cursores:
+            cursor.finalizar()
+        self._cursores = []
+
+    def close(self):
+        self.finalizar()
+        self._conexion.close()
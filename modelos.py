@@ -0,0 +1,190 @@
+from operator import itemgetter
+
+# ========== Registros de habitaciones y servicios ==========
+#
+# Las consultas devuelven objetos con __slots__ en lugar de un diccionario por fila: ocupan
+# bastante menos memoria en listados grandes y se construyen pasando la fila directamente
+# al constructor. El orden de las columnas se resuelve una sola vez por consulta
+# (Registro.constructor) a partir de cursor.description.
+#
+# Para no romper el código que los trata como diccionarios, los registros admiten
+# registro['campo'], .get(), `in`, keys()/items(), update() y dict(registro). Los nombres
+# de campo no distinguen mayúsculas: habitacion['Lugar_Turistico'] y
+# habitacion['lugar_turistico'] son el mismo campo.
+
+
+class Registro:
+    """Base de los registros: acceso por atributo y por clave sin distinguir mayúsculas."""
+
+    __slots__ = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._campos_por_nombre = {campo.lower(): campo for campo in cls.__slots__}
+
+    @classmethod
+    def _campo(cls, clave):
+        campo = cls._campos_por_nombre.get(clave.lower()) if isinstance(clave, str) else None
+        if campo is None:
+            raise KeyError(clave)
+        return campo
+
+    @classmethod
+    def constructor(cls, descripcion):
+        """
+        Devuelve una función fila -> registro para las columnas de `descripcion`
+        (cursor.description). Las columnas desconocidas se ignoran y los campos que la
+        consulta no trae quedan en None.
+        """
+        nombres = tuple(cls._campos_por_nombre.get(columna[0].lower()) for columna in descripcion)
+        conocidas = len(nombres)
+        while conocidas and nombres[conocidas - 1] is None:
+            conocidas -= 1
+        if nombres[:conocidas] == cls.__slots__[:conocidas]:
+            # Mismas columnas y en el mismo orden: la fila va directa al constructor, sin
+            # las columnas desconocidas del final (p. ej. `cambio` en SELECT *)
+            if conocidas == len(nombres):
+                return lambda fila: cls(*fila)
+            return lambda fila: cls(*fila[:conocidas])
+        posiciones = [posicion for posicion, nombre in enumerate(nombres) if nombre is not None]
+        campos = [nombres[posicion] for posicion in posiciones]
+        if not posiciones:
+            return lambda fila: cls()
+        if len(posiciones) == 1:
+            posicion, campo = posiciones[0], campos[0]
+            return lambda fila: cls(**{campo: fila[posicion]})
+        extraer = itemgetter(*posiciones)
+        return lambda fila: cls(**dict(zip(campos, extraer(fila))))
+
+    @classmethod
+    def desde_cursor(cls, cursor, filas):
+        """Convierte `filas` (leídas de `cursor`) en una lista de registros."""
+        return list(map(cls.constructor(cursor.description), filas))
+
+    @classmethod
+    def desde_fila(cls, cursor, fila):
+        """Convierte una fila de `cursor` (o None) en un registro (o None)."""
+        return None if fila is None else cls.constructor(cursor.description)(fila)
+
+    # ---------- Compatibilidad con diccionarios ----------
+
+    def __getitem__(self, clave):
+        return getattr(self, self._campo(clave))
+
+    def __setitem__(self, clave, valor):
+        setattr(self, self._campo(clave), valor)
+
+    def __contains__(self, clave):
+        return isinstance(clave, str) and clave.lower() in self._campos_por_nombre
+
+    def get(self, clave, defecto=None):
+        try:
+            return self[clave]
+        except KeyError:
+            return defecto
+
+    def keys(self):
+        return self.__slots__
+
+    def values(self):
+        return [getattr(self, campo) for campo in self.__slots__]
+
+    def items(self):
+        return [(campo, getattr(self, campo)) for campo in self.__slots__]
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def update(self, otros=(), **cambios):
+        for clave, valor in dict(otros, **cambios).items():
+            self[clave] = valor
+
+    def copiar(self, **cambios):
+        """Devuelve una copia con los cambios indicados (los registros cacheados no se modifican)."""
+        copia = type(self)(*self.values())
+        copia.update(cambios)
+        return copia
+
+    def a_dict(self):
+        return dict(zip(self.__slots__, self.values()))
+
+    def __eq__(self, otro):
+        if type(otro) is type(self):
+            return self.values() == otro.values()
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        campos = ", ".join(f"{campo}={getattr(self, campo)!r}" for campo in self.__slots__)
+        return f"{type(self).__name__}({campos})"
+
+
+class Habitacion(Registro):
+    """Fila de dbohabitaciones. Los campos siguen el orden de las columnas de la tabla."""
+
+    __slots__ = ('id', 'descripcion', 'camas', 'banos', 'vista', 'balcon', 'precio', 'disponible',
+                 'lugar_turistico', 'version')
+
+    def __init__(self, id=None, descripcion=None, camas=None, banos=None, vista=None, balcon=None,
+                 precio=None, disponible=None, lugar_turistico=None, version=None):
+        self.id = id
+        self.descripcion = descripcion
+        self.camas = camas
+        self.banos = banos
+        self.vista = vista
+        self.balcon = balcon
+        self.precio = precio
+        self.disponible = disponible
+        self.lugar_turistico = lugar_turistico
+        self.version = version
+
+
+class Servicio(Registro):
+    """Fila de servicios."""
+
+    __slots__ = ('id', 'nombre', 'precio')
+
+    def __init__(self, id=None, nombre=None, precio=None):
+        self.id = id
+        self.nombre = nombre
+        self.precio = precio
+
+
+class ReglaPrecio(Registro):
+    """
+    Fila de reglas_precio: ajuste porcentual del precio de las habitaciones o servicios
+    que cumplen los filtros (los None no filtran), vigente las noches de [desde, hasta).
+    """
+
+    __slots__ = ('id', 'ambito', 'porcentaje', 'vista', 'camas', 'balcon', 'patron', 'desde', 'hasta',
+                 'descripcion')
+
+    def __init__(self, id=None, ambito=None, porcentaje=None, vista=None, camas=None, balcon=None,
+                 patron=None, desde=None, hasta=None, descripcion=None):
+        self.id = id
+        self.ambito = ambito
+        self.porcentaje = porcentaje
+        self.vista = vista
+        self.camas = camas
+        self.balcon = balcon
+        self.patron = patron
+        self.desde = desde
+        self.hasta = hasta
+        self.descripcion = descripcion
+
+
+class Reserva(Registro):
+    """Fila de ocupacion_habitaciones con motivo 'reserva' (reservas.obtener_reservas)."""
+
+    __slots__ = ('id', 'habitacion_id', 'desde', 'hasta', 'huesped')
+
+    def __init__(self, id=None, habitacion_id=None, desde=None, hasta=None, huesped=None):
+        self.id = id
+        self.habitacion_id = habitacion_id
+        self.desde = desde
+        self.hasta = hasta
+        self.huesped = huesped
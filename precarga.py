@@ -0,0 +1,195 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from cache_bd import cache_catalogo
+from conection_bd import precalentar_pool, ERRORES_BD
+
+registro = logging.getLogger(__name__)
+
+# ========== Precarga en segundo plano ==========
+#
+# Mientras el usuario lee un menú, unos pocos hilos en segundo plano adelantan el trabajo
+# que probablemente pedirá a continuación:
+#   - Al arrancar se abren las conexiones del pool (precalentar_pool), de modo que la
+#     primera consulta no espera al inicio de sesión en el servidor.
+#   - Al entrar en un menú se lanzan las consultas de su opción más probable (las
+#     habitaciones disponibles en el menú de cliente, los servicios en el de servicios...)
+#     y al mostrar una página, la siguiente.
+#
+# Una precarga se identifica por una clave. Las que llenan la caché de catálogos no
+# necesitan más: la opción del menú encuentra el dato en la caché (o espera a la carga en
+# curso, sin repetirla). Para las consultas que no se cachean, tomar(clave, ...) entrega
+# el resultado precargado (esperando si aún está en curso) o, si no lo hay, caducó o se
+# invalidó su espacio de la caché, ejecuta la consulta en el momento.
+#
+# cancelar() descarta precargas: las que aún no empezaron no llegan a ejecutarse, las
+# cancelables en curso se detienen (la apertura de conexiones, entre una y otra) y el
+# resultado de las demás se ignora.
+
+PRECARGA_ACTIVA = os.environ.get("HOTEL_PRECARGA", "1") != "0"
+PRECARGA_HILOS = int(os.environ.get("HOTEL_PRECARGA_HILOS", "2"))
+PRECARGA_TTL = float(os.environ.get("HOTEL_PRECARGA_TTL", "30"))
+# Conexiones que se abren al arrancar
+PRECARGA_CONEXIONES = int(os.environ.get("HOTEL_PRECARGA_CONEXIONES", "2"))
+
+
+class _Precarga:
+    __slots__ = ('futuro', 'cancelado', 'instante', 'espacio', 'generacion')
+
+    def __init__(self, futuro, cancelado, espacio):
+        self.futuro = futuro
+        self.cancelado = cancelado
+        self.instante = time.monotonic()
+        self.espacio = espacio
+        self.generacion = None if espacio is None else cache_catalogo.generacion(espacio)
+
+
+class Precargador:
+    """
+    Ejecuta precargas en un ejecutor de hilos propio, sin ocupar el de la API asíncrona.
+    Args:
+        hilos (int): Precargas simultáneas.
+        ttl (float): Segundos durante los que un resultado precargado se considera válido.
+    """
+
+    def __init__(self, hilos=PRECARGA_HILOS, ttl=PRECARGA_TTL):
+        self.hilos = max(hilos, 1)
+        self.ttl = ttl
+        self._candado = threading.Lock()
+        self._precargas = {}
+        self._ejecutor = None
+        self._estadisticas = {'lanzadas': 0, 'aprovechadas': 0, 'descartadas': 0, 'canceladas': 0}
+
+    def _vigente(self, precarga):
+        if time.monotonic() - precarga.instante > self.ttl:
+            return False
+        return precarga.espacio is None or cache_catalogo.generacion(precarga.espacio) == precarga.generacion
+
+    def precargar(self, clave, funcion, *args, espacio=None, cancelable=False, **kwargs):
+        """
+        Lanza `funcion(*args, **kwargs)` en segundo plano, salvo que ya haya una precarga
+        vigente con la misma clave.
+        Args:
+            clave (hashable): Identifica la precarga para tomar() y cancelar().
+            funcion (callable): Consulta a adelantar.
+            espacio (str): Espacio de nombres de la caché cuyos cambios invalidan el resultado.
+            cancelable (bool): Pasar a `funcion` un threading.Event `cancelado` que se activa
+                al cancelar, para que pueda detenerse aunque ya haya empezado.
+        Returns:
+            concurrent.futures.Future: El futuro de la precarga.
+        """
+        with self._candado:
+            precarga = self._precargas.get(clave)
+            if precarga is not None and not precarga.futuro.cancelled() and self._vigente(precarga):
+                return precarga.futuro
+            if self._ejecutor is None:
+                self._ejecutor = ThreadPoolExecutor(max_workers=self.hilos, thread_name_prefix="hotel-precarga")
+            cancelado = threading.Event()
+            if cancelable:
+                kwargs['cancelado'] = cancelado
+            futuro = self._ejecutor.submit(self._ejecutar, clave, funcion, args, kwargs)
+            self._precargas[clave] = _Precarga(futuro, cancelado, espacio)
+            self._estadisticas['lanzadas'] += 1
+            return futuro
+
+    @staticmethod
+    def _ejecutar(clave, funcion, args, kwargs):
+        inicio = time.perf_counter()
+        try:
+            return funcion(*args, **kwargs)
+        except ERRORES_BD as e:
+            registro.debug("Precarga %r fallida: %s", clave, e)
+            raise
+        finally:
+            registro.debug("Precarga %r en %.3f s.", clave, time.perf_counter() - inicio)
+
+    def tomar(self, clave, funcion, *args, **kwargs):
+        """
+        Devuelve el resultado precargado de `clave` (esperándolo si está en curso) o, si no
+        hay uno válido, el de llamar ahora a `funcion(*args, **kwargs)`. Cada precarga se
+        entrega una sola vez.
+        """
+        with self._candado:
+            precarga = self._precargas.pop(clave, None)
+        if precarga is not None:
+            if self._vigente(precarga):
+                try:
+                    resultado = precarga.futuro.result()
+                except Exception:
+                    pass  # Cancelada o fallida: se repite en primer plano, que informa del error
+                else:
+                    with self._candado:
+                        self._estadisticas['aprovechadas'] += 1
+                    return resultado
+            with self._candado:
+                self._estadisticas['descartadas'] += 1
+        return funcion(*args, **kwargs)
+
+    def cancelar(self, clave=None):
+        """
+        Cancela la precarga de `clave`, o todas si es None.
+        Returns:
+            int: Precargas canceladas.
+        """
+        with self._candado:
+            if clave is None:
+                canceladas, self._precargas = list(self._precargas.values()), {}
+            else:
+                precarga = self._precargas.pop(clave, None)
+                canceladas = [] if precarga is None else [precarga]
+            self._estadisticas['canceladas'] += len(canceladas)
+        for precarga in canceladas:
+            precarga.cancelado.set()
+            precarga.futuro.cancel()
+        return len(canceladas)
+
+    def cerrar(self):
+        """Cancela las precargas pendientes y detiene los hilos sin esperar a las que están en curso."""
+        self.cancelar()
+        with self._candado:
+            ejecutor, self._ejecutor = self._ejecutor, None
+        if ejecutor is not None:
+            ejecutor.shutdown(wait=False, cancel_futures=True)
+
+    def estadisticas(self):
+        """
+        Returns:
+            dict: lanzadas, aprovechadas, descartadas, canceladas y pendientes.
+        """
+        with self._candado:
+            estadisticas = dict(self._estadisticas)
+            estadisticas['pendientes'] = sum(not precarga.futuro.done() for precarga in self._precargas.values())
+        return estadisticas
+
+
+# Precargador compartido por los menús de consola
+precargador = Precargador()
+
+
+def precargar(clave, funcion, *args, **kwargs):
+    """Como Precargador.precargar() con el precargador compartido; no hace nada si HOTEL_PRECARGA=0."""
+    if PRECARGA_ACTIVA:
+        precargador.precargar(clave, funcion, *args, **kwargs)
+
+
+def tomar(clave, funcion, *args, **kwargs):
+    """Como Precargador.tomar() con el precargador compartido."""
+    if PRECARGA_ACTIVA:
+        return precargador.tomar(clave, funcion, *args, **kwargs)
+    return funcion(*args, **kwargs)
+
+
+def cancelar_precargas(clave=None):
+    return precargador.cancelar(clave)
+
+
+def iniciar_precarga(conexiones=PRECARGA_CONEXIONES):
+    """Empieza a abrir `conexiones` conexiones del pool en segundo plano (al arrancar la aplicación)."""
+    precargar('conexiones', precalentar_pool, conexiones, cancelable=True)
+
+
+def cerrar_precarga():
+    precargador.cerrar()
@@ -0,0 +1,410 @@
+import argparse
+import functools
+import logging
+import re
+import sys
+from datetime import date
+from decimal import Decimal, ROUND_HALF_UP
+
+from cache_bd import cache_catalogo, invalidar_habitaciones, invalidar_servicios
+from conection_bd import conexion_bd, transaccion, al_confirmar, obtener_backend, ERRORES_BD
+from disponibilidad import a_fecha
+from modelos import ReglaPrecio
+import CRUD_habitaciones
+import CRUD_servicios
+
+registro = logging.getLogger(__name__)
+
+# ========== Reglas de precio ==========
+#
+# Una regla es un ajuste porcentual (+15, -10...) sobre las habitaciones o los servicios que
+# cumplen sus filtros: vista, camas y balcón para habitaciones; un patrón LIKE sobre el
+# nombre para servicios (la tabla servicios no tiene categoría, así que "los servicios de
+# spa" se expresan como patron='%spa%'). Las reglas se usan de dos formas:
+#
+#   - Ajustes permanentes (aplicar_ajustes): reescriben el precio base. Las habitaciones se
+#     actualizan con un UPDATE por regla sobre todas las filas que cumplen los filtros y los
+#     servicios con llamadas en bloque a sp_editar_servicio, todo en una transacción.
+#     simular_ajustes() calcula el resultado en memoria, sobre el catálogo cacheado, sin
+#     tocar la BD.
+#   - Reglas de temporada (tabla reglas_precio, guardar_regla_bd): no cambian el precio
+#     base; se aplican al calcular el precio de una noche concreta (precio_en_fecha), solo
+#     entre `desde` y `hasta`. Varias reglas vigentes se acumulan en orden de id.
+
+AMBITOS = ('habitaciones', 'servicios')
+_CENTIMO = Decimal('0.01')
+
+
+def nueva_regla(ambito, porcentaje, vista=None, camas=None, balcon=None, patron=None, desde=None, hasta=None,
+                descripcion=None):
+    """
+    Crea y valida una ReglaPrecio.
+    Args:
+        ambito (str): 'habitaciones' o 'servicios'.
+        porcentaje (float): Ajuste en tanto por ciento (negativo para descuentos).
+        vista, camas, balcon: Filtros de habitaciones (None = cualquiera).
+        patron (str): Patrón LIKE sobre el nombre del servicio ('%spa%').
+        desde, hasta (date | str): Noches de vigencia [desde, hasta) de una regla de temporada.
+        descripcion (str): Texto libre.
+    Returns:
+        ReglaPrecio: La regla.
+    Raises:
+        ValueError: Si la regla no es válida.
+    """
+    regla = ReglaPrecio(None, ambito, porcentaje, vista, camas, balcon, patron,
+                        None if desde in (None, '') else a_fecha(desde),
+                        None if hasta in (None, '') else a_fecha(hasta), descripcion)
+    _validar(regla)
+    return regla
+
+
+def _validar(regla):
+    if regla.ambito not in AMBITOS:
+        raise ValueError(f"Ámbito desconocido {regla.ambito!r}. Opciones: {', '.join(AMBITOS)}")
+    if regla.porcentaje is None or float(regla.porcentaje) <= -100:
+        raise ValueError("El porcentaje debe ser mayor que -100.")
+    if regla.ambito == 'habitaciones' and regla.patron is not None:
+        raise ValueError("El patrón de nombre solo se aplica a servicios.")
+    if regla.ambito == 'servicios' and any(valor is not None for valor in (regla.vista, regla.camas, regla.balcon)):
+        raise ValueError("Vista, camas y balcón solo se aplican a habitaciones.")
+    if regla.desde is not None and regla.hasta is not None and a_fecha(regla.hasta) <= a_fecha(regla.desde):
+        raise ValueError("La fecha final de la regla debe ser posterior a la inicial.")
+
+
+def factor(regla):
+    return 1 + float(regla.porcentaje) / 100
+
+
+def redondear(precio):
+    """Redondea un precio a céntimos (mitades hacia arriba, como ROUND en la BD)."""
+    if isinstance(precio, Decimal):
+        return precio.quantize(_CENTIMO, rounding=ROUND_HALF_UP)
+    return float(Decimal(repr(float(precio))).quantize(_CENTIMO, rounding=ROUND_HALF_UP))
+
+
+def _ajustar(precio, regla):
+    if isinstance(precio, Decimal):
+        return redondear(precio * Decimal(repr(factor(regla))))
+    return redondear(float(precio) * factor(regla))
+
+
+@functools.lru_cache(maxsize=128)
+def _patron_regex(patron):
+    # LIKE -> expresión regular: % es cualquier texto y _ un carácter; sin distinguir mayúsculas
+    partes = (".*" if caracter == '%' else "." if caracter == '_' else re.escape(caracter) for caracter in patron)
+    return re.compile("".join(partes), re.IGNORECASE | re.DOTALL)
+
+
+def coincide(regla, elemento):
+    """Indica si la habitación o el servicio `elemento` cumple los filtros de `regla`."""
+    if regla.ambito == 'servicios':
+        return regla.patron is None or _patron_regex(regla.patron).fullmatch(elemento['nombre'] or "") is not None
+    if regla.vista is not None and (elemento['vista'] or "").strip().lower() != regla.vista.strip().lower():
+        return False
+    if regla.camas is not None and elemento['camas'] != int(regla.camas):
+        return False
+    if regla.balcon is not None and bool(elemento['balcon']) != bool(regla.balcon):
+        return False
+    return True
+
+
+def vigente(regla, fecha):
+    """Indica si la regla se aplica a la noche `fecha`."""
+    fecha = a_fecha(fecha)
+    return ((regla.desde is None or a_fecha(regla.desde) <= fecha)
+            and (regla.hasta is None or fecha < a_fecha(regla.hasta)))
+
+
+def _condiciones_habitaciones(regla):
+    condiciones, parametros = [], []
+    if regla.vista is not None:
+        # Igual que coincide(): sin distinguir mayúsculas ni espacios de los extremos
+        condiciones.append("LOWER(LTRIM(RTRIM(vista))) = ?")
+        parametros.append(regla.vista.strip().lower())
+    if regla.camas is not None:
+        condiciones.append("camas = ?")
+        parametros.append(int(regla.camas))
+    if regla.balcon is not None:
+        condiciones.append("balcon = ?")
+        parametros.append(1 if regla.balcon else 0)
+    return condiciones, parametros
+
+
+def _catalogo(ambito):
+    if ambito == 'habitaciones':
+        return CRUD_habitaciones.obtener_todas_habitaciones()
+    return CRUD_servicios.obtener_todos_servicios_bd()
+
+
+# ---------- Ajustes permanentes del precio base ----------
+
+def simular_ajustes(reglas):
+    """
+    Calcula en memoria, sobre el catálogo cacheado, el efecto de aplicar `reglas` en orden.
+    Returns:
+        list: Un dict por elemento cuyo precio cambia: {'ambito', 'id', 'nombre',
+              'precio_actual', 'precio_nuevo'}, en el orden del catálogo.
+    """
+    for regla in reglas:
+        _validar(regla)
+    cambios = []
+    for ambito in AMBITOS:
+        reglas_ambito = [regla for regla in reglas if regla.ambito == ambito]
+        if not reglas_ambito:
+            continue
+        for elemento in _catalogo(ambito):
+            precio = elemento['precio']
+            for regla in reglas_ambito:
+                if coincide(regla, elemento):
+                    precio = _ajustar(precio, regla)
+            if precio != elemento['precio']:
+                nombre = elemento['nombre'] if ambito == 'servicios' else elemento['descripcion']
+                cambios.append({'ambito': ambito, 'id': elemento['id'], 'nombre': nombre,
+                                'precio_actual': elemento['precio'], 'precio_nuevo': precio})
+    return cambios
+
+
+def _ajustar_habitaciones(cursor, regla):
+    condiciones, parametros = _condiciones_habitaciones(regla)
+    sql = "UPDATE dbohabitaciones SET precio = ROUND(precio * ?, 2), version = version + 1"
+    if condiciones:
+        sql += " WHERE " + " AND ".join(condiciones)
+    cursor.execute(sql, [factor(regla)] + parametros)
+    return max(cursor.rowcount, 0)
+
+
+def _ajustar_servicios(cursor, regla, usuario_id):
+    # Los servicios se escriben siempre con sp_editar_servicio (que registra al usuario)
+    sql = "SELECT id, nombre, precio FROM dbo.servicios"
+    parametros = []
+    if regla.patron is not None:
+        sql += " WHERE nombre LIKE ?"
+        parametros.append(regla.patron)
+    cursor.execute(sql, parametros)
+    llamadas = [(usuario_id, id_servicio, nombre, _ajustar(precio, regla))
+                for id_servicio, nombre, precio in cursor.fetchall()]
+    if llamadas:
+        cursor.executemany("{CALL sp_editar_servicio(?, ?, ?, ?)}", llamadas)
+    return len(llamadas)
+
+
+def aplicar_ajustes(reglas, usuario_id=None, simular=False):
+    """
+    Reescribe el precio base de las habitaciones y servicios que cumplen cada regla, en una
+    sola transacción (si una regla falla no se aplica ninguna).
+    Args:
+        reglas (list): ReglaPrecio a aplicar en orden. Sus fechas se ignoran.
+        usuario_id (int): Usuario que figura en sp_editar_servicio (obligatorio si hay reglas de servicios).
+        simular (bool): Si es True no escribe nada y devuelve simular_ajustes(reglas).
+    Returns:
+        dict: {'habitaciones': n, 'servicios': n} con las filas actualizadas por cada regla
+              (una fila afectada por dos reglas cuenta dos veces), o la lista de cambios si `simular`.
+    Raises:
+        ValueError: Si una regla no es válida o falta usuario_id.
+        ERRORES_BD / ErrorTransaccion: Si falla la BD (no se aplicó nada).
+    """
+    if simular:
+        return simular_ajustes(reglas)
+    for regla in reglas:
+        _validar(regla)
+    if usuario_id is None and any(regla.ambito == 'servicios' for regla in reglas):
+        raise ValueError("Los ajustes de servicios requieren el usuario que los realiza.")
+    actualizadas = {ambito: 0 for ambito in AMBITOS}
+    with transaccion('aplicar_ajustes_precio'):
+        with conexion_bd('aplicar_ajustes_precio') as conexion:
+            cursor = conexion.cursor()
+            if obtener_backend().soporta_fast_executemany:
+                cursor.fast_executemany = True
+            for regla in reglas:
+                if regla.ambito == 'habitaciones':
+                    actualizadas['habitaciones'] += _ajustar_habitaciones(cursor, regla)
+                else:
+                    actualizadas['servicios'] += _ajustar_servicios(cursor, regla, usuario_id)
+        if actualizadas['habitaciones']:
+            al_confirmar(invalidar_habitaciones)
+        if actualizadas['servicios']:
+            al_confirmar(invalidar_servicios)
+    registro.info("Ajustes de precio aplicados: %s", actualizadas)
+    return actualizadas
+
+
+# ---------- Reglas de temporada ----------
+
+def guardar_regla_bd(regla):
+    """
+    Guarda una regla de temporada en reglas_precio.
+    Returns:
+        bool: True si se guardó.
+    """
+    _validar(regla)
+    try:
+        with conexion_bd('guardar_regla_bd') as conexion:
+            cursor = conexion.cursor()
+            cursor.execute("""
+                INSERT INTO reglas_precio (ambito, porcentaje, vista, camas, balcon, patron, desde, hasta, descripcion)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (regla.ambito, regla.porcentaje, regla.vista, regla.camas,
+                  None if regla.balcon is None else (1 if regla.balcon else 0), regla.patron,
+                  None if regla.desde is None else a_fecha(regla.desde).isoformat(),
+                  None if regla.hasta is None else a_fecha(regla.hasta).isoformat(), regla.descripcion))
+            conexion.commit()
+    except ERRORES_BD as e:
+        registro.error("Error al guardar la regla de precio: %s", e)
+        return False
+    al_confirmar(invalidar_reglas)
+    return True
+
+
+def eliminar_regla_bd(id_regla):
+    try:
+        with conexion_bd('eliminar_regla_bd') as conexion:
+            cursor = conexion.cursor()
+            cursor.execute("DELETE FROM reglas_precio WHERE id = ?", (id_regla,))
+            eliminada = cursor.rowcount > 0
+            conexion.commit()
+    except ERRORES_BD as e:
+        registro.error("Error al eliminar la regla de precio: %s", e)
+        return False
+    al_confirmar(invalidar_reglas)
+    return eliminada
+
+
+def _cargar_reglas():
+    with conexion_bd('cargar_reglas_precio') as conexion:
+        cursor = conexion.cursor()
+        cursor.execute("SELECT * FROM reglas_precio ORDER BY id")
+        reglas = ReglaPrecio.desde_cursor(cursor, cursor.fetchall())
+    for regla in reglas:
+        regla.desde = None if regla.desde is None else a_fecha(regla.desde)
+        regla.hasta = None if regla.hasta is None else a_fecha(regla.hasta)
+    return reglas
+
+
+def obtener_reglas(ambito=None):
+    """Reglas de temporada guardadas (cacheadas; no modificarlas), opcionalmente de un ámbito."""
+    try:
+        reglas = cache_catalogo.obtener_o_cargar(('precios', 'reglas'), _cargar_reglas)
+    except ERRORES_BD as e:
+        registro.error("Error al obtener las reglas de precio: %s", e)
+        return []
+    return [regla for regla in reglas if ambito is None or regla.ambito == ambito]
+
+
+def invalidar_reglas():
+    cache_catalogo.invalidar('precios')
+    cache_catalogo.invalidar('tarifas')
+
+
+def precio_en_fecha(elemento, fecha, ambito='habitaciones', reglas=None):
+    """
+    Precio de una habitación (o servicio) la noche `fecha`: el precio base con las reglas
+    de temporada vigentes esa noche aplicadas en orden.
+    Args:
+        elemento: Habitación o servicio (registro o dict).
+        fecha (date | str): Noche.
+        ambito (str): 'habitaciones' o 'servicios'.
+        reglas (list): Reglas a considerar; por defecto las guardadas.
+    """
+    return aplicar_reglas(elemento['precio'], (
+        regla for regla in (obtener_reglas(ambito) if reglas is None else reglas)
+        if regla.ambito == ambito and vigente(regla, fecha) and coincide(regla, elemento)))
+
+
+def aplicar_reglas(precio, reglas):
+    """Aplica en orden los ajustes de `reglas` a `precio`, redondeando a céntimos tras cada una."""
+    for regla in reglas:
+        precio = _ajustar(precio, regla)
+    return precio
+
+
+def simular_temporada(fecha, ambito='habitaciones', reglas=None):
+    """
+    Vista previa en memoria de los precios de la noche `fecha` con las reglas de temporada.
+    Returns:
+        list: Un dict {'id', 'nombre', 'precio_base', 'precio'} por elemento cuyo precio cambia.
+    """
+    if reglas is None:
+        reglas = obtener_reglas(ambito)
+    vigentes = [regla for regla in reglas if regla.ambito == ambito and vigente(regla, fecha)]
+    cambios = []
+    for elemento in _catalogo(ambito):
+        precio = precio_en_fecha(elemento, fecha, ambito, vigentes)
+        if precio != elemento['precio']:
+            nombre = elemento['nombre'] if ambito == 'servicios' else elemento['descripcion']
+            cambios.append({'id': elemento['id'], 'nombre': nombre, 'precio_base': elemento['precio'],
+                            'precio': precio})
+    return cambios
+
+
+# ---------- Línea de órdenes ----------
+
+def _imprimir_cambios(cambios, clave_antes, clave_despues):
+    for cambio in cambios:
+        print(f"  {cambio.get('ambito', ''):12} {cambio['id']:>6}  {str(cambio['nombre'])[:40]:40} "
+              f"{float(cambio[clave_antes]):10.2f} -> {float(cambio[clave_despues]):10.2f}")
+    print(f"\n{len(cambios)} precio(s) cambian.")
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Ajustes de precio y reglas de temporada.")
+    subordenes = parser.add_subparsers(dest="orden", required=True)
+
+    def filtros(subparser):
+        subparser.add_argument("ambito", choices=AMBITOS)
+        subparser.add_argument("porcentaje", type=float, help="Ajuste en %% (negativo para descuentos)")
+        subparser.add_argument("--vista")
+        subparser.add_argument("--camas", type=int)
+        subparser.add_argument("--balcon", choices=("si", "no"))
+        subparser.add_argument("--patron", help="Patrón LIKE sobre el nombre del servicio, p. ej. '%%spa%%'")
+
+    ajustar = subordenes.add_parser("ajustar", help="Cambia el precio base (por defecto solo muestra la vista previa)")
+    filtros(ajustar)
+    ajustar.add_argument("--aplicar", action="store_true", help="Escribir los cambios en la BD")
+    ajustar.add_argument("--usuario", type=int, help="Usuario para sp_editar_servicio")
+
+    temporada = subordenes.add_parser("temporada", help="Guarda una regla de temporada")
+    filtros(temporada)
+    temporada.add_argument("--desde", help="Primera noche (AAAA-MM-DD)")
+    temporada.add_argument("--hasta", help="Día siguiente a la última noche (AAAA-MM-DD)")
+    temporada.add_argument("--descripcion")
+
+    previa = subordenes.add_parser("previa", help="Precios de una noche con las reglas de temporada")
+    previa.add_argument("ambito", choices=AMBITOS)
+    previa.add_argument("--fecha", default=date.today().isoformat())
+
+    subordenes.add_parser("reglas", help="Lista las reglas de temporada")
+    args = parser.parse_args(argumentos)
+
+    try:
+        if args.orden in ("ajustar", "temporada"):
+            balcon = None if args.balcon is None else args.balcon == "si"
+            regla = nueva_regla(args.ambito, args.porcentaje, args.vista, args.camas, balcon, args.patron,
+                                getattr(args, 'desde', None), getattr(args, 'hasta', None),
+                                getattr(args, 'descripcion', None))
+        if args.orden == "ajustar":
+            if not args.aplicar:
+                _imprimir_cambios(simular_ajustes([regla]), 'precio_actual', 'precio_nuevo')
+                print("Vista previa: use --aplicar para guardar los cambios.")
+                return 0
+            print(f"Actualizados: {aplicar_ajustes([regla], args.usuario)}")
+        elif args.orden == "temporada":
+            if not guardar_regla_bd(regla):
+                print("\nError al guardar la regla.")
+                return 1
+            print("Regla guardada.")
+        elif args.orden == "previa":
+            _imprimir_cambios(simular_temporada(args.fecha, args.ambito), 'precio_base', 'precio')
+        else:
+            for regla in obtener_reglas():
+                print(regla)
+    except ValueError as e:
+        print(f"\nError: {e}")
+        return 1
+    except ERRORES_BD as e:
+        print(f"\nError de base de datos; no se aplicó ningún cambio: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
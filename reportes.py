@@ -0,0 +1,305 @@
+import argparse
+import csv
+import json
+import os
+import time
+
+try:
+    import numpy as np
+except ImportError:  # numpy solo hace falta para los informes
+    np = None
+
+from conection_bd import conexion_bd, cerrar_pool
+from disponibilidad import obtener_calendario
+from metricas_bd import configurar_registro
+
+# ========== Informes de precios y ocupación ==========
+#
+# Las tablas se leen una sola vez, por bloques, en columnas (arrays de NumPy). Los textos
+# (vista, lugar turístico) se convierten en códigos enteros al leerlos, y todos los
+# agregados por grupo se calculan sin recorrer filas en Python:
+#   - recuentos, sumas y proporciones con np.bincount sobre los códigos
+#   - mínimos, máximos y percentiles ordenando una sola vez por (grupo, precio) y leyendo
+#     las posiciones de cada grupo en el array ordenado
+
+TAMANO_BLOQUE_INFORME = 50000
+PERCENTILES = (25, 50, 75, 90)
+
+
+def _requerir_numpy():
+    if np is None:
+        raise ImportError("Los informes requieren el paquete numpy (pip install numpy).")
+
+
+def _clave_texto(valor):
+    return str(valor).strip().lower() if valor is not None else ''
+
+
+def cargar_habitaciones_columnas():
+    """
+    Lee dbohabitaciones en columnas.
+    Returns:
+        dict: 'precio' (float64), 'camas' (int64), 'disponible' (bool), 'vista' y
+              'lugar_turistico' (códigos int64) y 'etiquetas' con el texto de cada código.
+    """
+    _requerir_numpy()
+    precios, camas, disponibles, vistas, lugares = [], [], [], [], []
+    codigos = {'vista': {}, 'lugar_turistico': {}}
+    etiquetas = {'vista': [], 'lugar_turistico': []}
+
+    def codificar(columna, valor):
+        clave = _clave_texto(valor)
+        codigo = codigos[columna].get(clave)
+        if codigo is None:
+            codigo = codigos[columna][clave] = len(etiquetas[columna])
+            etiquetas[columna].append(str(valor).strip() if valor is not None else '(sin dato)')
+        return codigo
+
+    with conexion_bd('cargar_habitaciones_columnas') as conexion:
+        cursor = conexion.cursor()
+        cursor.execute("SELECT precio, camas, disponible, vista, Lugar_Turistico FROM dbohabitaciones")
+        while True:
+            filas = cursor.fetchmany(TAMANO_BLOQUE_INFORME)
+            if not filas:
+                break
+            precio, cama, disponible, vista, lugar = zip(*filas)
+            precios.extend(precio)
+            camas.extend(cama)
+            disponibles.extend(disponible)
+            vistas.extend(codificar('vista', valor) for valor in vista)
+            lugares.extend(codificar('lugar_turistico', valor) for valor in lugar)
+
+    return {
+        'precio': np.array(precios, dtype=np.float64),
+        'camas': np.array(camas, dtype=np.int64),
+        'disponible': np.array(disponibles, dtype=bool),
+        'vista': np.array(vistas, dtype=np.int64),
+        'lugar_turistico': np.array(lugares, dtype=np.int64),
+        'etiquetas': etiquetas,
+    }
+
+
+def cargar_precios_servicios():
+    """Devuelve los precios de todos los servicios como array float64."""
+    _requerir_numpy()
+    with conexion_bd('cargar_precios_servicios') as conexion:
+        cursor = conexion.cursor()
+        cursor.execute("SELECT precio FROM dbo.servicios")
+        return np.array([fila[0] for fila in cursor.fetchall()], dtype=np.float64)
+
+
+def _percentiles_ordenados(ordenados, inicios, cuentas, percentil):
+    # Percentil con interpolación lineal (como np.percentile) de cada grupo, sobre el
+    # array ordenado por grupo y valor; los grupos vacíos dan NaN
+    posicion = inicios + (np.maximum(cuentas, 1) - 1) * (percentil / 100)
+    ultimo = len(ordenados) - 1  # Los grupos vacíos del final apuntarían fuera del array
+    inferior = np.minimum(np.floor(posicion).astype(np.int64), ultimo)
+    superior = np.minimum(np.ceil(posicion).astype(np.int64), ultimo)
+    fraccion = np.clip(posicion - inferior, 0, 1)
+    valores = ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * fraccion
+    return np.where(cuentas > 0, valores, np.nan)
+
+
+def agregados_por_grupo(codigos, precios, disponibles, etiquetas):
+    """
+    Calcula por grupo: número de habitaciones, proporción disponible y precio medio,
+    mínimo, máximo y PERCENTILES.
+    Args:
+        codigos (ndarray): Código de grupo (0..len(etiquetas)-1) de cada habitación.
+        precios (ndarray): Precio de cada habitación.
+        disponibles (ndarray): Disponibilidad (bool) de cada habitación.
+        etiquetas (list): Nombre de cada grupo.
+    Returns:
+        list: Un diccionario por grupo con habitaciones, proporcion_disponibles,
+              precio_medio, precio_min, precio_max y precio_pNN, en orden de código.
+    """
+    _requerir_numpy()
+    grupos = len(etiquetas)
+    if not len(precios):
+        return []
+    cuentas = np.bincount(codigos, minlength=grupos)
+    sumas = np.bincount(codigos, weights=precios, minlength=grupos)
+    con_disponibles = np.bincount(codigos, weights=disponibles.astype(np.float64), minlength=grupos)
+
+    orden = np.lexsort((precios, codigos))
+    ordenados = precios[orden]
+    finales = np.cumsum(cuentas)
+    inicios = finales - cuentas
+    con_datos = cuentas > 0
+    divisor = np.where(con_datos, cuentas, 1)
+
+    columnas = {
+        'habitaciones': cuentas,
+        'proporcion_disponibles': con_disponibles / divisor,
+        'precio_medio': sumas / divisor,
+        'precio_min': np.where(con_datos, ordenados[np.minimum(inicios, len(ordenados) - 1)], np.nan),
+        'precio_max': np.where(con_datos, ordenados[np.maximum(finales - 1, 0)], np.nan),
+    }
+    for percentil in PERCENTILES:
+        columnas[f'precio_p{percentil}'] = _percentiles_ordenados(ordenados, inicios, cuentas, percentil)
+
+    resultado = []
+    for indice in np.flatnonzero(con_datos):
+        fila = {'grupo': etiquetas[indice]}
+        for nombre, valores in columnas.items():
+            fila[nombre] = valores[indice].item()
+        resultado.append(fila)
+    return resultado
+
+
+def distribucion(valores, intervalos=10):
+    """
+    Resumen de una distribución de precios.
+    Returns:
+        dict: cantidad, media, desviacion, min, max, pNN e histograma (límites y cuentas).
+    """
+    _requerir_numpy()
+    if not len(valores):
+        return {'cantidad': 0}
+    cuentas, limites = np.histogram(valores, bins=intervalos)
+    resumen = {
+        'cantidad': int(len(valores)),
+        'media': float(valores.mean()),
+        'desviacion': float(valores.std()),
+        'min': float(valores.min()),
+        'max': float(valores.max()),
+    }
+    for percentil, valor in zip(PERCENTILES, np.percentile(valores, PERCENTILES)):
+        resumen[f'p{percentil}'] = float(valor)
+    resumen['histograma'] = {'limites': limites.tolist(), 'cuentas': cuentas.tolist()}
+    return resumen
+
+
+def resumen_ocupacion(total_habitaciones, noches=30):
+    """
+    Ocupación prevista de las próximas `noches` a partir del calendario cacheado.
+    Returns:
+        dict: tasa media y máxima, noche de mayor ocupación y tasa por noche.
+    """
+    _requerir_numpy()
+    por_noche = obtener_calendario().ocupacion_por_noche()[:noches]
+    if not por_noche or not total_habitaciones:
+        return {'noches': 0}
+    ocupadas = np.fromiter((ocupadas for _, ocupadas in por_noche), dtype=np.int64, count=len(por_noche))
+    tasas = ocupadas / total_habitaciones
+    pico = int(tasas.argmax())
+    return {
+        'noches': len(por_noche),
+        'tasa_media': float(tasas.mean()),
+        'tasa_maxima': float(tasas[pico]),
+        'noche_pico': por_noche[pico][0].isoformat(),
+        'por_noche': [{'fecha': fecha.isoformat(), 'ocupadas': int(cuenta), 'tasa': float(tasa)}
+                      for (fecha, cuenta), tasa in zip(por_noche, tasas)],
+    }
+
+
+def generar_informe(noches_ocupacion=30):
+    """
+    Genera el informe completo de precios y ocupación.
+    Returns:
+        dict: 'habitaciones', 'por_vista', 'por_camas', 'por_lugar_turistico', 'servicios',
+              'ocupacion' y 'segundos' (tiempo de carga y de cálculo).
+    """
+    _requerir_numpy()
+    inicio = time.perf_counter()
+    columnas = cargar_habitaciones_columnas()
+    precios_servicios = cargar_precios_servicios()
+    carga = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    precios = columnas['precio']
+    disponibles = columnas['disponible']
+    valores_camas, codigos_camas = np.unique(columnas['camas'], return_inverse=True)
+    informe = {
+        'habitaciones': {
+            'total': int(len(precios)),
+            'disponibles': int(disponibles.sum()),
+            'proporcion_disponibles': float(disponibles.mean()) if len(precios) else 0.0,
+            'precio': distribucion(precios),
+        },
+        'por_vista': agregados_por_grupo(columnas['vista'], precios, disponibles,
+                                         columnas['etiquetas']['vista']),
+        'por_camas': agregados_por_grupo(codigos_camas.ravel(), precios, disponibles,
+                                         valores_camas.tolist()),
+        'por_lugar_turistico': agregados_por_grupo(columnas['lugar_turistico'], precios, disponibles,
+                                                   columnas['etiquetas']['lugar_turistico']),
+        'servicios': distribucion(precios_servicios),
+    }
+    for clave in ('por_vista', 'por_lugar_turistico'):
+        informe[clave].sort(key=lambda fila: fila['grupo'].lower())
+    calculo = time.perf_counter() - inicio
+    informe['ocupacion'] = resumen_ocupacion(len(precios), noches_ocupacion)
+    informe['segundos'] = {'carga': carga, 'calculo': calculo}
+    return informe
+
+
+# ---------- Salida ----------
+
+TABLAS_POR_GRUPO = (('por_vista', "Vista"), ('por_camas', "Camas"), ('por_lugar_turistico', "Lugar turístico"))
+
+
+def imprimir_informe(informe):
+    habitaciones = informe['habitaciones']
+    print("\n--- Informe de precios y ocupación ---")
+    print(f"Habitaciones: {habitaciones['total']}  Disponibles: {habitaciones['disponibles']} "
+          f"({habitaciones['proporcion_disponibles']:.1%})")
+    if habitaciones['precio'].get('cantidad'):
+        precio = habitaciones['precio']
+        print(f"Precio por noche: media ${precio['media']:.2f}  mediana ${precio['p50']:.2f}  "
+              f"min ${precio['min']:.2f}  max ${precio['max']:.2f}")
+
+    for clave, titulo in TABLAS_POR_GRUPO:
+        print(f"\n{titulo:<24} {'Habs.':>8} {'Disp.':>7} {'Media':>10} {'P25':>10} {'P50':>10} {'P90':>10}")
+        for fila in informe[clave]:
+            print(f"{str(fila['grupo'])[:24]:<24} {fila['habitaciones']:>8} {fila['proporcion_disponibles']:>7.1%} "
+                  f"{fila['precio_medio']:>10.2f} {fila['precio_p25']:>10.2f} {fila['precio_p50']:>10.2f} "
+                  f"{fila['precio_p90']:>10.2f}")
+
+    servicios = informe['servicios']
+    if servicios.get('cantidad'):
+        print(f"\nServicios: {servicios['cantidad']}  media ${servicios['media']:.2f}  "
+              f"P25 ${servicios['p25']:.2f}  P50 ${servicios['p50']:.2f}  P90 ${servicios['p90']:.2f}  "
+              f"max ${servicios['max']:.2f}")
+
+    ocupacion = informe['ocupacion']
+    if ocupacion.get('noches'):
+        print(f"\nOcupación próximas {ocupacion['noches']} noches: media {ocupacion['tasa_media']:.1%}, "
+              f"pico {ocupacion['tasa_maxima']:.1%} el {ocupacion['noche_pico']}")
+    segundos = informe['segundos']
+    print(f"\n(Carga {segundos['carga']:.2f} s, cálculo {segundos['calculo']:.3f} s)")
+
+
+def exportar_informe(informe, ruta_json=None, directorio_csv=None):
+    """Guarda el informe completo en JSON y/o las tablas por grupo en archivos CSV."""
+    if ruta_json:
+        with open(ruta_json, 'w', encoding='utf-8') as archivo:
+            json.dump(informe, archivo, indent=2, ensure_ascii=False)
+    if directorio_csv:
+        os.makedirs(directorio_csv, exist_ok=True)
+        for clave, _ in TABLAS_POR_GRUPO:
+            if not informe[clave]:
+                continue
+            with open(os.path.join(directorio_csv, f"{clave}.csv"), 'w', encoding='utf-8', newline='') as archivo:
+                escritor = csv.DictWriter(archivo, fieldnames=list(informe[clave][0]))
+                escritor.writeheader()
+                escritor.writerows(informe[clave])
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Informe de precios y ocupación de habitaciones y servicios.")
+    parser.add_argument("--noches", type=int, default=30, help="Noches de ocupación a resumir (por defecto 30).")
+    parser.add_argument("--json", help="Guardar el informe completo en este archivo JSON.")
+    parser.add_argument("--csv", help="Guardar las tablas por grupo como CSV en este directorio.")
+    opciones = parser.parse_args(argumentos)
+
+    configurar_registro()
+    try:
+        informe = generar_informe(opciones.noches)
+    finally:
+        cerrar_pool()
+    imprimir_informe(informe)
+    exportar_informe(informe, opciones.json, opciones.csv)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import logging
+import os
+import random
+import time
+
+from cache_bd import invalidar_habitaciones
+from conection_bd import conexion_bd, al_confirmar, ERRORES_BD
+from disponibilidad import a_fecha
+from modelos import Reserva
+
+registro = logging.getLogger(__name__)
+
+# ========== Reservas con bloqueo optimista ==========
+#
+# Una reserva es una fila de ocupacion_habitaciones con motivo 'reserva'. Para no
+# mantener bloqueos mientras el usuario decide, cada intento hace dos transacciones
+# cortas sobre la misma conexión:
+#   1. Lectura: versión de la habitación y si hay ocupaciones que se solapen.
+#   2. Escritura: UPDATE ... SET version = version + 1 WHERE id = ? AND version = ?
+#      (compare-and-swap) y, si afectó una fila, INSERT de la ocupación y commit.
+# Si otra transacción cambió la habitación entre 1 y 2, el UPDATE no afecta filas: se
+# revierte, se espera un tiempo aleatorio creciente y se vuelve a intentar desde 1.
+
+REINTENTOS_RESERVA = int(os.environ.get("HOTEL_REINTENTOS_RESERVA", "5"))
+ESPERA_BASE_REINTENTO = float(os.environ.get("HOTEL_ESPERA_BASE_REINTENTO", "0.01"))
+
+# Estados que devuelve reservar_habitacion()
+CONFIRMADA = 'confirmada'
+NO_DISPONIBLE = 'no_disponible'
+NO_EXISTE = 'no_existe'
+CONFLICTO = 'conflicto'
+ERROR = 'error'
+
+
+def _espera_reintento(intento):
+    # Retroceso exponencial con variación aleatoria para que los reintentos no choquen otra vez
+    return random.uniform(0, ESPERA_BASE_REINTENTO * (2 ** intento))
+
+
+def _leer_estado(cursor, habitacion_id, desde, hasta):
+    cursor.execute("SELECT version, disponible FROM dbohabitaciones WHERE id = ?", (habitacion_id,))
+    fila = cursor.fetchone()
+    if fila is None:
+        return None, NO_EXISTE
+    version, disponible = fila[0], fila[1]
+    if not disponible:
+        return version, NO_DISPONIBLE
+    cursor.execute(
+        "SELECT COUNT(*) FROM ocupacion_habitaciones WHERE habitacion_id = ? AND desde < ? AND hasta > ?",
+        (habitacion_id, hasta.isoformat(), desde.isoformat()))
+    if cursor.fetchone()[0]:
+        return version, NO_DISPONIBLE
+    return version, None
+
+
+def reservar_habitacion(habitacion_id, desde, hasta, huesped, reintentos=None):
+    """
+    Reserva una habitación para las noches [desde, hasta) con bloqueo optimista.
+    Args:
+        habitacion_id (int): ID de la habitación.
+        desde (date | str): Noche de llegada.
+        hasta (date | str): Día de salida.
+        huesped (str): Nombre del huésped.
+        reintentos (int): Reintentos ante conflictos (por defecto REINTENTOS_RESERVA).
+    Returns:
+        dict: {'estado': CONFIRMADA | NO_DISPONIBLE | NO_EXISTE | CONFLICTO | ERROR,
+               'reserva_id': ID de la reserva o None, 'intentos': número de intentos}
+    """
+    desde, hasta = a_fecha(desde), a_fecha(hasta)
+    if hasta <= desde:
+        raise ValueError("La fecha de salida debe ser posterior a la de llegada.")
+    if reintentos is None:
+        reintentos = REINTENTOS_RESERVA
+
+    intento = 0
+    try:
+        with conexion_bd('reservar_habitacion') as conexion:
+            cursor = conexion.cursor()
+            while True:
+                intento += 1
+                version, motivo = _leer_estado(cursor, habitacion_id, desde, hasta)
+                conexion.rollback()  # Termina la transacción de lectura sin retener bloqueos
+                if motivo is not None:
+                    return {'estado': motivo, 'reserva_id': None, 'intentos': intento}
+
+                cursor.execute(
+                    "UPDATE dbohabitaciones SET version = version + 1 WHERE id = ? AND version = ?",
+                    (habitacion_id, version))
+                if cursor.rowcount == 1:
+                    cursor.execute("""
+                        INSERT INTO ocupacion_habitaciones (habitacion_id, desde, hasta, motivo, huesped)
+                        VALUES (?, ?, ?, 'reserva', ?)
+                    """, (habitacion_id, desde.isoformat(), hasta.isoformat(), huesped))
+                    # La fila de la habitación sigue bloqueada por el UPDATE: la última
+                    # ocupación de esta habitación y fecha es la que se acaba de insertar
+                    cursor.execute(
+                        "SELECT MAX(id) FROM ocupacion_habitaciones WHERE habitacion_id = ? AND desde = ?",
+                        (habitacion_id, desde.isoformat()))
+                    reserva_id = cursor.fetchone()[0]
+                    conexion.commit()
+                    break
+
+                conexion.rollback()
+                if intento > reintentos:
+                    return {'estado': CONFLICTO, 'reserva_id': None, 'intentos': intento}
+                time.sleep(_espera_reintento(intento))
+    except ERRORES_BD as e:
+        registro.error("Error al reservar la habitación: %s", e)
+        return {'estado': ERROR, 'reserva_id': None, 'intentos': intento}
+
+    # La versión de la habitación cambió: también el catálogo cacheado (y con él los calendarios)
+    al_confirmar(invalidar_habitaciones)
+    return {'estado': CONFIRMADA, 'reserva_id': reserva_id, 'intentos': intento}
+
+
+def cancelar_reserva(reserva_id):
+    """
+    Cancela una reserva. También incrementa la versión de la habitación, para que las
+    escrituras optimistas que la hubieran leído antes detecten el cambio.
+    Returns:
+        bool: True si se canceló, False si no existía o hay un error.
+    """
+    try:
+        with conexion_bd('cancelar_reserva') as conexion:
+            cursor = conexion.cursor()
+            cursor.execute(
+                "SELECT habitacion_id FROM ocupacion_habitaciones WHERE id = ? AND motivo = 'reserva'",
+                (reserva_id,))
+            fila = cursor.fetchone()
+            if fila is None:
+                return False
+            cursor.execute("UPDATE dbohabitaciones SET version = version + 1 WHERE id = ?", (fila[0],))
+            cursor.execute("DELETE FROM ocupacion_habitaciones WHERE id = ? AND motivo = 'reserva'", (reserva_id,))
+            cancelada = cursor.rowcount > 0
+            conexion.commit()
+    except ERRORES_BD as e:
+        registro.error("Error al cancelar la reserva: %s", e)
+        return False
+    # La versión de la habitación cambió: también el catálogo cacheado (y con él los calendarios)
+    al_confirmar(invalidar_habitaciones)
+    return cancelada
+
+
+def obtener_reservas(habitacion_id=None):
+    """
+    Returns:
+        list: Reservas (Reserva con id, habitacion_id, desde, hasta y huesped),
+              de una habitación o de todas. Lista vacía en caso de error.
+    """
+    sql = "SELECT id, habitacion_id, desde, hasta, huesped FROM ocupacion_habitaciones WHERE motivo = 'reserva'"
+    parametros = ()
+    if habitacion_id is not None:
+        sql += " AND habitacion_id = ?"
+        parametros = (habitacion_id,)
+    sql += " ORDER BY desde, id"
+    try:
+        with conexion_bd('obtener_reservas') as conexion:
+            cursor = conexion.cursor()
+            cursor.execute(sql, parametros)
+            reservas = Reserva.desde_cursor(cursor, cursor.fetchall())
+    except ERRORES_BD as e:
+        registro.error("Error al obtener reservas: %s", e)
+        return []
+    for reserva in reservas:
+        reserva.desde = a_fecha(reserva.desde)
+        reserva.hasta = a_fecha(reserva.hasta)
+    return reservas
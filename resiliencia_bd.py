@@ -0,0 +1,174 @@
+import logging
+import os
+import random
+import threading
+import time
+
+registro = logging.getLogger(__name__)
+
+# ========== Reintentos y cortocircuito de la base de datos ==========
+#
+# Los errores transitorios (caída de la red, tiempo agotado, interbloqueo, base SQLite
+# bloqueada) se reintentan unas pocas veces con retroceso exponencial y variación
+# aleatoria. Si el servidor sigue sin responder, el interruptor se abre tras
+# INTERRUPTOR_FALLOS fallos de conexión seguidos y durante INTERRUPTOR_ENFRIAMIENTO
+# segundos las peticiones fallan al instante con CircuitoAbierto, en lugar de esperar
+# cada una el tiempo de conexión completo. Pasado ese tiempo se deja pasar un único
+# intento de prueba: si conecta, el interruptor se cierra; si no, vuelve a abrirse.
+#
+# Solo se reintenta al abrir una conexión (conection_bd._abrir_conexion): envolver además
+# las consultas multiplicaría los intentos y contaría cada caída varias veces en el interruptor.
+
+REINTENTOS_BD = int(os.environ.get("HOTEL_BD_REINTENTOS", "3"))
+ESPERA_BASE_BD = float(os.environ.get("HOTEL_BD_ESPERA_BASE", "0.2"))
+ESPERA_MAXIMA_BD = float(os.environ.get("HOTEL_BD_ESPERA_MAXIMA", "2"))
+INTERRUPTOR_FALLOS = int(os.environ.get("HOTEL_BD_INTERRUPTOR_FALLOS", "5"))
+INTERRUPTOR_ENFRIAMIENTO = float(os.environ.get("HOTEL_BD_INTERRUPTOR_ENFRIAMIENTO", "30"))
+
+# Estados del interruptor
+CERRADO = 'cerrado'
+ABIERTO = 'abierto'
+SEMIABIERTO = 'semiabierto'
+
+
+class CircuitoAbierto(Exception):
+    """La base de datos se considera caída: la operación no se intenta."""
+
+    def __init__(self, mensaje, reintentar_en):
+        super().__init__(mensaje)
+        self.reintentar_en = reintentar_en  # Segundos hasta el siguiente intento de prueba
+
+
+class Interruptor:
+    """
+    Interruptor (circuit breaker) seguro entre hilos.
+    Args:
+        fallos (int): Fallos seguidos que abren el interruptor.
+        enfriamiento (float): Segundos que permanece abierto antes del intento de prueba.
+    """
+
+    def __init__(self, fallos=INTERRUPTOR_FALLOS, enfriamiento=INTERRUPTOR_ENFRIAMIENTO):
+        self.fallos = fallos
+        self.enfriamiento = enfriamiento
+        self._candado = threading.Lock()
+        self._estado = CERRADO
+        self._fallos_seguidos = 0
+        self._abierto_desde = 0.0
+        self._prueba_en_curso = False
+        self._aperturas = 0
+
+    def permitir(self):
+        """
+        Comprueba si se puede intentar la operación.
+        Raises:
+            CircuitoAbierto: Si el interruptor está abierto (o ya hay un intento de prueba en curso).
+        """
+        with self._candado:
+            if self._estado == CERRADO:
+                return
+            restante = self._abierto_desde + self.enfriamiento - time.monotonic()
+            if self._estado == ABIERTO and restante <= 0:
+                self._estado = SEMIABIERTO
+            if self._estado == SEMIABIERTO and not self._prueba_en_curso:
+                self._prueba_en_curso = True
+                return
+        raise CircuitoAbierto("Base de datos no disponible; se reintentará en "
+                              f"{max(restante, 0):.0f} s.", max(restante, 0.0))
+
+    def comprobar(self):
+        """
+        Como permitir(), pero sin ocupar el intento de prueba: solo falla mientras el
+        interruptor está abierto y no ha pasado el enfriamiento.
+        Raises:
+            CircuitoAbierto: Si el interruptor está abierto.
+        """
+        with self._candado:
+            if self._estado != ABIERTO:
+                return
+            restante = self._abierto_desde + self.enfriamiento - time.monotonic()
+        if restante > 0:
+            raise CircuitoAbierto("Base de datos no disponible; se reintentará en "
+                                  f"{restante:.0f} s.", restante)
+
+    def exito(self):
+        with self._candado:
+            if self._estado != CERRADO:
+                registro.warning("Conexión con la base de datos restablecida; interruptor cerrado.")
+            self._estado = CERRADO
+            self._fallos_seguidos = 0
+            self._prueba_en_curso = False
+
+    def fallo(self):
+        with self._candado:
+            self._fallos_seguidos += 1
+            self._prueba_en_curso = False
+            if self._estado == SEMIABIERTO or (self._estado == CERRADO and self._fallos_seguidos >= self.fallos):
+                self._estado = ABIERTO
+                self._abierto_desde = time.monotonic()
+                self._aperturas += 1
+                registro.error("Base de datos no disponible tras %d fallos seguidos; interruptor "
+                               "abierto durante %.0f s.", self._fallos_seguidos, self.enfriamiento)
+
+    def reiniciar(self):
+        with self._candado:
+            self._estado = CERRADO
+            self._fallos_seguidos = 0
+            self._prueba_en_curso = False
+
+    def estadisticas(self):
+        """
+        Returns:
+            dict: estado, fallos_seguidos y aperturas del interruptor.
+        """
+        with self._candado:
+            estado = self._estado
+            if estado == ABIERTO and time.monotonic() - self._abierto_desde >= self.enfriamiento:
+                estado = SEMIABIERTO
+            return {'estado': estado, 'fallos_seguidos': self._fallos_seguidos, 'aperturas': self._aperturas}
+
+
+def espera_reintento(intento, base=ESPERA_BASE_BD, maxima=ESPERA_MAXIMA_BD):
+    """Retroceso exponencial con variación aleatoria completa ("full jitter")."""
+    return random.uniform(0, min(maxima, base * (2 ** intento)))
+
+
+def reintentar(funcion, es_transitorio, reintentos=REINTENTOS_BD, interruptor=None, dormir=time.sleep):
+    """
+    Ejecuta `funcion()` reintentando los errores transitorios.
+    Args:
+        funcion (callable): Operación sin argumentos.
+        es_transitorio (callable): error -> bool; los demás errores se propagan enseguida.
+        reintentos (int): Reintentos tras el primer intento.
+        interruptor (Interruptor): Si se indica, se consulta antes de cada intento y se le
+            notifica el resultado.
+        dormir (callable): Función de espera (se sustituye en pruebas).
+    Returns:
+        Lo que devuelva `funcion`.
+    Raises:
+        CircuitoAbierto: Si el interruptor no deja intentarlo.
+        Exception: El último error si se agotan los reintentos.
+    """
+    intento = 0
+    while True:
+        if interruptor is not None:
+            interruptor.permitir()
+        try:
+            resultado = funcion()
+        except Exception as e:
+            transitorio = es_transitorio(e)
+            if interruptor is not None:
+                if transitorio:
+                    interruptor.fallo()
+                else:
+                    interruptor.exito()  # El servidor respondió, aunque con un error
+            if not transitorio or intento >= reintentos:
+                raise
+            espera = espera_reintento(intento)
+            registro.warning("Error transitorio de base de datos (intento %d de %d), reintentando en "
+                             "%.2f s: %s", intento + 1, reintentos + 1, espera, e)
+            dormir(espera)
+            intento += 1
+            continue
+        if interruptor is not None:
+            interruptor.exito()
+        return resultado
@@ -0,0 +1,579 @@
+import argparse
+import json
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+import CRUD_habitaciones
+import CRUD_servicios
+import cotizaciones
+import reservas
+from cache_bd import estadisticas_cache
+from conection_bd import cerrar_pool, estadisticas_pool, estadisticas_interruptor, exportar_metricas
+from instantanea import INSTANTANEA_ACTIVA, iniciar_instantanea, detener_instantanea, estadisticas_instantanea
+from metricas_bd import configurar_registro
+from modelos import Registro
+from resiliencia_bd import CircuitoAbierto, CERRADO
+
+registro = logging.getLogger(__name__)
+
+# ========== Servicio HTTP/JSON ==========
+#
+# Expone las operaciones de habitaciones, reservas y servicios sobre las funciones *_bd,
+# para que varios puestos de recepción y la web de reservas compartan un mismo proceso
+# (y su pool de conexiones y caché). Usa solo la biblioteca estándar:
+#   - Las conexiones se atienden en un pool de HTTP_HILOS hilos. Solo se acepta una conexión
+#     cuando hay un hilo libre: mientras tanto esperan en la cola de aceptación del socket
+#     (HTTP_COLA), y las que no caben las rechaza el sistema operativo.
+#   - HTTP/1.1 con keep-alive: un cliente reutiliza su conexión entre peticiones. Cada conexión
+#     ocupa su hilo mientras está abierta, también inactiva, hasta HTTP_KEEPALIVE segundos.
+#
+# Rutas:
+#   GET    /salud                       Estado del pool, de la caché y del interruptor de la BD
+#   GET    /metricas                    Métricas en formato de texto de Prometheus
+#   GET    /habitaciones                ?disponibles=1&desde=&hasta=  o  ?despues_de=&limite=
+#   GET    /habitaciones/buscar         ?camas=&banos=&vista=&balcon=&disponible=&precio_min=
+#                                        &precio_max=&orden=&descendente=&limite=
+#                                        o ?texto=suite jacuzzi&todas=1&disponible=&limite=
+#                                        (por palabras, de más a menos relevante)
+#   GET    /habitaciones/<id>           ?desde=&hasta= añade 'libre' para ese rango
+#   POST   /habitaciones                Cuerpo: habitación completa
+#   PUT    /habitaciones                Cuerpo: {'habitaciones': [...], 'solo_insertar': false}
+#   PUT    /habitaciones/<id>           Cuerpo: habitación completa (+ 'version' opcional)
+#   DELETE /habitaciones/<id>
+#   GET    /reservas                    ?habitacion_id=
+#   POST   /reservas                    Cuerpo: habitacion_id, desde, hasta, huesped
+#   DELETE /reservas/<id>
+#   GET    /servicios
+#   GET    /servicios/<id>
+#   POST   /servicios                   Cuerpo: nombre, precio     (cabecera X-Usuario-Id)
+#   PUT    /servicios/<id>              Cuerpo: nombre, precio     (cabecera X-Usuario-Id)
+#   DELETE /servicios/<id>                                         (cabecera X-Usuario-Id)
+#   GET    /cotizaciones                ?desde=&hasta=&servicios=3,5:2,7:noche&descuento=
+#                                        (todas las habitaciones libres, de menor a mayor total)
+#   POST   /cotizaciones                Cuerpo: {'cotizaciones': [{habitacion_id, desde, hasta,
+#                                        servicios, descuento}, ...]} o una sola cotización
+#
+# 'limite' debe ser mayor que cero y se recorta a HTTP_LIMITE_MAXIMO.
+
+HTTP_HOST = os.environ.get("HOTEL_HTTP_HOST", "127.0.0.1")
+HTTP_PUERTO = int(os.environ.get("HOTEL_HTTP_PUERTO", "8080"))
+HTTP_HILOS = int(os.environ.get("HOTEL_HTTP_HILOS", "16"))
+HTTP_KEEPALIVE = float(os.environ.get("HOTEL_HTTP_KEEPALIVE", "15"))
+HTTP_COLA = int(os.environ.get("HOTEL_HTTP_COLA", "128"))
+_ESPERA_HILO = 0.5      # Segundos que serve_forever espera un hilo libre antes de volver a su bucle
+HTTP_MAX_CUERPO = 1024 * 1024
+HTTP_LIMITE_MAXIMO = int(os.environ.get("HOTEL_HTTP_LIMITE_MAXIMO", "1000"))  # Resultados por petición
+
+CAMPOS_HABITACION = ('descripcion', 'camas', 'banos', 'vista', 'balcon', 'precio', 'disponible', 'lugar_turistico')
+
+
+class ErrorPeticion(Exception):
+    """Petición inválida; se responde con `estado` y el mensaje como error."""
+
+    def __init__(self, estado, mensaje):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+def _a_json(valor):
+    if isinstance(valor, Registro):
+        return valor.a_dict()
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    raise TypeError(f"Tipo no serializable: {type(valor).__name__}")
+
+
+_VERDADEROS = ('1', 'true', 'si', 'sí', 's')
+_FALSOS = ('0', 'false', 'no', 'n')
+
+
+def _booleano(valor, nombre):
+    texto = str(valor).strip().lower()
+    if texto in _VERDADEROS:
+        return True
+    if texto in _FALSOS:
+        return False
+    raise ErrorPeticion(400, f"'{nombre}' debe ser un booleano (1/0, true/false, si/no).")
+
+
+def _entero(valor, nombre):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        raise ErrorPeticion(400, f"'{nombre}' debe ser un número entero.") from None
+
+
+def _limite(valor):
+    # 'limite' de los listados: al menos 1 y como mucho HTTP_LIMITE_MAXIMO
+    limite = _entero(valor, 'limite')
+    if limite < 1:
+        raise ErrorPeticion(400, "'limite' debe ser mayor que cero.")
+    return min(limite, HTTP_LIMITE_MAXIMO)
+
+
+def _decimal(valor, nombre):
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        raise ErrorPeticion(400, f"'{nombre}' debe ser un número.") from None
+
+
+def _requerir(cuerpo, *campos):
+    faltan = [campo for campo in campos if campo not in cuerpo]
+    if faltan:
+        raise ErrorPeticion(400, f"Faltan campos: {', '.join(faltan)}")
+
+
+def _habitacion_desde_cuerpo(cuerpo, id_habitacion):
+    _requerir(cuerpo, *CAMPOS_HABITACION)
+    return {
+        'id': id_habitacion,
+        'descripcion': cuerpo['descripcion'],
+        'camas': _entero(cuerpo['camas'], 'camas'),
+        'banos': _entero(cuerpo['banos'], 'banos'),
+        'vista': cuerpo['vista'],
+        'balcon': _booleano(cuerpo['balcon'], 'balcon'),
+        'precio': _decimal(cuerpo['precio'], 'precio'),
+        'disponible': _booleano(cuerpo['disponible'], 'disponible'),
+        'lugar_turistico': cuerpo['lugar_turistico'],
+    }
+
+
+def _usuario(peticion):
+    usuario = peticion.headers.get('X-Usuario-Id')
+    if usuario is None:
+        raise ErrorPeticion(401, "Falta la cabecera X-Usuario-Id.")
+    return _entero(usuario, 'X-Usuario-Id')
+
+
+# ---------- Operaciones ----------
+
+def salud(peticion, consulta, cuerpo):
+    # 503 mientras el interruptor de la base de datos no esté cerrado
+    interruptor = estadisticas_interruptor()
+    estado = 200 if interruptor['estado'] == CERRADO else 503
+    datos = {'pool': estadisticas_pool(), 'cache': estadisticas_cache(), 'interruptor': interruptor}
+    if INSTANTANEA_ACTIVA:
+        datos['instantanea'] = estadisticas_instantanea()
+    return estado, datos
+
+
+class TextoPlano(str):
+    """Respuesta que se envía tal cual como text/plain en lugar de JSON."""
+
+
+def metricas(peticion, consulta, cuerpo):
+    return 200, TextoPlano(exportar_metricas())
+
+
+def listar_habitaciones(peticion, consulta, cuerpo):
+    desde, hasta = consulta.get('desde'), consulta.get('hasta')
+    if desde or hasta:
+        if not (desde and hasta):
+            raise ErrorPeticion(400, "Indique 'desde' y 'hasta'.")
+        try:
+            return 200, {'habitaciones': CRUD_habitaciones.obtener_habitaciones_disponibles(desde, hasta)}
+        except ValueError as e:
+            raise ErrorPeticion(400, str(e)) from None
+    despues_de = consulta.get('despues_de')
+    habitaciones, siguiente = CRUD_habitaciones.obtener_pagina_habitaciones(
+        despues_de_id=None if despues_de is None else _entero(despues_de, 'despues_de'),
+        tamano_pagina=_limite(consulta.get('limite', CRUD_habitaciones.TAMANO_PAGINA)),
+        solo_disponibles=_booleano(consulta.get('disponibles', '0'), 'disponibles'))
+    return 200, {'habitaciones': habitaciones, 'siguiente': siguiente}
+
+
+def buscar_habitaciones(peticion, consulta, cuerpo):
+    limite = consulta.get('limite')
+    if 'texto' in consulta:
+        return 200, {'habitaciones': CRUD_habitaciones.buscar_habitaciones_texto(
+            consulta['texto'],
+            limite=None if limite is None else _limite(limite),
+            solo_disponibles=_booleano(consulta.get('disponible', '0'), 'disponible'),
+            todas=_booleano(consulta.get('todas', '1'), 'todas'))}
+    criterios = {}
+    for nombre in ('camas', 'banos'):
+        if nombre in consulta:
+            criterios[nombre] = _entero(consulta[nombre], nombre)
+    for nombre in ('balcon', 'disponible'):
+        if nombre in consulta:
+            criterios[nombre] = _booleano(consulta[nombre], nombre)
+    for nombre in ('precio_min', 'precio_max'):
+        if nombre in consulta:
+            criterios[nombre] = _decimal(consulta[nombre], nombre)
+    if 'vista' in consulta:
+        criterios['vista'] = consulta['vista']
+    return 200, {'habitaciones': CRUD_habitaciones.buscar_habitaciones(
+        orden=consulta.get('orden', 'precio'),
+        descendente=_booleano(consulta.get('descendente', '0'), 'descendente'),
+        limite=None if limite is None else _limite(limite),
+        **criterios)}
+
+
+def obtener_habitacion(peticion, consulta, cuerpo, id_habitacion):
+    habitacion = CRUD_habitaciones.buscar_habitacion_por_id_bd(_entero(id_habitacion, 'id'))
+    if habitacion is None:
+        raise ErrorPeticion(404, "No se encontró la habitación.")
+    desde, hasta = consulta.get('desde'), consulta.get('hasta')
+    if desde and hasta:
+        datos = habitacion.a_dict()
+        try:
+            datos['libre'] = bool(habitacion.disponible) and CRUD_habitaciones.esta_libre(habitacion.id, desde, hasta)
+        except ValueError as e:
+            raise ErrorPeticion(400, str(e)) from None
+        return 200, datos
+    return 200, habitacion
+
+
+def agregar_habitacion(peticion, consulta, cuerpo):
+    _requerir(cuerpo, 'id')
+    habitacion = _habitacion_desde_cuerpo(cuerpo, _entero(cuerpo['id'], 'id'))
+    resultado = CRUD_habitaciones.guardar_habitacion_bd(habitacion, actualizar=False)
+    if resultado == CRUD_habitaciones.CONFLICTO:
+        raise ErrorPeticion(409, "Ya existe una habitación con ese ID.")
+    if resultado != CRUD_habitaciones.INSERTADA:
+        raise ErrorPeticion(500, "Error al agregar la habitación.")
+    return 201, habitacion
+
+
+def guardar_habitaciones(peticion, consulta, cuerpo):
+    # Alta o actualización en bloque; con 'solo_insertar' las existentes no se tocan
+    habitaciones = cuerpo.get('habitaciones')
+    if not isinstance(habitaciones, list):
+        raise ErrorPeticion(400, "Falta la lista 'habitaciones'.")
+    for habitacion in habitaciones:
+        if not isinstance(habitacion, dict):
+            raise ErrorPeticion(400, "Cada habitación debe ser un objeto.")
+        _requerir(habitacion, 'id')
+    habitaciones = [_habitacion_desde_cuerpo(habitacion, _entero(habitacion['id'], 'id')) for habitacion in habitaciones]
+    resumen = CRUD_habitaciones.guardar_habitaciones_bd(habitaciones, actualizar=not cuerpo.get('solo_insertar'))
+    if resumen['error']:
+        raise ErrorPeticion(500, "Error al guardar las habitaciones; no se guardó ninguna.")
+    return 200, resumen
+
+
+def actualizar_habitacion(peticion, consulta, cuerpo, id_habitacion):
+    habitacion = _habitacion_desde_cuerpo(cuerpo, _entero(id_habitacion, 'id'))
+    version = cuerpo.get('version')
+    resultado = CRUD_habitaciones.actualizar_habitacion_versionada_bd(
+        habitacion, None if version is None else _entero(version, 'version'))
+    if resultado == CRUD_habitaciones.NO_EXISTE:
+        raise ErrorPeticion(404, "No se encontró la habitación.")
+    if resultado == CRUD_habitaciones.CONFLICTO:
+        raise ErrorPeticion(409, "La habitación cambió desde que se leyó; vuelva a leerla.")
+    if resultado != CRUD_habitaciones.ACTUALIZADA:
+        raise ErrorPeticion(500, "Error al actualizar la habitación.")
+    return 200, habitacion
+
+
+def eliminar_habitacion(peticion, consulta, cuerpo, id_habitacion):
+    if not CRUD_habitaciones.eliminar_habitacion_bd(_entero(id_habitacion, 'id')):
+        raise ErrorPeticion(404, "No se encontró la habitación.")
+    return 204, None
+
+
+def listar_reservas(peticion, consulta, cuerpo):
+    habitacion_id = consulta.get('habitacion_id')
+    return 200, {'reservas': reservas.obtener_reservas(
+        None if habitacion_id is None else _entero(habitacion_id, 'habitacion_id'))}
+
+
+# Estado de reservar_habitacion() -> código HTTP
+_ESTADOS_RESERVA = {
+    reservas.CONFIRMADA: 201,
+    reservas.NO_EXISTE: 404,
+    reservas.NO_DISPONIBLE: 409,
+    reservas.CONFLICTO: 503,
+    reservas.ERROR: 500,
+}
+
+
+def crear_reserva(peticion, consulta, cuerpo):
+    _requerir(cuerpo, 'habitacion_id', 'desde', 'hasta', 'huesped')
+    try:
+        resultado = reservas.reservar_habitacion(
+            _entero(cuerpo['habitacion_id'], 'habitacion_id'), cuerpo['desde'], cuerpo['hasta'], cuerpo['huesped'])
+    except ValueError as e:
+        raise ErrorPeticion(400, str(e)) from None
+    return _ESTADOS_RESERVA[resultado['estado']], resultado
+
+
+def cancelar_reserva(peticion, consulta, cuerpo, reserva_id):
+    if not reservas.cancelar_reserva(_entero(reserva_id, 'id')):
+        raise ErrorPeticion(404, "No se encontró la reserva.")
+    return 204, None
+
+
+def listar_servicios(peticion, consulta, cuerpo):
+    return 200, {'servicios': CRUD_servicios.obtener_todos_servicios_bd()}
+
+
+def obtener_servicio(peticion, consulta, cuerpo, servicio_id):
+    servicio = CRUD_servicios.obtener_servicio(_entero(servicio_id, 'id'))
+    if servicio is None:
+        raise ErrorPeticion(404, "No se encontró el servicio.")
+    return 200, servicio
+
+
+def agregar_servicio(peticion, consulta, cuerpo):
+    usuario_id = _usuario(peticion)
+    _requerir(cuerpo, 'nombre', 'precio')
+    if not CRUD_servicios.agregar_servicio_bd(usuario_id, cuerpo['nombre'], _decimal(cuerpo['precio'], 'precio')):
+        raise ErrorPeticion(500, "Error al agregar el servicio.")
+    return 201, {'nombre': cuerpo['nombre'], 'precio': cuerpo['precio']}
+
+
+def editar_servicio(peticion, consulta, cuerpo, servicio_id):
+    usuario_id = _usuario(peticion)
+    _requerir(cuerpo, 'nombre', 'precio')
+    servicio_id = _entero(servicio_id, 'id')
+    if CRUD_servicios.obtener_servicio(servicio_id) is None:
+        raise ErrorPeticion(404, "No se encontró el servicio.")
+    if not CRUD_servicios.editar_servicio_bd(usuario_id, servicio_id, cuerpo['nombre'],
+                                            _decimal(cuerpo['precio'], 'precio')):
+        raise ErrorPeticion(500, "Error al editar el servicio.")
+    return 200, {'id': servicio_id, 'nombre': cuerpo['nombre'], 'precio': cuerpo['precio']}
+
+
+def eliminar_servicio(peticion, consulta, cuerpo, servicio_id):
+    usuario_id = _usuario(peticion)
+    servicio_id = _entero(servicio_id, 'id')
+    if CRUD_servicios.obtener_servicio(servicio_id) is None:
+        raise ErrorPeticion(404, "No se encontró el servicio.")
+    if not CRUD_servicios.eliminar_servicio_bd(usuario_id, servicio_id):
+        raise ErrorPeticion(500, "Error al eliminar el servicio.")
+    return 204, None
+
+
+def cotizar_disponibles(peticion, consulta, cuerpo):
+    if not (consulta.get('desde') and consulta.get('hasta')):
+        raise ErrorPeticion(400, "Indique 'desde' y 'hasta'.")
+    try:
+        return 200, {'cotizaciones': cotizaciones.cotizar_disponibles(
+            consulta['desde'], consulta['hasta'], cotizaciones.leer_servicios(consulta.get('servicios')),
+            _decimal(consulta.get('descuento', 0), 'descuento'))}
+    except ValueError as e:
+        raise ErrorPeticion(400, str(e)) from None
+
+
+def cotizar(peticion, consulta, cuerpo):
+    # Un lote devuelve 200 con un 'error' en las cotizaciones inválidas; una sola, 400
+    if 'cotizaciones' not in cuerpo:
+        _requerir(cuerpo, 'habitacion_id', 'desde', 'hasta')
+        try:
+            return 200, cotizaciones.cotizar(cuerpo['habitacion_id'], cuerpo['desde'], cuerpo['hasta'],
+                                             cuerpo.get('servicios'), cuerpo.get('descuento') or 0)
+        except ValueError as e:
+            raise ErrorPeticion(400, str(e)) from None
+    solicitudes = cuerpo['cotizaciones']
+    if not isinstance(solicitudes, list) or not all(isinstance(solicitud, dict) for solicitud in solicitudes):
+        raise ErrorPeticion(400, "'cotizaciones' debe ser una lista de objetos.")
+    return 200, {'cotizaciones': cotizaciones.cotizar_lote(solicitudes)}
+
+
+# (método, patrón de ruta, operación); los grupos del patrón se pasan como argumentos
+RUTAS = [
+    ('GET', r'/salud', salud),
+    ('GET', r'/metricas', metricas),
+    ('GET', r'/habitaciones', listar_habitaciones),
+    ('GET', r'/habitaciones/buscar', buscar_habitaciones),
+    ('GET', r'/habitaciones/(\d+)', obtener_habitacion),
+    ('POST', r'/habitaciones', agregar_habitacion),
+    ('PUT', r'/habitaciones', guardar_habitaciones),
+    ('PUT', r'/habitaciones/(\d+)', actualizar_habitacion),
+    ('DELETE', r'/habitaciones/(\d+)', eliminar_habitacion),
+    ('GET', r'/reservas', listar_reservas),
+    ('POST', r'/reservas', crear_reserva),
+    ('DELETE', r'/reservas/(\d+)', cancelar_reserva),
+    ('GET', r'/servicios', listar_servicios),
+    ('GET', r'/servicios/(\d+)', obtener_servicio),
+    ('POST', r'/servicios', agregar_servicio),
+    ('PUT', r'/servicios/(\d+)', editar_servicio),
+    ('DELETE', r'/servicios/(\d+)', eliminar_servicio),
+    ('GET', r'/cotizaciones', cotizar_disponibles),
+    ('POST', r'/cotizaciones', cotizar),
+]
+_RUTAS = [(metodo, re.compile(patron + r'/?'), operacion) for metodo, patron, operacion in RUTAS]
+
+
+# ---------- Servidor ----------
+
+class ManejadorHotel(BaseHTTPRequestHandler):
+    """Atiende las peticiones JSON de una conexión (varias si el cliente usa keep-alive)."""
+
+    protocol_version = "HTTP/1.1"  # Keep-alive por defecto
+    server_version = "HotelHTTP/1.0"
+    timeout = HTTP_KEEPALIVE        # Cierra las conexiones inactivas
+
+    def do_GET(self):
+        self._despachar('GET')
+
+    def do_POST(self):
+        self._despachar('POST')
+
+    def do_PUT(self):
+        self._despachar('PUT')
+
+    def do_DELETE(self):
+        self._despachar('DELETE')
+
+    def _despachar(self, metodo):
+        partes = urlsplit(self.path)
+        consulta = {clave: valores[-1] for clave, valores in parse_qs(partes.query).items()}
+        try:
+            cuerpo = self._leer_cuerpo()
+            ruta_conocida = False
+            for metodo_ruta, patron, operacion in _RUTAS:
+                coincidencia = patron.fullmatch(partes.path)
+                if coincidencia is None:
+                    continue
+                ruta_conocida = True
+                if metodo_ruta == metodo:
+                    estado, datos = operacion(self, consulta, cuerpo, *coincidencia.groups())
+                    break
+            else:
+                if ruta_conocida:
+                    raise ErrorPeticion(405, f"Método {metodo} no permitido en {partes.path}.")
+                raise ErrorPeticion(404, f"Ruta desconocida: {partes.path}")
+        except ErrorPeticion as e:
+            estado, datos = e.estado, {'error': str(e)}
+        except CircuitoAbierto as e:
+            estado, datos = 503, {'error': str(e)}
+        except Exception as e:
+            registro.exception("Error al atender %s %s: %r", metodo, self.path, e)
+            estado, datos = 500, {'error': "Error interno del servidor."}
+        self._responder(estado, datos)
+
+    def _leer_cuerpo(self):
+        try:
+            longitud = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            longitud = -1
+        if longitud < 0:
+            self.close_connection = True
+            raise ErrorPeticion(400, "Content-Length inválido.")
+        if longitud > HTTP_MAX_CUERPO:
+            self.close_connection = True
+            raise ErrorPeticion(413, "Cuerpo demasiado grande.")
+        if not longitud:
+            return {}
+        try:
+            cuerpo = json.loads(self.rfile.read(longitud))
+        except ValueError:
+            raise ErrorPeticion(400, "El cuerpo no es JSON válido.") from None
+        if not isinstance(cuerpo, dict):
+            raise ErrorPeticion(400, "El cuerpo debe ser un objeto JSON.")
+        return cuerpo
+
+    def _responder(self, estado, datos):
+        if datos is None:
+            contenido, tipo = b"", None
+        elif isinstance(datos, TextoPlano):
+            contenido, tipo = datos.encode('utf-8'), 'text/plain; version=0.0.4; charset=utf-8'
+        else:
+            contenido = json.dumps(datos, default=_a_json, ensure_ascii=False).encode('utf-8')
+            tipo = 'application/json; charset=utf-8'
+        self.send_response(estado)
+        if tipo:
+            self.send_header('Content-Type', tipo)
+        self.send_header('Content-Length', str(len(contenido)))
+        self.end_headers()
+        if contenido:
+            self.wfile.write(contenido)
+
+    def log_message(self, formato, *args):
+        if self.server.registrar_peticiones:
+            registro.info("%s %s", self.address_string(), formato % args)
+
+
+class ServidorHotel(HTTPServer):
+    """
+    Servidor HTTP que atiende cada conexión en un pool de hilos de tamaño fijo, en lugar
+    de crear un hilo por conexión como ThreadingHTTPServer.
+    Args:
+        direccion (tuple): (host, puerto).
+        hilos (int): Conexiones atendidas a la vez.
+        cola (int): Conexiones pendientes de aceptar que admite el socket.
+        registrar_peticiones (bool): Registrar cada petición (nivel INFO del logger del módulo).
+    """
+
+    allow_reuse_address = True
+
+    def __init__(self, direccion, hilos=HTTP_HILOS, cola=HTTP_COLA, registrar_peticiones=True,
+                 manejador=ManejadorHotel):
+        self.request_queue_size = cola
+        self.registrar_peticiones = registrar_peticiones
+        self._ejecutor = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="hotel-http")
+        self._hilos_libres = threading.BoundedSemaphore(hilos)
+        super().__init__(direccion, manejador)
+
+    def get_request(self):
+        # Sin hilo libre no se acepta: la conexión sigue en la cola del socket. El OSError
+        # lo descarta _handle_request_noblock y serve_forever vuelve a intentarlo.
+        if not self._hilos_libres.acquire(timeout=_ESPERA_HILO):
+            raise OSError("No hay hilos libres.")
+        try:
+            return super().get_request()
+        except BaseException:
+            self._hilos_libres.release()
+            raise
+
+    def shutdown_request(self, request):
+        # Se llama una vez por cada conexión aceptada, se haya atendido o no
+        try:
+            super().shutdown_request(request)
+        finally:
+            self._hilos_libres.release()
+
+    def process_request(self, request, client_address):
+        self._ejecutor.submit(self._atender, request, client_address)
+
+    def _atender(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self._ejecutor.shutdown(wait=True)
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Servicio HTTP/JSON de habitaciones, reservas y servicios.")
+    parser.add_argument("--host", default=HTTP_HOST)
+    parser.add_argument("--puerto", type=int, default=HTTP_PUERTO)
+    parser.add_argument("--hilos", type=int, default=HTTP_HILOS,
+                        help=f"Conexiones atendidas a la vez (por defecto {HTTP_HILOS}).")
+    parser.add_argument("--silencioso", action="store_true", help="No registrar cada petición.")
+    opciones = parser.parse_args(argumentos)
+
+    configurar_registro()
+    if INSTANTANEA_ACTIVA:
+        iniciar_instantanea()
+    servidor = ServidorHotel((opciones.host, opciones.puerto), hilos=opciones.hilos,
+                             registrar_peticiones=not opciones.silencioso)
+    print(f"Servicio HTTP escuchando en http://{opciones.host}:{opciones.puerto} ({opciones.hilos} hilos)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        detener_instantanea()
+        cerrar_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+import logging
+import os
+import threading
+import time
+
+from conection_bd import conexion_bd, obtener_backend
+from modelos import Habitacion, Servicio
+
+registro = logging.getLogger(__name__)
+
+# ========== Sincronización incremental del catálogo ==========
+#
+# Cada alta o modificación de una habitación o un servicio deja en su columna `cambio` una
+# marca creciente (ROWVERSION en SQL Server, una secuencia mantenida por disparadores en
+# SQLite) y cada baja deja una fila en `eliminaciones` con su propia marca. Una réplica
+# local recuerda la última marca que aplicó y en cada sincronización solo lee lo que cambió
+# después: primero las bajas y luego las filas nuevas o modificadas, de modo que una
+# habitación eliminada y vuelta a crear con el mismo id acaba presente.
+#
+# La marca hasta la que se lee la da el backend (sql_marca_cambios): en SQL Server es la
+# anterior a MIN_ACTIVE_ROWVERSION(), para no saltarse filas de transacciones que aún no
+# se han confirmado y que al hacerlo tendrán una marca menor que la de otras ya visibles.
+
+# Días que se conservan las filas de `eliminaciones` (purgar_eliminaciones). Una réplica
+# que lleve más tiempo sin sincronizar vuelve a cargar el catálogo completo.
+RETENCION_ELIMINACIONES = int(os.environ.get("HOTEL_RETENCION_ELIMINACIONES_DIAS", "7"))
+
+# Con HOTEL_REPLICA_CATALOGO=1 los listados completos de CRUD_habitaciones y CRUD_servicios
+# se cargan de replica_catalogo: al caducar o invalidarse la caché solo se leen los cambios.
+# Requiere la columna `cambio` y la tabla `eliminaciones` (sql/sqlserver.sql).
+REPLICA_ACTIVA = os.environ.get("HOTEL_REPLICA_CATALOGO", "0") == "1"
+
+# tabla lógica -> (tabla en la BD, columnas, registro)
+TABLAS_SINCRONIZADAS = {
+    'habitaciones': ("dbohabitaciones", "*", Habitacion),
+    'servicios': ("dbo.servicios", "id, nombre, precio", Servicio),
+}
+
+
+class ReplicaCatalogo:
+    """
+    Copia local de habitaciones y servicios que se pone al día leyendo solo los cambios
+    desde la última sincronización. Segura entre hilos: los registros no se modifican,
+    se sustituyen, así que las listas ya devueltas siguen siendo coherentes.
+    Args:
+        retencion_dias (float): Antigüedad máxima de la última sincronización para poder
+            aplicar solo los cambios; pasado ese tiempo se recarga todo.
+    """
+
+    def __init__(self, retencion_dias=RETENCION_ELIMINACIONES):
+        self.retencion = retencion_dias * 86400
+        self._candado = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Olvida el contenido; la próxima sincronización carga el catálogo completo."""
+        self._tablas = {tabla: {} for tabla in TABLAS_SINCRONIZADAS}
+        self._listas = {tabla: [] for tabla in TABLAS_SINCRONIZADAS}
+        self.marca = None
+        self.ultima_sincronizacion = None  # time.time() de la última sincronización
+        self.origen = None                 # backend.origen de la base sincronizada
+        self._backend = None
+
+    @property
+    def sincronizada(self):
+        return self.marca is not None
+
+    def sincronizar(self):
+        """
+        Aplica los cambios posteriores a la última marca (o carga todo la primera vez).
+        Returns:
+            dict: {tabla: (filas nuevas o modificadas, filas eliminadas)}.
+        """
+        with self._candado:
+            backend = obtener_backend()
+            # Una réplica restaurada de una instantánea continúa desde su marca si la base
+            # es la misma (mismo backend.origen)
+            otra_base = backend is not self._backend and (backend.origen is None or backend.origen != self.origen)
+            completa = self.marca is None or otra_base or self.antiguedad() > self.retencion
+            with conexion_bd('sincronizar_catalogo') as conexion:
+                cursor = conexion.cursor()
+                cursor.execute(backend.sql_marca_cambios)
+                hasta = int(cursor.fetchone()[0] or 0)
+                if completa:
+                    resultado = self._cargar_todo(cursor)
+                elif hasta <= self.marca:
+                    resultado = {tabla: (0, 0) for tabla in TABLAS_SINCRONIZADAS}
+                else:
+                    resultado = self._aplicar_cambios(cursor, backend, self.marca, hasta)
+            self.marca = hasta
+            self.ultima_sincronizacion = time.time()
+            self.origen = backend.origen
+            self._backend = backend
+        if any(cambios != (0, 0) for cambios in resultado.values()):
+            registro.info("Catálogo sincronizado hasta la marca %d (%s): %s",
+                          hasta, "completa" if completa else "incremental", resultado)
+        return resultado
+
+    def _cargar_todo(self, cursor):
+        resultado = {}
+        for tabla, (tabla_bd, columnas, clase) in TABLAS_SINCRONIZADAS.items():
+            cursor.execute(f"SELECT {columnas} FROM {tabla_bd}")
+            registros = clase.desde_cursor(cursor, cursor.fetchall())
+            self._tablas[tabla] = {registro_.id: registro_ for registro_ in registros}
+            self._listas[tabla] = registros
+            resultado[tabla] = (len(registros), 0)
+        return resultado
+
+    def _aplicar_cambios(self, cursor, backend, desde, hasta):
+        marca = backend.parametro_marca
+        resultado = {}
+        for tabla, (tabla_bd, columnas, clase) in TABLAS_SINCRONIZADAS.items():
+            cursor.execute(f"SELECT registro_id FROM eliminaciones "
+                           f"WHERE tabla = ? AND cambio > {marca} AND cambio <= {marca}",
+                           (tabla, desde, hasta))
+            eliminados = [fila[0] for fila in cursor.fetchall()]
+            cursor.execute(f"SELECT {columnas} FROM {tabla_bd} WHERE cambio > {marca} AND cambio <= {marca}",
+                           (desde, hasta))
+            modificados = clase.desde_cursor(cursor, cursor.fetchall())
+            if not eliminados and not modificados:
+                resultado[tabla] = (0, 0)
+                continue
+            # Se trabaja sobre una copia para no alterar el diccionario que leen otros hilos
+            registros = dict(self._tablas[tabla])
+            for id_registro in eliminados:
+                registros.pop(id_registro, None)
+            for registro_ in modificados:
+                registros[registro_.id] = registro_
+            self._tablas[tabla] = registros
+            self._listas[tabla] = list(registros.values())
+            resultado[tabla] = (len(modificados), len(eliminados))
+        return resultado
+
+    def antiguedad(self):
+        """Segundos desde la última sincronización (infinito si nunca se sincronizó)."""
+        if self.ultima_sincronizacion is None:
+            return float('inf')
+        return max(time.time() - self.ultima_sincronizacion, 0.0)
+
+    def estado(self):
+        """
+        Returns:
+            dict: {'marca', 'origen', 'sincronizada_en' y una lista de registros por tabla},
+                  para guardarlo y restaurarlo después (instantanea.py).
+        """
+        with self._candado:
+            estado = {'marca': self.marca, 'origen': self.origen, 'sincronizada_en': self.ultima_sincronizacion}
+            estado.update((tabla, list(registros)) for tabla, registros in self._listas.items())
+        return estado
+
+    def restaurar(self, estado):
+        """Sustituye el contenido por un estado obtenido con estado()."""
+        with self._candado:
+            self._tablas = {tabla: {registro_.id: registro_ for registro_ in estado[tabla]}
+                            for tabla in TABLAS_SINCRONIZADAS}
+            self._listas = {tabla: list(estado[tabla]) for tabla in TABLAS_SINCRONIZADAS}
+            self.marca = estado['marca']
+            self.origen = estado['origen']
+            self.ultima_sincronizacion = estado['sincronizada_en']
+            self._backend = None
+
+    def habitaciones(self):
+        """Lista de Habitacion de la réplica (compartidas: no modificarlas, usar copiar())."""
+        return list(self._listas['habitaciones'])
+
+    def servicios(self):
+        """Lista de Servicio de la réplica (compartidos: no modificarlos, usar copiar())."""
+        return list(self._listas['servicios'])
+
+    def habitacion(self, id_habitacion):
+        return self._tablas['habitaciones'].get(id_habitacion)
+
+    def servicio(self, id_servicio):
+        return self._tablas['servicios'].get(id_servicio)
+
+
+def purgar_eliminaciones(dias=RETENCION_ELIMINACIONES):
+    """
+    Borra las filas de `eliminaciones` con más de `dias` días. Las réplicas que lleven más
+    de ese tiempo sin sincronizar recargan el catálogo completo, así que no las necesitan.
+    Returns:
+        int: Filas borradas.
+    """
+    with conexion_bd('purgar_eliminaciones') as conexion:
+        cursor = conexion.cursor()
+        cursor.execute(obtener_backend().sql_purgar_eliminaciones, (int(dias),))
+        borradas = max(cursor.rowcount, 0)
+        conexion.commit()
+    registro.info("Purgadas %d filas de eliminaciones con más de %d días.", borradas, dias)
+    return borradas
+
+
+# Réplica compartida por los módulos CRUD (ver HOTEL_REPLICA_CATALOGO)
+replica_catalogo = ReplicaCatalogo()
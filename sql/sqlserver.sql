@@ -0,0 +1,98 @@
+-- Objetos de base de datos que usa la aplicación en SQL Server (hotel_reservaciones).
+-- Las tablas dbohabitaciones y servicios y los procedimientos sp_*_servicio ya existen;
+-- este script añade lo que necesitan los módulos nuevos. El backend SQLite crea los
+-- equivalentes en backends_bd.ESQUEMA_SQLITE.
+
+-- Búsqueda por criterios (CRUD_habitaciones.buscar_habitaciones_bd)
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'ix_habitaciones_disponible_precio')
+    CREATE INDEX ix_habitaciones_disponible_precio ON dbohabitaciones (disponible, precio)
+        INCLUDE (camas, banos, vista, balcon);
+GO
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'ix_habitaciones_vista_precio')
+    CREATE INDEX ix_habitaciones_vista_precio ON dbohabitaciones (vista, precio);
+GO
+
+-- Calendario de disponibilidad por fechas (disponibilidad.py).
+-- Cada fila ocupa las noches [desde, hasta) de una habitación.
+IF OBJECT_ID('dbo.ocupacion_habitaciones') IS NULL
+    CREATE TABLE dbo.ocupacion_habitaciones (
+        id INT IDENTITY(1, 1) PRIMARY KEY,
+        habitacion_id INT NOT NULL,
+        desde DATE NOT NULL,
+        hasta DATE NOT NULL,
+        motivo NVARCHAR(30) NOT NULL DEFAULT 'reserva',
+        CONSTRAINT ck_ocupacion_rango CHECK (hasta > desde)
+    );
+GO
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'ix_ocupacion_habitacion_desde')
+    CREATE INDEX ix_ocupacion_habitacion_desde ON dbo.ocupacion_habitaciones (habitacion_id, desde) INCLUDE (hasta);
+GO
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'ix_ocupacion_desde_hasta')
+    CREATE INDEX ix_ocupacion_desde_hasta ON dbo.ocupacion_habitaciones (desde, hasta) INCLUDE (habitacion_id);
+GO
+
+-- Bloqueo optimista (reservas.py y actualizar_habitacion_bd): cada escritura sobre una
+-- habitación incrementa su versión y solo se aplica si la versión leída sigue vigente.
+IF COL_LENGTH('dbo.dbohabitaciones', 'version') IS NULL
+    ALTER TABLE dbo.dbohabitaciones ADD version INT NOT NULL CONSTRAINT df_habitaciones_version DEFAULT 0;
+GO
+IF COL_LENGTH('dbo.ocupacion_habitaciones', 'huesped') IS NULL
+    ALTER TABLE dbo.ocupacion_habitaciones ADD huesped NVARCHAR(100) NULL;
+GO
+
+-- Sincronización incremental (sincronizacion.py): `cambio` es ROWVERSION, así que SQL Server
+-- la renueva en cada INSERT/UPDATE sin disparadores; las bajas se anotan en eliminaciones
+-- (que también lleva su ROWVERSION) para que las réplicas las apliquen.
+IF COL_LENGTH('dbo.dbohabitaciones', 'cambio') IS NULL
+    ALTER TABLE dbo.dbohabitaciones ADD cambio ROWVERSION;
+GO
+IF COL_LENGTH('dbo.servicios', 'cambio') IS NULL
+    ALTER TABLE dbo.servicios ADD cambio ROWVERSION;
+GO
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'ix_habitaciones_cambio')
+    CREATE INDEX ix_habitaciones_cambio ON dbo.dbohabitaciones (cambio);
+GO
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'ix_servicios_cambio')
+    CREATE INDEX ix_servicios_cambio ON dbo.servicios (cambio);
+GO
+IF OBJECT_ID('dbo.eliminaciones') IS NULL
+    CREATE TABLE dbo.eliminaciones (
+        tabla NVARCHAR(30) NOT NULL,
+        registro_id INT NOT NULL,
+        cambio ROWVERSION,
+        fecha DATETIME2 NOT NULL CONSTRAINT df_eliminaciones_fecha DEFAULT SYSUTCDATETIME()
+    );
+GO
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'ix_eliminaciones_tabla_cambio')
+    CREATE INDEX ix_eliminaciones_tabla_cambio ON dbo.eliminaciones (tabla, cambio) INCLUDE (registro_id);
+GO
+CREATE OR ALTER TRIGGER dbo.tr_habitaciones_eliminar ON dbo.dbohabitaciones AFTER DELETE AS
+BEGIN
+    SET NOCOUNT ON;
+    INSERT INTO dbo.eliminaciones (tabla, registro_id) SELECT 'habitaciones', id FROM deleted;
+END;
+GO
+CREATE OR ALTER TRIGGER dbo.tr_servicios_eliminar ON dbo.servicios AFTER DELETE AS
+BEGIN
+    SET NOCOUNT ON;
+    INSERT INTO dbo.eliminaciones (tabla, registro_id) SELECT 'servicios', id FROM deleted;
+END;
+GO
+
+-- Reglas de precio por temporada (precios.py). Los filtros a NULL no filtran; desde/hasta
+-- a NULL dejan la regla vigente sin límite por ese lado.
+IF OBJECT_ID('dbo.reglas_precio') IS NULL
+    CREATE TABLE dbo.reglas_precio (
+        id INT IDENTITY(1, 1) PRIMARY KEY,
+        ambito NVARCHAR(20) NOT NULL CONSTRAINT ck_reglas_precio_ambito CHECK (ambito IN ('habitaciones', 'servicios')),
+        porcentaje DECIMAL(7, 2) NOT NULL,
+        vista NVARCHAR(50) NULL,
+        camas INT NULL,
+        balcon BIT NULL,
+        patron NVARCHAR(100) NULL,
+        desde DATE NULL,
+        hasta DATE NULL,
+        descripcion NVARCHAR(200) NULL,
+        CONSTRAINT ck_reglas_precio_rango CHECK (hasta IS NULL OR desde IS NULL OR hasta > desde)
+    );
+GO
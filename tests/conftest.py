@@ -0,0 +1,39 @@
+import os
+import sys
+
+import pytest
+
+# Las pruebas usan siempre SQLite en memoria, sin instantánea local ni réplica del catálogo.
+# Se fija antes de importar los módulos, que leen su configuración al cargarse.
+os.environ['HOTEL_BD_BACKEND'] = 'sqlite'
+os.environ['HOTEL_BD_SQLITE_RUTA'] = ':memory:'
+os.environ.pop('HOTEL_INSTANTANEA_RUTA', None)
+os.environ['HOTEL_REPLICA_CATALOGO'] = '0'
+os.environ['HOTEL_PRECARGA'] = '0'
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache_bd import cache_catalogo  # noqa: E402
+from conection_bd import configurar_bd, cerrar_pool  # noqa: E402
+from indice_texto import indice_texto  # noqa: E402
+
+
+def habitacion(id_habitacion, **cambios):
+    """Habitación completa con valores por defecto, para agregar_habitacion_bd / guardar_habitacion_bd."""
+    datos = {'id': id_habitacion, 'descripcion': f"Habitación {id_habitacion}", 'camas': 2, 'banos': 1,
+             'vista': 'mar', 'balcon': False, 'precio': 100.0, 'disponible': True,
+             'lugar_turistico': 'Malecón'}
+    datos.update(cambios)
+    return datos
+
+
+@pytest.fixture(autouse=True)
+def bd():
+    """Cada prueba empieza con una base en memoria vacía y sin nada en caché."""
+    backend = configurar_bd('sqlite', ruta=':memory:')
+    cache_catalogo.invalidar()
+    indice_texto.invalidar()
+    yield backend
+    cerrar_pool()
+    cache_catalogo.invalidar()
+    indice_texto.invalidar()
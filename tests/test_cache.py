@@ -0,0 +1,64 @@
+import pytest
+
+from cache_bd import CacheTTL, sin_cache
+
+
+def test_la_segunda_lectura_sale_de_la_cache():
+    cache = CacheTTL(capacidad=4, ttl=60)
+    cargas = []
+    cargar = lambda: cargas.append(1) or len(cargas)
+    assert cache.obtener_o_cargar(('habitaciones', 'todas'), cargar) == 1
+    assert cache.obtener_o_cargar(('habitaciones', 'todas'), cargar) == 1
+    assert cache.estadisticas()['aciertos'] == 1
+
+
+def test_invalidar_un_espacio_no_toca_los_demas():
+    cache = CacheTTL(capacidad=4, ttl=60)
+    cache.obtener_o_cargar(('habitaciones', 'todas'), lambda: 'h1')
+    cache.obtener_o_cargar(('servicios', 'todos'), lambda: 's1')
+    cache.invalidar('habitaciones')
+    assert cache.obtener_o_cargar(('habitaciones', 'todas'), lambda: 'h2') == 'h2'
+    assert cache.obtener_o_cargar(('servicios', 'todos'), lambda: 's2') == 's1'
+    assert cache.generacion('habitaciones') == 1 and cache.generacion('servicios') == 0
+
+
+def test_lo_cargado_mientras_se_invalidaba_no_se_guarda():
+    cache = CacheTTL(capacidad=4, ttl=60)
+
+    def cargar_e_invalidar():
+        cache.invalidar('habitaciones')  # Una escritura confirmada durante la carga
+        return 'obsoleto'
+
+    assert cache.obtener_o_cargar(('habitaciones', 'todas'), cargar_e_invalidar) == 'obsoleto'
+    assert cache.obtener_o_cargar(('habitaciones', 'todas'), lambda: 'nuevo') == 'nuevo'
+
+
+def test_un_error_del_cargador_no_se_guarda():
+    cache = CacheTTL(capacidad=4, ttl=60)
+
+    def fallar():
+        raise RuntimeError("base caída")
+
+    with pytest.raises(RuntimeError):
+        cache.obtener_o_cargar(('precios', 'reglas'), fallar)
+    assert cache.obtener_o_cargar(('precios', 'reglas'), lambda: ['regla']) == ['regla']
+
+
+def test_la_capacidad_expulsa_la_entrada_menos_usada():
+    cache = CacheTTL(capacidad=2, ttl=60)
+    cache.obtener_o_cargar(('a', 1), lambda: 1)
+    cache.obtener_o_cargar(('a', 2), lambda: 2)
+    cache.obtener_o_cargar(('a', 1), lambda: None)
+    cache.obtener_o_cargar(('a', 3), lambda: 3)
+    assert cache.obtener_o_cargar(('a', 1), lambda: 'recargada') == 1
+    assert cache.obtener_o_cargar(('a', 2), lambda: 'recargada') == 'recargada'
+
+
+def test_sin_cache_ni_lee_ni_guarda():
+    cache = CacheTTL(capacidad=4, ttl=60)
+    cache.obtener_o_cargar(('habitaciones', 'todas'), lambda: 'confirmado')
+    with sin_cache():
+        assert cache.obtener_o_cargar(('habitaciones', 'todas'), lambda: 'sin confirmar') == 'sin confirmar'
+        assert cache.obtener_o_cargar(('habitaciones', 'otra'), lambda: 'sin confirmar') == 'sin confirmar'
+    assert cache.obtener_o_cargar(('habitaciones', 'todas'), lambda: None) == 'confirmado'
+    assert cache.obtener_o_cargar(('habitaciones', 'otra'), lambda: 'confirmado') == 'confirmado'
@@ -0,0 +1,59 @@
+import pytest
+
+import CRUD_habitaciones
+from conftest import habitacion
+
+
+@pytest.fixture
+def siete_habitaciones():
+    # IDs no consecutivos; la 4 y la 9 no están disponibles
+    for id_habitacion in (1, 2, 4, 5, 7, 9, 12):
+        CRUD_habitaciones.agregar_habitacion_bd(habitacion(id_habitacion, disponible=id_habitacion not in (4, 9)))
+
+
+def _recorrer(paginar, tamano, solo_disponibles=False):
+    paginas = []
+    siguiente = None
+    while True:
+        pagina, siguiente = paginar(siguiente, tamano, solo_disponibles=solo_disponibles)
+        paginas.append([h['id'] for h in pagina])
+        if siguiente is None:
+            return paginas
+
+
+@pytest.mark.parametrize('paginar', [CRUD_habitaciones.obtener_pagina_habitaciones, CRUD_habitaciones._pagina_local],
+                         ids=['bd', 'local'])
+def test_las_paginas_recorren_todo_sin_repetir(siete_habitaciones, paginar):
+    assert _recorrer(paginar, 3) == [[1, 2, 4], [5, 7, 9], [12]]
+    assert _recorrer(paginar, 1) == [[1], [2], [4], [5], [7], [9], [12]]
+    assert _recorrer(paginar, 100) == [[1, 2, 4, 5, 7, 9, 12]]
+
+
+@pytest.mark.parametrize('paginar', [CRUD_habitaciones.obtener_pagina_habitaciones, CRUD_habitaciones._pagina_local],
+                         ids=['bd', 'local'])
+def test_una_ultima_pagina_completa_no_tiene_siguiente(siete_habitaciones, paginar):
+    pagina, siguiente = paginar(None, 7, solo_disponibles=False)
+    assert len(pagina) == 7 and siguiente is None
+    assert _recorrer(paginar, 5, solo_disponibles=True) == [[1, 2, 5, 7, 12]]
+
+
+@pytest.mark.parametrize('paginar', [CRUD_habitaciones.obtener_pagina_habitaciones, CRUD_habitaciones._pagina_local],
+                         ids=['bd', 'local'])
+def test_solo_disponibles(siete_habitaciones, paginar):
+    assert _recorrer(paginar, 2, solo_disponibles=True) == [[1, 2], [5, 7], [12]]
+
+
+def test_el_cursor_puede_ser_un_id_que_no_existe(siete_habitaciones):
+    pagina, siguiente = CRUD_habitaciones.obtener_pagina_habitaciones(3, 2)
+    assert [h.id for h in pagina] == [4, 5] and siguiente == 5
+    assert CRUD_habitaciones.obtener_pagina_habitaciones(12, 2) == ([], None)
+
+
+def test_tabla_vacia():
+    assert CRUD_habitaciones.obtener_pagina_habitaciones() == ([], None)
+
+
+@pytest.mark.parametrize('tamano', [0, -1, -2])
+def test_un_tamano_de_pagina_menor_que_uno_es_un_error(siete_habitaciones, tamano):
+    with pytest.raises(ValueError):
+        CRUD_habitaciones.obtener_pagina_habitaciones(None, tamano)
@@ -0,0 +1,98 @@
+import http.client
+import json
+import threading
+
+import pytest
+
+import CRUD_habitaciones
+import servidor_http
+from conftest import habitacion
+from servidor_http import ErrorPeticion
+
+
+def _estado_de_error(operacion, *argumentos):
+    with pytest.raises(ErrorPeticion) as error:
+        operacion(None, *argumentos)
+    return error.value.estado
+
+
+@pytest.mark.parametrize('limite', ['0', '-1', 'diez'])
+def test_un_limite_invalido_es_un_400(limite):
+    assert _estado_de_error(servidor_http.listar_habitaciones, {'limite': limite}, {}) == 400
+    assert _estado_de_error(servidor_http.buscar_habitaciones, {'limite': limite}, {}) == 400
+    assert _estado_de_error(servidor_http.buscar_habitaciones, {'texto': 'suite', 'limite': limite}, {}) == 400
+
+
+def test_el_limite_se_recorta_al_maximo(monkeypatch):
+    monkeypatch.setattr(servidor_http, 'HTTP_LIMITE_MAXIMO', 2)
+    for id_habitacion in (1, 2, 3):
+        CRUD_habitaciones.agregar_habitacion_bd(habitacion(id_habitacion))
+    estado, datos = servidor_http.listar_habitaciones(None, {'limite': '1000'}, {})
+    assert estado == 200
+    assert [h.id for h in datos['habitaciones']] == [1, 2] and datos['siguiente'] == 2
+
+
+@pytest.mark.parametrize('valor, esperado', [(True, True), (False, False), ('false', False), ('0', False),
+                                             ('no', False), ('si', True), ('1', True), (1, True)])
+def test_booleanos(valor, esperado):
+    assert servidor_http._booleano(valor, 'balcon') is esperado
+
+
+def test_un_booleano_desconocido_es_un_400():
+    cuerpo = dict(habitacion(1), balcon='quizá')
+    assert _estado_de_error(servidor_http.agregar_habitacion, {}, cuerpo) == 400
+    assert _estado_de_error(servidor_http.buscar_habitaciones, {'disponible': 'tal vez'}, {}) == 400
+
+
+def test_balcon_false_en_texto_se_guarda_como_falso():
+    estado, _ = servidor_http.agregar_habitacion(None, {}, dict(habitacion(1), balcon='false', disponible='0'))
+    assert estado == 201
+    guardada = CRUD_habitaciones.buscar_habitacion_por_id_bd(1)
+    assert not guardada.balcon and not guardada.disponible
+
+
+def test_fechas_mal_formadas_son_un_400():
+    CRUD_habitaciones.agregar_habitacion_bd(habitacion(1))
+    consulta = {'desde': 'ayer', 'hasta': '2030-01-02'}
+    assert _estado_de_error(servidor_http.obtener_habitacion, consulta, {}, '1') == 400
+    assert _estado_de_error(servidor_http.listar_habitaciones, consulta, {}) == 400
+
+
+def test_una_version_atrasada_es_un_409():
+    CRUD_habitaciones.agregar_habitacion_bd(habitacion(1))
+    estado, _ = servidor_http.actualizar_habitacion(None, {}, dict(habitacion(1), version=0), '1')
+    assert estado == 200
+    assert _estado_de_error(servidor_http.actualizar_habitacion, {}, dict(habitacion(1), version=0), '1') == 409
+
+
+@pytest.fixture
+def servidor():
+    servidor = servidor_http.ServidorHotel(('127.0.0.1', 0), hilos=2, registrar_peticiones=False)
+    hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+    hilo.start()
+    yield servidor
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def _pedir(servidor, metodo, ruta, cuerpo=None, cabeceras=None):
+    conexion = http.client.HTTPConnection(*servidor.server_address, timeout=5)
+    try:
+        conexion.request(metodo, ruta, body=cuerpo, headers=cabeceras or {})
+        respuesta = conexion.getresponse()
+        return respuesta.status, json.loads(respuesta.read() or 'null')
+    finally:
+        conexion.close()
+
+
+@pytest.mark.parametrize('longitud', ['abc', '-5'])
+def test_un_content_length_invalido_es_un_400(servidor, longitud):
+    estado, datos = _pedir(servidor, 'POST', '/habitaciones', '{}', {'Content-Length': longitud})
+    assert estado == 400 and 'error' in datos
+
+
+def test_alta_y_lectura_por_http(servidor):
+    estado, _ = _pedir(servidor, 'POST', '/habitaciones', json.dumps(habitacion(1)))
+    assert estado == 201
+    estado, datos = _pedir(servidor, 'GET', '/habitaciones/1?desde=2030-01-01&hasta=2030-01-03')
+    assert estado == 200 and datos['id'] == 1 and datos['libre'] is True
@@ -0,0 +1,100 @@
+import pytest
+
+import CRUD_habitaciones
+from conection_bd import ErrorTransaccion, al_confirmar, conexion_bd, en_transaccion, transaccion
+from conftest import habitacion
+
+
+class Cancelar(Exception):
+    pass
+
+
+def _ids(habitaciones):
+    return [h['id'] for h in habitaciones]
+
+
+def test_lo_confirmado_se_ve_fuera_de_la_transaccion():
+    with transaccion():
+        assert CRUD_habitaciones.agregar_habitacion_bd(habitacion(1))
+        assert CRUD_habitaciones.agregar_habitacion_bd(habitacion(2))
+    assert CRUD_habitaciones.buscar_habitacion_por_id_bd(1) is not None
+    assert _ids(CRUD_habitaciones.obtener_todas_habitaciones()) == [1, 2]
+
+
+def test_lo_revertido_no_se_ve():
+    with pytest.raises(Cancelar):
+        with transaccion():
+            CRUD_habitaciones.agregar_habitacion_bd(habitacion(1))
+            raise Cancelar()
+    assert CRUD_habitaciones.buscar_habitacion_por_id_bd(1) is None
+    assert CRUD_habitaciones.obtener_todas_habitaciones() == []
+
+
+def test_dentro_de_la_transaccion_se_ve_lo_escrito_en_ella():
+    CRUD_habitaciones.agregar_habitacion_bd(habitacion(1))
+    assert _ids(CRUD_habitaciones.obtener_todas_habitaciones()) == [1]  # Queda en caché
+    with transaccion():
+        CRUD_habitaciones.agregar_habitacion_bd(habitacion(2, descripcion="Suite con jacuzzi"))
+        assert en_transaccion()
+        assert _ids(CRUD_habitaciones.obtener_todas_habitaciones()) == [1, 2]
+        assert _ids(CRUD_habitaciones.buscar_habitaciones_texto('jacuzzi')) == [2]
+    assert not en_transaccion()
+
+
+def test_una_transaccion_revertida_no_deja_filas_en_la_cache_ni_en_el_indice_de_texto():
+    with pytest.raises(Cancelar):
+        with transaccion():
+            CRUD_habitaciones.agregar_habitacion_bd(habitacion(1, descripcion="Suite"))
+            assert _ids(CRUD_habitaciones.obtener_todas_habitaciones()) == [1]
+            assert _ids(CRUD_habitaciones.buscar_habitaciones_texto('suite')) == [1]
+            raise Cancelar()
+    assert CRUD_habitaciones.obtener_todas_habitaciones() == []
+    assert CRUD_habitaciones.buscar_habitaciones_texto('suite') == []
+    assert CRUD_habitaciones.buscar_habitaciones(camas=2) == []
+
+
+def test_un_fallo_capturado_por_una_funcion_bd_revierte_toda_la_transaccion():
+    with pytest.raises(ErrorTransaccion):
+        with transaccion():
+            CRUD_habitaciones.agregar_habitacion_bd(habitacion(1))
+            with pytest.raises(Exception):
+                with conexion_bd('consulta_invalida') as conexion:
+                    conexion.cursor().execute("SELECT * FROM tabla_que_no_existe")
+    assert CRUD_habitaciones.buscar_habitacion_por_id_bd(1) is None
+
+
+def test_el_punto_de_guardado_revertido_solo_deshace_lo_suyo():
+    with transaccion():
+        CRUD_habitaciones.agregar_habitacion_bd(habitacion(1))
+        with pytest.raises(Cancelar):
+            with transaccion():
+                CRUD_habitaciones.agregar_habitacion_bd(habitacion(2))
+                raise Cancelar()
+        with transaccion():
+            CRUD_habitaciones.agregar_habitacion_bd(habitacion(3))
+    assert _ids(CRUD_habitaciones.obtener_todas_habitaciones()) == [1, 3]
+
+
+def test_al_confirmar_solo_se_ejecuta_tras_el_commit():
+    ejecutadas = []
+    with transaccion():
+        al_confirmar(lambda: ejecutadas.append('confirmada'))
+        assert ejecutadas == []
+    assert ejecutadas == ['confirmada']
+
+    with pytest.raises(Cancelar):
+        with transaccion():
+            al_confirmar(lambda: ejecutadas.append('revertida'))
+            raise Cancelar()
+    assert ejecutadas == ['confirmada']
+
+
+def test_al_confirmar_de_un_punto_de_guardado_revertido_se_descarta():
+    ejecutadas = []
+    with transaccion():
+        with pytest.raises(Cancelar):
+            with transaccion():
+                al_confirmar(lambda: ejecutadas.append('interna'))
+                raise Cancelar()
+        al_confirmar(lambda: ejecutadas.append('externa'))
+    assert ejecutadas == ['externa']
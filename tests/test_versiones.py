@@ -0,0 +1,110 @@
+import CRUD_habitaciones
+import reservas
+from CRUD_habitaciones import ACTUALIZADA, CONFLICTO, INSERTADA, NO_EXISTE
+from conection_bd import conexion_bd
+from conftest import habitacion
+from disponibilidad import esta_libre
+
+
+def _version(id_habitacion):
+    return CRUD_habitaciones.buscar_habitacion_por_id_bd(id_habitacion).version
+
+
+def _cambio_externo(id_habitacion):
+    # Lo que haría otro proceso: una escritura que no pasa por la caché de este
+    with conexion_bd('cambio_externo') as conexion:
+        conexion.cursor().execute(
+            "UPDATE dbohabitaciones SET precio = precio + 1, version = version + 1 WHERE id = ?", (id_habitacion,))
+        conexion.commit()
+
+
+def test_la_actualizacion_versionada_incrementa_la_version():
+    CRUD_habitaciones.agregar_habitacion_bd(habitacion(1))
+    leida = CRUD_habitaciones.buscar_habitacion_por_id_bd(1)
+    assert leida.version == 0
+    leida['precio'] = 150.0
+    assert CRUD_habitaciones.actualizar_habitacion_versionada_bd(leida, leida.version) == ACTUALIZADA
+    assert _version(1) == 1
+
+
+def test_una_version_atrasada_da_conflicto_y_no_escribe():
+    CRUD_habitaciones.agregar_habitacion_bd(habitacion(1))
+    leida = CRUD_habitaciones.buscar_habitacion_por_id_bd(1)
+    _cambio_externo(1)
+    leida['precio'] = 150.0
+    assert CRUD_habitaciones.actualizar_habitacion_versionada_bd(leida, leida.version) == CONFLICTO
+    actual = CRUD_habitaciones.buscar_habitacion_por_id_bd(1)
+    assert (actual.version, actual.precio) == (1, 101.0)
+    # Releer y reaplicar sobre la versión actual funciona
+    actual['precio'] = 150.0
+    assert CRUD_habitaciones.actualizar_habitacion_versionada_bd(actual, actual.version) == ACTUALIZADA
+
+
+def test_un_conflicto_invalida_el_catalogo_cacheado():
+    CRUD_habitaciones.agregar_habitacion_bd(habitacion(1))
+    assert CRUD_habitaciones.obtener_todas_habitaciones()[0].precio == 100.0
+    _cambio_externo(1)
+    assert CRUD_habitaciones.actualizar_habitacion_versionada_bd(habitacion(1), 0) == CONFLICTO
+    assert CRUD_habitaciones.obtener_todas_habitaciones()[0].precio == 101.0
+
+
+def test_la_actualizacion_versionada_de_una_habitacion_inexistente():
+    assert CRUD_habitaciones.actualizar_habitacion_versionada_bd(habitacion(9), 0) == NO_EXISTE
+    assert CRUD_habitaciones.actualizar_habitacion_versionada_bd(habitacion(9)) == NO_EXISTE
+
+
+def test_actualizar_habitacion_bd_gana_la_ultima_escritura():
+    CRUD_habitaciones.agregar_habitacion_bd(habitacion(1))
+    atrasada = CRUD_habitaciones.buscar_habitacion_por_id_bd(1)
+    _cambio_externo(1)
+    atrasada['precio'] = 130.0
+    assert CRUD_habitaciones.actualizar_habitacion_bd(atrasada)
+    assert CRUD_habitaciones.buscar_habitacion_por_id_bd(1).precio == 130.0
+
+
+def test_guardar_habitacion_inserta_o_actualiza():
+    assert CRUD_habitaciones.guardar_habitacion_bd(habitacion(1)) == INSERTADA
+    assert CRUD_habitaciones.guardar_habitacion_bd(habitacion(1, precio=120.0)) == ACTUALIZADA
+    assert CRUD_habitaciones.guardar_habitacion_bd(habitacion(1), actualizar=False) == CONFLICTO
+    assert CRUD_habitaciones.guardar_habitacion_bd(habitacion(1, precio=90.0), version_esperada=0) == CONFLICTO
+    guardada = CRUD_habitaciones.buscar_habitacion_por_id_bd(1)
+    assert (guardada.precio, guardada.version) == (120.0, 1)
+
+
+def test_guardar_habitaciones_en_bloque():
+    CRUD_habitaciones.agregar_habitacion_bd(habitacion(1))
+    resumen = CRUD_habitaciones.guardar_habitaciones_bd([habitacion(1), habitacion(2), habitacion(2, precio=80.0)])
+    assert resumen['error'] is None
+    assert (resumen['insertadas'], resumen['actualizadas'], resumen['duplicadas']) == ([2], [1], [2])
+    assert CRUD_habitaciones.buscar_habitacion_por_id_bd(2).precio == 80.0
+
+
+def test_reservar_incrementa_la_version_y_bloquea_las_noches():
+    CRUD_habitaciones.agregar_habitacion_bd(habitacion(1))
+    resultado = reservas.reservar_habitacion(1, '2030-12-01', '2030-12-05', 'Ana')
+    assert resultado['estado'] == reservas.CONFIRMADA
+    assert _version(1) == 1
+    assert not esta_libre(1, '2030-12-04', '2030-12-06')
+    assert esta_libre(1, '2030-12-05', '2030-12-06')
+    solapada = reservas.reservar_habitacion(1, '2030-12-03', '2030-12-04', 'Luis')
+    assert solapada['estado'] == reservas.NO_DISPONIBLE
+    assert [r.huesped for r in reservas.obtener_reservas(1)] == ['Ana']
+
+
+def test_reservar_una_habitacion_inexistente():
+    assert reservas.reservar_habitacion(9, '2030-12-01', '2030-12-02', 'Ana')['estado'] == reservas.NO_EXISTE
+
+
+def test_al_eliminar_una_habitacion_se_eliminan_sus_reservas():
+    CRUD_habitaciones.agregar_habitacion_bd(habitacion(1))
+    reservas.reservar_habitacion(1, '2030-12-01', '2030-12-05', 'Ana')
+    assert CRUD_habitaciones.eliminar_habitacion_bd(1)
+    assert CRUD_habitaciones.agregar_habitacion_bd(habitacion(1))
+    assert reservas.obtener_reservas(1) == []
+    assert esta_libre(1, '2030-12-02', '2030-12-03')
+
+
+def test_una_habitacion_inexistente_no_esta_libre():
+    CRUD_habitaciones.agregar_habitacion_bd(habitacion(1))
+    assert esta_libre(1, '2030-12-01', '2030-12-02')
+    assert not esta_libre(2, '2030-12-01', '2030-12-02')